@@ -3,14 +3,21 @@ import logging
 from dotenv import load_dotenv
 
 from flask import Flask, send_from_directory
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from flask_login import LoginManager
 
 from flask_backend.utils.db_tools import (
     populate_categories_table,
     get_database_url,
 )
-from flask_backend.database.models import db, Account
+from flask_backend.utils.session import (
+    scope_cache,
+    account_cache,
+    load_cached_account,
+)
+from flask_backend.utils.sync_jobs import sync_jobs
+from flask_backend.utils.rollups import rebuild_monthly_totals
+from flask_backend.database.models import db
 from flask_backend.database.tables import (
     categories_table,
     CATEGORY_LIST,
@@ -18,12 +25,19 @@ from flask_backend.database.tables import (
     scope_access_table,
     expenses_table,  # Added this import
     persons_table,
+    monthly_category_totals_table,
+    plaid_accounts_table,
+    idempotency_keys_table,
 )
 
 from flask_backend.routes.account_routes import account_routes
 from flask_backend.routes.auth_routes import auth_routes
 from flask_backend.routes.expense_routes import expense_routes
-from flask_backend.routes.plaid_routes import plaid_routes
+from flask_backend.routes.plaid_routes import (
+    plaid_routes,
+    institution_cache,
+    item_accounts_cache,
+)
 from flask_backend.routes.household_routes import household_routes
 
 
@@ -65,8 +79,44 @@ def create_app(test_config=None):
     # Flask extensions like Flask-Login
     app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
 
-    # Using SQLAlchemy Core to run lower-level database operations
-    app.config["ENGINE"] = create_engine(DATABASE_URL)
+    # Using SQLAlchemy Core to run lower-level database operations.
+    # fast_executemany sends executemany() parameters to SQL Server as one
+    # array instead of a round trip per row.
+    app.config["ENGINE"] = create_engine(DATABASE_URL, fast_executemany=True)
+
+    # Rows per INSERT/commit when writing Plaid transactions
+    app.config["PLAID_INSERT_BATCH_SIZE"] = int(os.getenv("PLAID_INSERT_BATCH_SIZE", "1000"))
+
+    # Rows per DELETE/commit when removing a Plaid item or a household
+    app.config["TEARDOWN_BATCH_SIZE"] = int(os.getenv("TEARDOWN_BATCH_SIZE", "1000"))
+
+    # How long a response stored under an Idempotency-Key is replayed
+    app.config["IDEMPOTENCY_KEY_TTL"] = float(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+
+    # Background threads running queued Plaid syncs
+    app.config["SYNC_WORKERS"] = int(os.getenv("SYNC_WORKERS", "2"))
+    sync_jobs.configure(max_workers=app.config["SYNC_WORKERS"])
+
+    # Check Plaid's signature on incoming webhooks (disable only for local testing)
+    app.config["PLAID_WEBHOOK_VERIFY"] = os.getenv("PLAID_WEBHOOK_VERIFY", "true").lower() != "false"
+
+    # Where background jobs store finished asset and CRA reports
+    app.config["PLAID_REPORTS_DIR"] = os.getenv(
+        "PLAID_REPORTS_DIR", os.path.join(app.instance_path, "plaid_reports")
+    )
+
+    # Items fetched from Plaid at once by /api/sync_all_items
+    app.config["PLAID_SYNC_CONCURRENCY"] = int(os.getenv("PLAID_SYNC_CONCURRENCY", "4"))
+
+    # Seconds to reuse Plaid institution metadata and account balances
+    app.config["PLAID_INSTITUTION_CACHE_TTL"] = float(
+        os.getenv("PLAID_INSTITUTION_CACHE_TTL_SECONDS", str(24 * 60 * 60))
+    )
+    app.config["PLAID_BALANCE_CACHE_TTL"] = float(
+        os.getenv("PLAID_BALANCE_CACHE_TTL_SECONDS", "300")
+    )
+    institution_cache.configure(ttl=app.config["PLAID_INSTITUTION_CACHE_TTL"])
+    item_accounts_cache.configure(ttl=app.config["PLAID_BALANCE_CACHE_TTL"])
 
     if app.config["FLASK_ENV"] == "development":
         print("Database URL: ", DATABASE_URL)
@@ -77,6 +127,19 @@ def create_app(test_config=None):
     # Configure session cookies
     app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 
+    # Seconds to cache each user's accessible scope IDs across requests
+    # (0 disables the cross-request cache; they are still resolved once per request)
+    app.config["SCOPE_CACHE_TTL"] = float(os.getenv("SCOPE_CACHE_TTL_SECONDS", "0"))
+    scope_cache.configure(ttl=app.config["SCOPE_CACHE_TTL"])
+
+    # Bounded cache of Account rows used by the Flask-Login user loader
+    app.config["ACCOUNT_CACHE_SIZE"] = int(os.getenv("ACCOUNT_CACHE_SIZE", "1024"))
+    app.config["ACCOUNT_CACHE_TTL"] = float(os.getenv("ACCOUNT_CACHE_TTL_SECONDS", "60"))
+    account_cache.configure(
+        maxsize=app.config["ACCOUNT_CACHE_SIZE"],
+        ttl=app.config["ACCOUNT_CACHE_TTL"],
+    )
+
     # Attach the SQLAlchemy instance to the Flask app
     db.init_app(app)
 
@@ -85,7 +148,7 @@ def create_app(test_config=None):
 
     @login_manager.user_loader
     def load_user(user_id):
-        return Account.query.get(int(user_id))
+        return load_cached_account(int(user_id))
 
     # Create tables in correct order
     with app.app_context():
@@ -108,6 +171,20 @@ def create_app(test_config=None):
             
             # 5. Expenses (depends on scopes and persons)
             expenses_table.create(bind=conn, checkfirst=True)
+
+            # 6. Monthly rollup of expenses (keyed by ScopeID). The dashboard
+            # reads whole months from it, so a new rollup is filled from the
+            # expenses already stored.
+            rollup_is_new = not inspect(conn).has_table(monthly_category_totals_table.name)
+            monthly_category_totals_table.create(bind=conn, checkfirst=True)
+            if rollup_is_new:
+                rebuild_monthly_totals(conn)
+
+            # 7. Accounts of linked Plaid items (keyed by plaid_items.ItemID)
+            plaid_accounts_table.create(bind=conn, checkfirst=True)
+
+            # 8. Stored responses of idempotent requests (no dependencies)
+            idempotency_keys_table.create(bind=conn, checkfirst=True)
             
         # Populate categories after tables are created
         populate_categories_table(app.config["ENGINE"], categories_table, CATEGORY_LIST)
@@ -12,6 +12,8 @@ from sqlalchemy import (
     Text, 
     DateTime,
     Enum,
+    Index,
+    and_,
 )
 
 metadata = MetaData()
@@ -80,6 +82,13 @@ expenses_table = Table(
     Column("CategoryConfirmed", Boolean),
     Column("MerchantName", String(255)),
     Column("SourceType", Enum("manual", "plaid", name="source_type_enum")),
+    # Hash of date, amount and merchant for expenses without Plaid IDs
+    # (see utils/expense_fingerprints.py)
+    Column("Fingerprint", String(64)),
+    # The bank's own ID of an imported statement transaction (OFX FITID)
+    Column("BankTransactionID", String(255)),
+    # Digest of the statement account the BankTransactionID belongs to
+    Column("BankAccountID", String(64)),
     # Plaid-specific fields:
     Column("PlaidAccountID", String(255)),
     Column("PlaidTransactionID", String(255)),
@@ -104,6 +113,57 @@ expenses_table = Table(
     implicit_returning=False,
 )
 
+# Dashboard and listing queries filter on ScopeID plus an ExpenseDate range;
+# the included columns let the monthly aggregates be answered from the index.
+Index(
+    "IX_expenses_ScopeID_ExpenseDate",
+    expenses_table.c.ScopeID,
+    expenses_table.c.ExpenseDate,
+    mssql_include=["Amount", "ExpenseCategory", "IsIncome"],
+)
+
+# Natural key of a Plaid transaction, used by the ingestion dedupe probe.
+# Filtered so manual expenses (no Plaid IDs) are not constrained.
+Index(
+    "UX_expenses_PlaidAccountID_PlaidTransactionID",
+    expenses_table.c.PlaidAccountID,
+    expenses_table.c.PlaidTransactionID,
+    unique=True,
+    mssql_where=and_(
+        expenses_table.c.PlaidAccountID.isnot(None),
+        expenses_table.c.PlaidTransactionID.isnot(None),
+    ),
+)
+
+# Ingestion looks up pending transactions that a stored posted row replaced,
+# so pages replayed after a sync restart don't bring them back
+Index(
+    "IX_expenses_PlaidAccountID_PlaidPendingTransactionID",
+    expenses_table.c.PlaidAccountID,
+    expenses_table.c.PlaidPendingTransactionID,
+    mssql_where=expenses_table.c.PlaidPendingTransactionID.isnot(None),
+)
+
+# Duplicate checks for manual and imported expenses probe this index with
+# the scope and the content fingerprint. Not unique: the same purchase can
+# legitimately happen twice on one day.
+Index(
+    "IX_expenses_ScopeID_Fingerprint",
+    expenses_table.c.ScopeID,
+    expenses_table.c.Fingerprint,
+    mssql_where=expenses_table.c.Fingerprint.isnot(None),
+)
+
+# Statement imports look up the bank's transaction IDs per scope and
+# account; FITIDs are only unique within one account
+Index(
+    "IX_expenses_ScopeID_BankAccountID_BankTransactionID",
+    expenses_table.c.ScopeID,
+    expenses_table.c.BankAccountID,
+    expenses_table.c.BankTransactionID,
+    mssql_where=expenses_table.c.BankTransactionID.isnot(None),
+)
+
 # Define the categories table
 categories_table = Table(
     "categories",
@@ -174,6 +234,31 @@ plaid_items_table = Table(
     implicit_returning=False,
 )
 
+# Accounts under each linked Plaid item, recorded when the item is linked and
+# refreshed on every sync, so an item's expenses can be found by
+# PlaidAccountID without asking Plaid.
+plaid_accounts_table = Table(
+    "plaid_accounts",
+    metadata,
+    Column("PlaidAccountID", String(255), primary_key=True),
+    Column("ItemID", Integer, nullable=False),  # plaid_items.ItemID
+    Column("ScopeID", Integer, nullable=False),
+    Column("Name", String(255)),
+    Column("OfficialName", String(255)),
+    Column("Mask", String(10)),
+    Column("Type", String(50)),
+    Column("Subtype", String(50)),
+    Column("CurrentBalance", Float),
+    Column("AvailableBalance", Float),
+    Column("IsoCurrencyCode", String(10)),
+    Column("BalanceUpdated", DateTime),
+    Column("CreateDate", Date),
+    Column("LastUpdated", Date),
+    Index("IX_plaid_accounts_ItemID", "ItemID"),
+    extend_existing=False,
+    implicit_returning=False,
+)
+
 category_targets_table = Table(
     "category_targets",
     metadata,
@@ -187,4 +272,58 @@ category_targets_table = Table(
     Column("LastUpdated", Date),
     extend_existing=False,
     implicit_returning=False,
-)
\ No newline at end of file
+)
+
+# Pre-summed expenses per scope, calendar month, category and income flag.
+# Kept current by the expense write paths (see utils/rollups.py) so the
+# dashboard endpoints don't have to scan the expenses table.
+monthly_category_totals_table = Table(
+    "monthly_category_totals",
+    metadata,
+    Column("RollupID", Integer, primary_key=True),
+    Column("ScopeID", Integer, nullable=False),
+    Column("Year", Integer, nullable=False),
+    Column("Month", Integer, nullable=False),  # 1-12, from ExpenseDate
+    Column("ExpenseCategory", String(255)),
+    Column("IsIncome", Boolean),
+    Column("Total", Float, nullable=False, default=0),
+    Column("ExpenseCount", Integer, nullable=False, default=0),
+    Column("LastUpdated", Date),
+    Index(
+        "UX_monthly_category_totals_key",
+        "ScopeID",
+        "Year",
+        "Month",
+        "ExpenseCategory",
+        "IsIncome",
+        unique=True,
+    ),
+    extend_existing=False,
+    implicit_returning=False,
+)
+
+# Responses of write requests sent with an Idempotency-Key header, so a
+# retried request is answered from here instead of being applied twice
+# (see utils/idempotency.py). StatusCode is NULL while the first request
+# is still running.
+idempotency_keys_table = Table(
+    "idempotency_keys",
+    metadata,
+    Column("IdempotencyID", Integer, primary_key=True),
+    Column("AccountID", Integer, nullable=False),
+    Column("Endpoint", String(100), nullable=False),
+    Column("IdempotencyKey", String(255), nullable=False),
+    Column("RequestHash", String(64), nullable=False),
+    Column("StatusCode", Integer),
+    Column("ResponseBody", Text),
+    Column("CreateDate", DateTime, nullable=False),
+    Index(
+        "UX_idempotency_keys_key",
+        "AccountID",
+        "Endpoint",
+        "IdempotencyKey",
+        unique=True,
+    ),
+    extend_existing=False,
+    implicit_returning=False,
+)
@@ -8,7 +8,13 @@ from werkzeug.exceptions import BadRequestKeyError
 from werkzeug.security import generate_password_hash
 import re  # Import for regular expressions
 
-from flask_backend.utils.session import login_and_update_last_login
+from flask_backend.utils.session import (
+    login_and_update_last_login,
+    login_required_api,
+    invalidate_account_cache,
+    account_cache,
+    scope_cache,
+)
 from flask_backend.database.models import db, Account
 
 auth_routes = Blueprint("auth_routes", __name__)
@@ -94,6 +100,7 @@ def change_password():
         # Update the user's password
         user.password = generate_password_hash(new_password)
         db.session.commit()
+        invalidate_account_cache(user.id)
 
         return jsonify({'success': True, 'message': 'Password changed successfully.'}), 200
 
@@ -148,6 +155,7 @@ def update_profile():
 
         if data_changed:
             db.session.commit()
+            invalidate_account_cache(user.id)
             response = {'success': True, 'message': 'Profile updated successfully.'}
             if new_username:
                 response['updated_username'] = new_username
@@ -159,3 +167,13 @@ def update_profile():
         # Optionally log the error
         # current_app.logger.error(f'Error updating profile: {e}')
         return jsonify({'success': False, 'error': 'An error occurred while updating the profile.'}), 500
+
+@auth_routes.route('/api/cache_stats', methods=['GET'])
+@login_required_api
+def cache_stats():
+    """Hit/miss counters for the in-process caches, used to size them"""
+    return jsonify({
+        'success': True,
+        'account_cache': account_cache.stats(),
+        'scope_cache': scope_cache.stats(),
+    })
@@ -1,21 +1,48 @@
-from flask import Blueprint, jsonify, request, current_app
-from sqlalchemy import select, case, text, or_, and_
-from sqlalchemy.sql import null
+import calendar
+from flask import Blueprint, Response, jsonify, request, current_app
+from sqlalchemy import select, and_
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, date
-from dateutil import parser
 from flask_login import current_user
 from werkzeug.exceptions import BadRequestKeyError
 
 from flask_backend.utils.db_tools import get_categories
-from flask_backend.utils.session import login_required_api
-from flask_backend.utils.category_mapping import get_category_for_transaction, is_income_category
-from flask_backend.database.models import db, Account, Person, Scope, ScopeAccess
+from flask_backend.utils.session import login_required_api, get_accessible_scope_ids
+from flask_backend.utils.category_mapping import is_income_category
+from flask_backend.utils.expense_queries import (
+    parse_bool_arg,
+    parse_expense_filters,
+    parse_page_size,
+    build_expenses_query,
+    iter_expense_rows,
+    apply_keyset,
+    encode_cursor,
+    format_expense_row,
+)
+from flask_backend.utils.aggregations import (
+    get_monthly_category_totals,
+    sum_by_category,
+    sum_by_category_and_scope,
+    sum_by_month,
+)
+from flask_backend.utils.rollups import (
+    rollup_deltas_from_records,
+    collect_rollup_deltas,
+    apply_rollup_deltas,
+)
+from flask_backend.utils.plaid_ingestion import ingest_plaid_transactions
+from flask_backend.utils.manual_expenses import MONTH_NUMBERS, build_manual_expense_records
+from flask_backend.utils.expense_fingerprints import count_fingerprints, refresh_expense_fingerprints
+from flask_backend.utils.idempotency import idempotent
+from flask_backend.utils.statement_import import (
+    StatementFormatError,
+    detect_statement_format,
+    import_statement,
+)
+from flask_backend.database.models import Account, Person, Scope
 from flask_backend.database.tables import (
     expenses_table,
     categories_table,
-    persons_table,
-    scopes_table,
     scope_access_table,
     category_targets_table,
 )
@@ -25,227 +52,158 @@ expense_routes = Blueprint("expense_routes", __name__)
 @expense_routes.route("/api/get_expenses", methods=["GET"])
 @login_required_api
 def get_expenses():
+    """
+    List the user's expenses, newest first.
+
+    Without limit or cursor, every matching expense is returned in one
+    response, as existing clients expect. Passing either switches to keyset
+    pagination: the response then also carries has_more and next_cursor.
+
+    Query parameters:
+        limit: page size (default DEFAULT_PAGE_SIZE, capped at MAX_PAGE_SIZE)
+        cursor: the next_cursor value returned by the previous page
+        start_date, end_date: inclusive YYYY-MM-DD bounds on ExpenseDate
+        scope_id: restrict to a single accessible scope
+        category: restrict to one or more categories (repeatable)
+        source_type: 'manual' or 'plaid'
+        is_income: 'true' or 'false'
+        all: 'true' to return every matching expense even if limit is given
+        format: 'ndjson' to stream every matching expense, one JSON object
+            per line, without materializing the result set in memory
+    """
     try:
-        # First get all scope IDs the user has access to
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
-
-        # Create a conditional expression for PersonName
-        person_name_expr = case(
-            (expenses_table.c.PersonID == null(), "Joint"), 
-            else_=persons_table.c.PersonName
-        ).label("PersonName")
-
-        # Create a SQL query to select expenses and join with the persons table
-        query = (
-            select(
-                expenses_table.c.ExpenseID,
-                expenses_table.c.ExpenseDate,
-                expenses_table.c.Amount,
-                expenses_table.c.ExpenseCategory,
-                expenses_table.c.AdditionalNotes,
-                expenses_table.c.Currency,
-                expenses_table.c.ScopeID,
-                scopes_table.c.ScopeName,  # Add ScopeName
-                scopes_table.c.ScopeType,  # Add ScopeType
-                person_name_expr,
-                # Plaid-related fields
-                expenses_table.c.PlaidAccountID,
-                expenses_table.c.PlaidTransactionID,
-                expenses_table.c.MerchantName,
-                expenses_table.c.SourceType,
-                expenses_table.c.PlaidMerchantName,
-                expenses_table.c.PlaidName,
-                expenses_table.c.PlaidMerchantLogoURL,
-                expenses_table.c.CategoryConfirmed,
-                expenses_table.c.PlaidPersonalFinanceCategoryPrimary,
-                expenses_table.c.IsIncome
-            )
-            .select_from(
-                expenses_table.join(
-                    persons_table,
-                    expenses_table.c.PersonID == persons_table.c.PersonID,
-                    isouter=True,
-                ).join(
-                scopes_table,  # Join with scopes table to get ScopeName and ScopeType
-                expenses_table.c.ScopeID == scopes_table.c.ScopeID
-                )
-            )
-            .where(expenses_table.c.ScopeID.in_(accessible_scope_ids))
-        )
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
+
+        try:
+            filters = parse_expense_filters(request.args, accessible_scope_ids)
+            export_format = request.args.get("format", "json")
+            if export_format not in ("json", "ndjson"):
+                raise ValueError("format must be 'json' or 'ndjson'")
+            paginate = bool(request.args.get("limit") or request.args.get("cursor"))
+            return_all = parse_bool_arg(request.args.get("all")) is True or not paginate
+            limit = parse_page_size(request.args.get("limit"))
+            query = build_expenses_query(filters)
+            if export_format == "ndjson":
+                query = apply_keyset(query, request.args.get("cursor"))
+            elif not return_all:
+                # Fetch one extra row to know whether another page exists
+                query = apply_keyset(query, request.args.get("cursor")).limit(limit + 1)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        if export_format == "ndjson":
+            return stream_expenses_ndjson(query)
 
         # Execute the query using SQLAlchemy Core
         with current_app.config["ENGINE"].connect() as connection:
-            result = connection.execute(query)
-            user_expenses = result.fetchall()
+            user_expenses = connection.execute(query).fetchall()
 
-        # Convert raw results to a list of dicts with split date
-        expenses = []
-        for row in user_expenses:
-            expense_dict = row._asdict()
-            
-            # Handle possible None values for ExpenseDate
-            if row.ExpenseDate is not None:
-                expense_dict["Day"] = row.ExpenseDate.day
-                expense_dict["Month"] = row.ExpenseDate.strftime("%B")
-                expense_dict["Year"] = row.ExpenseDate.year
-            else:
-                # Add default values for null dates
-                expense_dict["Day"] = None
-                expense_dict["Month"] = None
-                expense_dict["Year"] = None
-            
-            expenses.append(expense_dict)
+        if return_all:
+            expenses = [format_expense_row(row) for row in user_expenses]
+            return jsonify({"success": True, "expenses": expenses})
 
-        # Format the amount in each expense
-        for expense in expenses:
-            if expense["Currency"] == "USD":
-                expense["Amount"] = "${:,.2f}".format(expense["Amount"])
-            elif expense["Currency"] == "EUR":
-                expense["Amount"] = "€{:,.2f}".format(expense["Amount"])
-            # IsIncome is now directly from database, no need for manual logic
+        has_more = len(user_expenses) > limit
+        page = user_expenses[:limit]
+        next_cursor = None
+        if has_more:
+            last_row = page[-1]
+            next_cursor = encode_cursor(last_row.ExpenseDate, last_row.ExpenseID)
 
-        return jsonify({"success": True, "expenses": expenses})
+        return jsonify({
+            "success": True,
+            "expenses": [format_expense_row(row) for row in page],
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        })
 
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
+def stream_expenses_ndjson(query):
+    """
+    Stream the rows of an expense listing query as newline-delimited JSON.
+
+    Rows are fetched from a server-side cursor in batches, so only one batch
+    is held in memory regardless of how many expenses match.
+    """
+    engine = current_app.config["ENGINE"]
+    json_provider = current_app.json
+
+    def generate():
+        for row in iter_expense_rows(engine, query):
+            yield json_provider.dumps(format_expense_row(row)) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+def find_possible_duplicates(conn, records):
+    """Return the indexes of records whose fingerprint is already stored in their scope."""
+    fingerprints_by_scope = {}
+    for record in records:
+        fingerprints_by_scope.setdefault(record["ScopeID"], set()).add(record["Fingerprint"])
+    stored = {
+        (scope_id, fingerprint)
+        for scope_id, fingerprints in fingerprints_by_scope.items()
+        for fingerprint in count_fingerprints(conn, scope_id, fingerprints)
+    }
+    return [
+        index for index, record in enumerate(records)
+        if (record["ScopeID"], record["Fingerprint"]) in stored
+    ]
+
+
 @expense_routes.route("/api/submit_expenses", methods=["POST"])
 @login_required_api
+@idempotent
 def submit_new_expenses():
-    with current_app.config["ENGINE"].connect() as connection:
-        result = connection.execute(text("SELECT SYSDATETIMEOFFSET()"))
-        server_time = result.scalar()
-        print(f"DEBUG - SQL Server time: {server_time}")
+    """
+    Record a batch of hand-entered expenses.
+
+    Every row is validated before anything is written. If any row is
+    invalid, nothing is recorded and "errors" lists each bad row as
+    {"row": index, "error": message}; otherwise all rows are inserted with
+    one executemany and committed together with the rollup.
 
+    Rows matching an expense already stored (same scope, date, amount and
+    merchant) are still recorded, since the same purchase can happen twice,
+    but their indexes are returned in "possible_duplicates". Send an
+    Idempotency-Key header to make retrying the request safe.
+    """
     try:
         data = request.json
         expenses = data["expenses"]
-        counter = 0
-        months = [
-            "January", "February", "March", "April", "May", "June",
-            "July", "August", "September", "October", "November", "December"
-        ]
 
         # Get all scopes the user has access to
-        accessible_scopes = (
-            db.session.query(ScopeAccess)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-            .all()
-        )
+        accessible_scope_ids = get_accessible_scope_ids()
 
-        accessible_scope_ids = [scope.ScopeID for scope in accessible_scopes]
+        records, errors = build_manual_expense_records(
+            expenses, accessible_scope_ids, current_user.currency
+        )
+        if errors:
+            return jsonify({
+                "success": False,
+                "error": errors[0]["error"] if len(errors) == 1 else (
+                    f"{len(errors)} of {len(expenses)} expenses are invalid; "
+                    f"first (row {errors[0]['row'] + 1}): {errors[0]['error']}"
+                ),
+                "errors": errors,
+            })
 
+        counter = len(records)
         try:
             with current_app.config["ENGINE"].connect() as conn:
-                for expense in expenses:
-                    try:
-                        # Extract individual fields from the expense dictionary
-                        scope = expense.get("scope")
-                        day = expense.get("day")
-                        month = expense.get("month")
-                        year = expense.get("year")
-                        amount = expense.get("amount")
-                        category = expense.get("category")
-                        merchant = expense.get("merchant", "")
-                        notes = expense.get("notes")
-
-                        # Validation
-                        if not all([scope, day, month, year, amount, category]):
-                            return jsonify({
-                                "success": False,
-                                "error": "Missing required fields in the expense data",
-                            })
-
-                        # Verify scope access
-                        if scope not in accessible_scope_ids:
-                            return jsonify({
-                                "success": False,
-                                "error": "Invalid or inaccessible scope",
-                            })
-
-                        # Date validation
-                        try:
-                            day = int(day)
-                            year = int(year)
-                            if not (1 <= day <= 31):
-                                return jsonify({
-                                    "success": False,
-                                    "error": "Day must be between 1 and 31",
-                                })
-                            if not (2000 <= year <= 2050):
-                                return jsonify({
-                                    "success": False,
-                                    "error": "Year must be between 2000 and 2050",
-                                })
-                        except ValueError:
-                            return jsonify({
-                                "success": False,
-                                "error": "Day and Year must be integers",
-                            })
-
-                        if month not in months:
-                            return jsonify({
-                                "success": False,
-                                "error": "Invalid month selected"
-                            })
-
-                        # Parse the date
-                        try:
-                            # Get month number (1-12) from month name
-                            month_num = [i for i, m in enumerate(months, 1) if m == month][0]
-                            expense_date = date(year, month_num, day)
-                            print(f"DEBUG - Date being inserted: {expense_date}")
-                        except (ValueError, IndexError):
-                            return jsonify({
-                                "success": False,
-                                "error": f"Invalid date: {day}-{month}-{year}",
-                            })
-
-                        # Determine if this is an income transaction
-                        is_income = is_income_category(category)
-                        
-                        conn.execute(
-                            expenses_table.insert().values(
-                                ScopeID=scope,  # Use the scope ID directly
-                                PersonID=None,  # You might want to modify this based on your needs
-                                Day=day,
-                                Month=month,
-                                Year=year,
-                                ExpenseDate=expense_date,
-                                Amount=float(amount.replace(",", "")),
-                                ExpenseCategory=category,
-                                MerchantName=merchant,
-                                SourceType="manual",
-                                AdditionalNotes=notes,
-                                Currency=current_user.currency,
-                                CreateDate=datetime.now().date(),
-                                LastUpdated=datetime.now().date(),
-                                CategoryConfirmed=True,  # Manual entries are pre-confirmed by user
-                                IsIncome=is_income
-                            )
-                        )
-
-                        counter += 1
-
-                    except Exception as e:
-                        return jsonify({"success": False, "error": str(e)})
-
-                # Commit all the changes to the database
+                possible_duplicates = find_possible_duplicates(conn, records)
+                if records:
+                    conn.execute(expenses_table.insert(), records)
+                    # Keep the monthly rollup in step, then commit everything together
+                    apply_rollup_deltas(conn, rollup_deltas_from_records(records))
                 conn.commit()
 
                 return jsonify({
                     "success": True,
                     "message": f"{counter} expense{'s' if counter != 1 else ''} successfully recorded.",
+                    "possible_duplicates": possible_duplicates,
                 })
 
         except SQLAlchemyError as e:
@@ -253,12 +211,13 @@ def submit_new_expenses():
                 print(e)
             return jsonify({"success": False, "error": "Database error"})
 
-    except BadRequestKeyError:
+    except (BadRequestKeyError, KeyError, TypeError):
         return jsonify({"success": False, "error": "Invalid request"})
     
 
 @expense_routes.route("/api/submit_plaid_transactions", methods=["POST"])
 @login_required_api
+@idempotent
 def submit_plaid_transactions():
     """
     This endpoint accepts a JSON payload with Plaid transactions and saves
@@ -305,130 +264,32 @@ def submit_plaid_transactions():
                 "error": "Missing required fields: 'scope' or 'plaid_transactions'"
             }), 400
 
-        counter_inserted = 0
-        counter_skipped = 0
+        # Verify scope access
+        try:
+            scope = int(scope)
+        except (TypeError, ValueError):
+            scope = None
+        if scope not in get_accessible_scope_ids():
+            return jsonify({
+                "success": False,
+                "error": "Invalid or inaccessible scope",
+            }), 403
 
-        # Open a connection
+        # Same pipeline as /transactions/sync pages (utils/plaid_ingestion.py)
         with current_app.config["ENGINE"].connect() as conn:
-            # Build a list of unique (account_id, transaction_id) pairs from incoming transactions
-            transaction_keys = [
-                (txn.get("account_id"), txn.get("transaction_id"))
-                for txn in plaid_transactions
-                if txn.get("account_id") and txn.get("transaction_id")
-            ]
-
-            # Execute a single query to find any existing records matching these key pairs
-            # Build a list of conditions for each (PlaidAccountID, PlaidTransactionID) pair.
-            conditions = [
-                and_(
-                    expenses_table.c.PlaidAccountID == account_id,
-                    expenses_table.c.PlaidTransactionID == transaction_id
-                )
-                for account_id, transaction_id in transaction_keys
-            ]
-
-            # Only add the WHERE clause if there is at least one condition
-            if conditions:
-                existing_rows = conn.execute(
-                    expenses_table.select().where(or_(*conditions))
-                ).fetchall()
-            else:
-                existing_rows = []
-
-            # Create a set of keys for quick lookup
-            existing_keys = {
-                (row.PlaidAccountID, row.PlaidTransactionID) for row in existing_rows
-            }
-
-            # Prepare a list of new transaction records to insert
-            values_to_insert = []
-
-            for txn in plaid_transactions:
-                key = (txn.get("account_id"), txn.get("transaction_id"))
-                if key in existing_keys:
-                    counter_skipped += 1
-                    continue
+            result = ingest_plaid_transactions(
+                conn,
+                scope,
+                plaid_transactions,
+                batch_size=current_app.config.get("PLAID_INSERT_BATCH_SIZE"),
+            )
+        current_app.logger.info(
+            "Ingested %s submitted Plaid transactions (%s rows/sec inserted, stage seconds %s)",
+            result["new_transactions"], result["rows_per_second"], result["stage_seconds"],
+        )
 
-                # Parse dates using dateutil.parser for flexibility
-                try:
-                    authorized_date_str = txn.get("authorized_date")
-                    plaid_authorized_date = parser.parse(authorized_date_str).date() if authorized_date_str else None
-                except Exception:
-                    plaid_authorized_date = None
-
-                try:
-                    date_str = txn.get("date")
-                    plaid_date = parser.parse(date_str).date() if date_str else None
-                except Exception:
-                    plaid_date = None
-
-                # Determine date components from the parsed date (if available)
-                # Make sure we always have a valid date
-                if plaid_date:
-                    day = plaid_date.day
-                    month = plaid_date.strftime("%B")  # e.g., "November"
-                    year = plaid_date.year
-                    expense_date = plaid_date
-                    expense_day_of_week = plaid_date.strftime("%A")
-                else:
-                    # Default to today's date if no date is provided
-                    today = datetime.now().date()
-                    day = today.day
-                    month = today.strftime("%B")
-                    year = today.year
-                    expense_date = today
-                    expense_day_of_week = today.strftime("%A")
-                
-                # adding category helper
-                category=get_category_for_transaction(txn)
-                # Build a dictionary of values for insertion
-                record = {
-                    "ScopeID": scope,
-                    "PersonID": None,  # Adjust if tying to a specific user
-                    "Day": day,
-                    "Month": month,
-                    "Year": year,
-                    "ExpenseDate": expense_date,
-                    "ExpenseDayOfWeek": expense_day_of_week,
-                    "Amount": txn.get("amount"),
-                    "AdjustedAmount": txn.get("amount"),  # Initially the same as Amount
-                    "ExpenseCategory": category,  # Can be updated later (updated by janusz eventually)
-                    "MerchantName": txn.get("merchant_name"),
-                    "SourceType": "plaid",
-                    "AdditionalNotes": None,
-                    "CreateDate": datetime.now().date(),
-                    "LastUpdated": datetime.now().date(),
-                    "Currency": txn.get("iso_currency_code"),
-                    "SuggestedCategory": None,
-                    "CategoryConfirmed": False,
-
-                    # Plaid-specific fields
-                    "PlaidAccountID": txn.get("account_id"),
-                    "PlaidTransactionID": txn.get("transaction_id"),
-                    "PlaidTransactionType": txn.get("transaction_type"),
-                    "PlaidCategoryID": txn.get("category_id"),
-                    "PlaidAuthorizedDate": plaid_authorized_date,
-                    "PlaidDate": plaid_date,
-                    "PlaidAmount": txn.get("amount"),
-                    "PlaidCurrencyCode": txn.get("iso_currency_code"),
-                    "PlaidMerchantLogoURL": txn.get("logo_url"),
-                    "PlaidMerchantEntityID": txn.get("merchant_entity_id"),
-                    "PlaidMerchantName": txn.get("merchant_name"),
-                    "PlaidName": txn.get("name"),
-                    "PlaidPending": txn.get("pending"),
-                    "PlaidPendingTransactionID": txn.get("pending_transaction_id"),
-                    "PlaidPersonalFinanceCategoryConfidence": txn.get("personal_finance_category", {}).get("confidence_level"),
-                    "PlaidPersonalFinanceCategoryDetailed": txn.get("personal_finance_category", {}).get("detailed"),
-                    "PlaidPersonalFinanceCategoryPrimary": txn.get("personal_finance_category", {}).get("primary"),
-                    "PlaidPersonalFinanceCategoryIconURL": txn.get("personal_finance_category_icon_url"),
-                }
-                values_to_insert.append(record)
-                counter_inserted += 1
-
-            # Execute a bulk insert for all new records
-            if values_to_insert:
-                conn.execute(expenses_table.insert(), values_to_insert)
-            conn.commit()
+        counter_inserted = result["new_transactions"]
+        counter_skipped = result["skipped"]
 
         return jsonify({
             "success": True,
@@ -444,6 +305,84 @@ def submit_plaid_transactions():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@expense_routes.route("/api/import_statement", methods=["POST"])
+@login_required_api
+@idempotent
+def import_statement_file():
+    """
+    Import a CSV, OFX or QFX bank statement into a scope's expenses.
+
+    Expects a multipart upload with:
+        file: The statement
+        scope: The scope to import into
+        format (optional): "csv", "ofx" or "qfx"; taken from the file name
+            when omitted
+        date_column, description_column, amount_column, debit_column,
+        credit_column (optional): CSV header names, when they can't be
+            detected
+        date_format (optional): strptime format of the CSV dates
+        negative_is_expense (optional): "false" if the CSV lists money out
+            as positive amounts
+
+    The file is parsed as it streams in and written in batches; rows already
+    stored for the scope are skipped, so re-importing a statement is safe.
+    """
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return jsonify({"success": False, "error": "No statement file uploaded"}), 400
+
+    try:
+        scope = int(request.form.get("scope", ""))
+    except ValueError:
+        scope = None
+    if scope not in get_accessible_scope_ids():
+        return jsonify({"success": False, "error": "Invalid or inaccessible scope"}), 403
+
+    csv_columns = {
+        field: request.form.get(f"{field}_column")
+        for field in ("date", "description", "amount", "debit", "credit")
+        if request.form.get(f"{field}_column")
+    }
+
+    try:
+        statement_format = detect_statement_format(upload.filename, request.form.get("format"))
+        with current_app.config["ENGINE"].connect() as conn:
+            result = import_statement(
+                conn,
+                upload.stream,
+                statement_format,
+                scope,
+                currency=current_user.currency,
+                csv_columns=csv_columns,
+                negative_is_expense=request.form.get("negative_is_expense", "true").lower() != "false",
+                date_format=request.form.get("date_format") or None,
+                batch_size=current_app.config.get("PLAID_INSERT_BATCH_SIZE"),
+            )
+    except StatementFormatError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except SQLAlchemyError as db_err:
+        current_app.logger.error(db_err)
+        return jsonify({"success": False, "error": "Database error"}), 500
+
+    current_app.logger.info(
+        "Imported %s statement rows into scope %s in %ss (%s rows/sec, %s duplicates, %s invalid)",
+        result["imported"], scope, result["seconds"], result["rows_per_second"],
+        result["duplicates"], result["invalid"],
+    )
+
+    imported = result["imported"]
+    duplicates = result["duplicates"]
+    return jsonify({
+        "success": True,
+        "message": (
+            f"{imported} new transaction{'s' if imported != 1 else ''} imported. "
+            f"{duplicates} duplicate transaction{'s' if duplicates != 1 else ''} skipped."
+        ),
+        "format": statement_format,
+        **result,
+    })
+
+
 @expense_routes.route("/api/delete_expenses", methods=["POST"])
 @login_required_api
 def delete_expenses():
@@ -454,22 +393,17 @@ def delete_expenses():
         if not expense_ids:
             return jsonify({"success": False, "message": "No expense IDs provided."})
 
-        # Get user's accessible scope IDs
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         with current_app.config["ENGINE"].connect() as connection:
             # Delete expenses only if they belong to user's accessible scopes
-            delete_statement = expenses_table.delete().where(
+            delete_condition = and_(
                 expenses_table.c.ExpenseID.in_(expense_ids),
                 expenses_table.c.ScopeID.in_(accessible_scope_ids)
             )
+            rollup_deltas = collect_rollup_deltas(connection, delete_condition, sign=-1)
+            delete_statement = expenses_table.delete().where(delete_condition)
             result = connection.execute(delete_statement)
 
             if result.rowcount == 0:
@@ -478,6 +412,7 @@ def delete_expenses():
                     "message": "No expenses were deleted, possible invalid ExpenseIDs or insufficient permissions."
                 })
 
+            apply_rollup_deltas(connection, rollup_deltas)
             connection.commit()
 
         return jsonify({"success": True, "message": "Expenses deleted successfully."})
@@ -495,15 +430,8 @@ def update_expense():
         if not expenses:
             return jsonify({"success": False, "error": "No expense data provided."})
 
-        # Get user's accessible scope IDs
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         expense = expenses[0]  # Assuming only one expense is edited at a time
         expense_id = expense.get("ExpenseID")
@@ -527,12 +455,15 @@ def update_expense():
         is_income = is_income_category(category)
 
         with current_app.config["ENGINE"].connect() as conn:
+            update_condition = and_(
+                expenses_table.c.ExpenseID == expense_id,
+                expenses_table.c.ScopeID.in_(accessible_scope_ids)
+            )
+            # Move the expense's amount out of its old rollup bucket...
+            rollup_deltas = collect_rollup_deltas(conn, update_condition, sign=-1)
             update_stmt = (
                 expenses_table.update()
-                .where(
-                    expenses_table.c.ExpenseID == expense_id,
-                    expenses_table.c.ScopeID.in_(accessible_scope_ids)
-                )
+                .where(update_condition)
                 .values(
                     Day=day,
                     Month=month,
@@ -548,6 +479,10 @@ def update_expense():
                 )
             )
             result = conn.execute(update_stmt)
+            refresh_expense_fingerprints(conn, update_condition)
+            # ...and into its new one
+            collect_rollup_deltas(conn, update_condition, sign=1, deltas=rollup_deltas)
+            apply_rollup_deltas(conn, rollup_deltas)
             conn.commit()
 
             if result.rowcount == 0:
@@ -582,15 +517,8 @@ def bulk_update_expenses():
         if not updates:
             return jsonify({"success": False, "message": "No updates provided."})
 
-        # Get user's accessible scope IDs
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         # Prepare the update values
         update_values = {}
@@ -631,20 +559,14 @@ def bulk_update_expenses():
                         "message": "Year must be between 2000 and 2050"
                     })
                 
-                months = [
-                    "January", "February", "March", "April", "May", "June",
-                    "July", "August", "September", "October", "November", "December"
-                ]
-                
-                if month not in months:
+                # Get month number (1-12) from month name
+                month_num = MONTH_NUMBERS.get(month)
+                if month_num is None:
                     return jsonify({
                         "success": False,
                         "message": "Invalid month"
                     })
                 
-                # Get month number (1-12) from month name
-                month_num = [i for i, m in enumerate(months, 1) if m == month][0]
-                
                 # Create a date object
                 expense_date = datetime(year, month_num, day).date()
                 
@@ -691,12 +613,19 @@ def bulk_update_expenses():
                     "message": f"You don't have permission to update {len(invalid_ids)} expenses."
                 })
             
-            # Update the valid expenses
+            # Update the valid expenses, moving their amounts between
+            # monthly rollup buckets if the category, scope or date changed
+            update_condition = expenses_table.c.ExpenseID.in_(valid_expense_ids)
+            rollup_deltas = collect_rollup_deltas(conn, update_condition, sign=-1)
             update_stmt = expenses_table.update().where(
-                expenses_table.c.ExpenseID.in_(valid_expense_ids)
+                update_condition
             ).values(**update_values)
             
             result = conn.execute(update_stmt)
+            if "ExpenseDate" in update_values:
+                refresh_expense_fingerprints(conn, update_condition)
+            collect_rollup_deltas(conn, update_condition, sign=1, deltas=rollup_deltas)
+            apply_rollup_deltas(conn, rollup_deltas)
             conn.commit()
             
             return jsonify({
@@ -715,15 +644,8 @@ def get_category_averages():
     Calculate 12-month category averages for the user's accessible scopes
     """
     try:
-        # Get user's accessible scope IDs
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         if not accessible_scope_ids:
             return jsonify({"success": True, "averages": []})
@@ -736,41 +658,18 @@ def get_category_averages():
         start_date = end_date - relativedelta(months=12)
 
         with current_app.config["ENGINE"].connect() as connection:
-            # Query expenses from the last 12 months, excluding income
-            query = (
-                select(
-                    expenses_table.c.ExpenseCategory,
-                    expenses_table.c.Amount
-                )
-                .where(
-                    and_(
-                        expenses_table.c.ScopeID.in_(accessible_scope_ids),
-                        expenses_table.c.ExpenseDate >= start_date,
-                        expenses_table.c.ExpenseDate <= end_date,
-                        expenses_table.c.IsIncome != True,  # Exclude income
-                        expenses_table.c.ExpenseCategory.isnot(None)  # Exclude null categories
-                    )
-                )
+            # Per-month category totals from the last 12 months, excluding income
+            monthly_totals = get_monthly_category_totals(
+                connection, accessible_scope_ids, start_date, end_date
             )
-            
-            result = connection.execute(query)
-            expenses = result.fetchall()
 
         # Calculate category totals and count months with transactions
-        category_totals = {}
-        months_with_transactions = set()
-        
-        for expense in expenses:
-            category = expense.ExpenseCategory
-            amount = expense.Amount
-            # Track which months had transactions
-            expense_month = (expense.ExpenseDate.year, expense.ExpenseDate.month)
-            months_with_transactions.add(expense_month)
-            
-            if category in category_totals:
-                category_totals[category] += amount
-            else:
-                category_totals[category] = amount
+        category_totals = sum_by_category(monthly_totals)
+        months_with_transactions = {
+            (row.Year, row.Month)
+            for row in monthly_totals
+            if row.ExpenseCategory is not None  # Exclude null categories
+        }
 
         # Calculate actual months with activity (minimum 1 to avoid division by zero)
         active_months = max(len(months_with_transactions), 1)
@@ -811,15 +710,8 @@ def get_category_targets():
     Get user's category targets for accessible scopes
     """
     try:
-        # Get user's accessible scope IDs
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         with current_app.config["ENGINE"].connect() as connection:
             query = (
@@ -869,15 +761,8 @@ def save_category_targets():
         if not targets:
             return jsonify({"success": False, "error": "No targets provided"})
 
-        # Get user's accessible scope IDs
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         with current_app.config["ENGINE"].connect() as connection:
             # First, deactivate all existing targets for the user
@@ -932,15 +817,8 @@ def get_category_progress():
     Get current month progress for each category target
     """
     try:
-        # Get user's accessible scope IDs
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         # Get current month boundaries
         now = datetime.now()
@@ -972,40 +850,18 @@ def get_category_progress():
                 return jsonify({"success": True, "progress": []})
 
             # Get current month spending for each category
-            from datetime import date
             month_start = date(current_year, current_month, 1)
-            if current_month == 12:
-                month_end = date(current_year + 1, 1, 1)
-            else:
-                month_end = date(current_year, current_month + 1, 1)
-            
-            expenses_query = (
-                select(
-                    expenses_table.c.ExpenseCategory,
-                    expenses_table.c.Amount,
-                    expenses_table.c.ScopeID
-                )
-                .where(
-                    and_(
-                        expenses_table.c.ScopeID.in_(accessible_scope_ids),
-                        expenses_table.c.ExpenseDate >= month_start,
-                        expenses_table.c.ExpenseDate < month_end,
-                        expenses_table.c.IsIncome != True
-                    )
-                )
+            month_end = date(
+                current_year, current_month,
+                calendar.monthrange(current_year, current_month)[1]
+            )
+
+            monthly_totals = get_monthly_category_totals(
+                connection, accessible_scope_ids, month_start, month_end
             )
-            
-            expenses_result = connection.execute(expenses_query)
-            expenses = expenses_result.fetchall()
 
         # Calculate current spending by category and scope
-        current_spending = {}
-        for expense in expenses:
-            key = (expense.ExpenseCategory, expense.ScopeID)
-            if key in current_spending:
-                current_spending[key] += expense.Amount
-            else:
-                current_spending[key] = expense.Amount
+        current_spending = sum_by_category_and_scope(monthly_totals)
 
         # Build progress data
         progress_data = []
@@ -1089,15 +945,8 @@ def get_available_categories():
     Get all categories that have been used in the user's expenses plus default categories
     """
     try:
-        # Get user's accessible scope IDs
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         categories_set = set()
         
@@ -1152,15 +1001,8 @@ def get_spending_comparison():
     Get current month spending compared to average monthly spending (prorated by date)
     """
     try:
-        # Get user's accessible scope IDs
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         if not accessible_scope_ids:
             return jsonify({"success": True, "comparison": None})
@@ -1183,61 +1025,20 @@ def get_spending_comparison():
         start_date = end_date - relativedelta(months=12)
 
         with current_app.config["ENGINE"].connect() as connection:
-            # Get current month spending
-            current_month_query = (
-                select(expenses_table.c.Amount)
-                .where(
-                    and_(
-                        expenses_table.c.ScopeID.in_(accessible_scope_ids),
-                        expenses_table.c.Month == now.strftime("%B"),
-                        expenses_table.c.Year == current_year,
-                        expenses_table.c.IsIncome != True
-                    )
-                )
-            )
-            
-            current_result = connection.execute(current_month_query)
-            current_expenses = current_result.fetchall()
-            current_month_total = sum(expense.Amount for expense in current_expenses)
-            
-            # Get historical expenses for average calculation
-            historical_query = (
-                select(
-                    expenses_table.c.Amount,
-                    expenses_table.c.ExpenseDate
-                )
-                .where(
-                    and_(
-                        expenses_table.c.ScopeID.in_(accessible_scope_ids),
-                        expenses_table.c.ExpenseDate >= start_date,
-                        expenses_table.c.ExpenseDate <= end_date,
-                        expenses_table.c.IsIncome != True
-                    )
-                )
+            # One aggregate query covers both the historical window and the
+            # whole current month
+            month_end = date(current_year, current_month, days_in_month)
+            category_month_totals = get_monthly_category_totals(
+                connection, accessible_scope_ids, start_date, month_end
             )
-            
-            historical_result = connection.execute(historical_query)
-            historical_expenses = historical_result.fetchall()
 
         # Calculate monthly totals and count active months
-        monthly_totals = {}
-        months_with_transactions = set()
-        
-        for expense in historical_expenses:
-            expense_month_key = (expense.ExpenseDate.year, expense.ExpenseDate.month)
-            months_with_transactions.add(expense_month_key)
-            
-            if expense_month_key in monthly_totals:
-                monthly_totals[expense_month_key] += expense.Amount
-            else:
-                monthly_totals[expense_month_key] = expense.Amount
+        monthly_totals = sum_by_month(category_month_totals)
 
         # Calculate average monthly spending (excluding current month if it's in the data)
         current_month_key = (current_year, current_month)
-        if current_month_key in monthly_totals:
-            # Remove current month from historical calculation
-            del monthly_totals[current_month_key]
-            months_with_transactions.discard(current_month_key)
+        current_month_total = monthly_totals.pop(current_month_key, 0)
+        months_with_transactions = set(monthly_totals)
         
         active_months = len(months_with_transactions)
         
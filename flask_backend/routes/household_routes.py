@@ -6,7 +6,15 @@ from datetime import datetime
 from flask_login import current_user
 from werkzeug.exceptions import BadRequestKeyError
 
-from flask_backend.utils.session import login_required_api
+from flask_backend.utils.session import login_required_api, invalidate_scope_cache
+from flask_backend.utils.sync_jobs import sync_jobs
+from flask_backend.utils.teardown import (
+    claim_scope_items,
+    restore_scope_access,
+    revoke_scope_access,
+    teardown_jobs,
+    teardown_scope,
+)
 from flask_backend.database.models import db, Account, Scope, ScopeAccess
 
 household_routes = Blueprint("household_routes", __name__)
@@ -114,6 +122,7 @@ def create_household():
         )
         db.session.add(scope_access)
         db.session.commit()
+        invalidate_scope_cache(current_user.id)
 
         return jsonify({
             "success": True,
@@ -175,6 +184,7 @@ def invite_to_household():
         )
         db.session.add(new_access)
         db.session.commit()
+        invalidate_scope_cache(invited_user.id)
 
         return jsonify({"success": True, "message": f"Invitation sent to {email}"})
 
@@ -208,6 +218,7 @@ def respond_to_invite():
         invite.InviteStatus = 'accepted' if response == 'accept' else 'rejected'
         invite.LastUpdated = datetime.now().date()
         db.session.commit()
+        invalidate_scope_cache(current_user.id)
 
         return jsonify({
             "success": True,
@@ -274,6 +285,7 @@ def leave_household():
         # Remove the access record
         db.session.delete(access)
         db.session.commit()
+        invalidate_scope_cache(current_user.id)
 
         return jsonify({
             "success": True,
@@ -305,23 +317,80 @@ def delete_household():
         if not owner_access:
             return jsonify({"success": False, "error": "Only owners can delete households"})
 
-        # Delete all access records for this scope
-        ScopeAccess.query.filter_by(ScopeID=scope_id).delete()
-        
-        # Delete the scope itself
-        Scope.query.filter_by(ScopeID=scope_id).delete()
-        
-        db.session.commit()
+        # Remember who had access so their cached scopes can be dropped
+        member_ids = [
+            access.AccountID
+            for access in ScopeAccess.query.filter_by(ScopeID=scope_id).all()
+        ]
+
+        # Members lose the scope before anything is deleted, so nothing can
+        # be written to it while the teardown runs
+        with current_app.config["ENGINE"].connect() as conn:
+            revoke_scope_access(conn, scope_id)
+        invalidate_scope_cache(*member_ids)
+
+        # Expenses, targets, Plaid items and access records are deleted in
+        # chunks on a background worker; poll /api/teardown_jobs/<job_id>
+        job = teardown_jobs.submit(
+            current_app._get_current_object(),
+            ("scope", scope_id),
+            current_user.id,
+            run_household_teardown_job,
+            scope_id,
+            member_ids,
+        )
 
         return jsonify({
             "success": True,
-            "message": "Household deleted successfully"
-        })
+            "job_id": job.job_id,
+            "status": job.status,
+            "message": "Household deletion started"
+        }), 202
 
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)})
-    
+
+
+def run_household_teardown_job(job, scope_id, member_ids):
+    """
+    Background entry point for delete_household.
+
+    Access was revoked before the job was queued. The scope's Plaid items
+    stay claimed in the sync queue until the teardown ends, so no sync can
+    write expenses back into the scope. If the teardown fails, members get
+    the (possibly partly emptied) scope back, so the owner can retry.
+    """
+    try:
+        with current_app.config["ENGINE"].connect() as conn:
+            try:
+                claim_scope_items(conn, scope_id, job, progress=job.update_progress)
+                deleted = teardown_scope(
+                    conn,
+                    scope_id,
+                    batch_size=current_app.config.get("TEARDOWN_BATCH_SIZE"),
+                    progress=job.update_progress,
+                )
+            except Exception:
+                conn.rollback()
+                restore_scope_access(conn, scope_id)
+                raise
+    finally:
+        sync_jobs.release(job)
+        invalidate_scope_cache(*member_ids)
+    return {"scope_id": scope_id, "deleted": deleted}
+
+
+@household_routes.route("/api/teardown_jobs/<job_id>", methods=["GET"])
+@login_required_api
+def get_teardown_job(job_id):
+    """Report the status, progress and result of a household deletion."""
+    job = teardown_jobs.get(job_id)
+    if job is None or job.owner_id != current_user.id:
+        return jsonify({"success": False, "error": "Teardown job not found"}), 404
+    return jsonify({"success": True, **job.to_dict()})
+
+
 @household_routes.route("/api/remove_household_member", methods=["POST"])
 @login_required_api
 def remove_household_member():
@@ -363,6 +432,7 @@ def remove_household_member():
 
         db.session.delete(member_access)
         db.session.commit()
+        invalidate_scope_cache(member.id)
 
         return jsonify({
             "success": True,
@@ -1,6 +1,4 @@
-from flask import Blueprint, jsonify, request, current_app
-#category mapping added via utils
-from flask_backend.utils.category_mapping import get_category_for_transaction, is_income_category
+from flask import Blueprint, jsonify, request, current_app, send_file
 
 
 # Read env vars from .env file
@@ -11,14 +9,20 @@ import json
 import time
 from datetime import date, timedelta, datetime
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # imports for scope assiociation
 from flask_login import current_user
-from flask_backend.utils.session import login_required_api
+from flask_backend.utils.session import login_required_api, get_accessible_scope_ids
+from flask_backend.utils.sync_jobs import KeyClaimedError, sync_jobs
+from flask_backend.utils.ttl_cache import TTLCache
+from flask_backend.utils.report_store import report_jobs, report_paths, save_report, load_report
+from flask_backend.utils.plaid_webhooks import verify_plaid_webhook, WebhookVerificationError
+from flask_backend.utils.plaid_ingestion import ingest_plaid_transactions
+from flask_backend.utils.plaid_accounts import count_item_accounts, record_plaid_accounts
+from flask_backend.utils.teardown import teardown_plaid_item
 from flask_backend.database.models import db, Account, Person, Scope, ScopeAccess, PlaidItem
 from flask_backend.database.tables import expenses_table
-from sqlalchemy import and_, or_, select
-from dateutil import parser
 
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
@@ -73,7 +77,8 @@ from plaid.model.cra_check_report_pdf_get_request import CraCheckReportPDFGetReq
 from plaid.model.cra_check_report_income_insights_get_request import CraCheckReportIncomeInsightsGetRequest
 from plaid.model.cra_check_report_partner_insights_get_request import CraCheckReportPartnerInsightsGetRequest
 from plaid.model.cra_pdf_add_ons import CraPDFAddOns
-from plaid.api import plaid_api
+from plaid.model.webhook_verification_key_get_request import WebhookVerificationKeyGetRequest
+from flask_backend.utils.plaid_client import build_plaid_client
 
 load_dotenv()
 
@@ -109,6 +114,10 @@ if PLAID_ENV == 'production':
 # at https://dashboard.plaid.com/team/api.
 PLAID_REDIRECT_URI = empty_to_none('PLAID_REDIRECT_URI')
 
+# Public URL of /api/plaid/webhook. Items linked while this is set notify
+# the app when new transactions are available instead of being polled.
+PLAID_WEBHOOK_URL = empty_to_none('PLAID_WEBHOOK_URL')
+
 configuration = plaid.Configuration(
     host=host,
     api_key={
@@ -118,8 +127,18 @@ configuration = plaid.Configuration(
     }
 )
 
-api_client = plaid.ApiClient(configuration)
-client = plaid_api.PlaidApi(api_client)
+# Pooled, retrying client; client.stats() reports per-endpoint latency
+client = build_plaid_client(
+    configuration,
+    pool_size=int(os.getenv('PLAID_POOL_SIZE', '10')),
+    timeout=float(os.getenv('PLAID_TIMEOUT_SECONDS', '30')),
+    max_retries=int(os.getenv('PLAID_MAX_RETRIES', '4')),
+)
+
+# Transactions per /transactions/sync page (Plaid's maximum is 500)
+PLAID_SYNC_PAGE_SIZE = 500
+# Times to restart pagination when the item changes mid-sync
+MAX_SYNC_RESTARTS = 3
 
 products = []
 for product in PLAID_PRODUCTS:
@@ -232,6 +251,8 @@ def create_link_token():
         )
         if PLAID_REDIRECT_URI!=None:
             request['redirect_uri']=PLAID_REDIRECT_URI
+        if PLAID_WEBHOOK_URL!=None:
+            request['webhook']=PLAID_WEBHOOK_URL
         if Products('statements') in products:
             statements=LinkTokenCreateRequestStatements(
                 end_date=date.today(),
@@ -299,6 +320,32 @@ def create_user_token():
 
 
 # Updated and new routes for plaid to support scope integration and properly target user
+# Institution metadata by InstitutionID; names and logos rarely change
+institution_cache = TTLCache(maxsize=512, ttl=24 * 60 * 60)
+# Serialized account lists and balances by PlaidItemID
+item_accounts_cache = TTLCache(maxsize=1024, ttl=5 * 60)
+
+
+def get_institution_name(institution_id, default="Unknown Institution"):
+    """Return an institution's name, calling Plaid only on a cache miss."""
+    if not institution_id:
+        return default
+    name = institution_cache.get(institution_id)
+    if name is None:
+        try:
+            institution_request = InstitutionsGetByIdRequest(
+                institution_id=institution_id,
+                country_codes=list(map(lambda x: CountryCode(x), PLAID_COUNTRY_CODES))
+            )
+            institution_response = client.institutions_get_by_id(institution_request)
+            name = institution_response['institution'].get('name') or default
+        except plaid.ApiException:
+            # Continue even if we can't get the institution name
+            return default
+        institution_cache.put(institution_id, name)
+    return name
+
+
 # Update the /api/set_access_token route
 @plaid_routes.route('/api/set_access_token', methods=['POST'])
 @login_required_api
@@ -317,15 +364,14 @@ def get_access_token():
 
         if not scope_id:
             return jsonify({"error": "scope_id is required"}), 400
+
+        try:
+            scope_id = int(scope_id)
+        except (TypeError, ValueError):
+            return jsonify({"error": "scope_id must be an integer"}), 400
             
         # Validate that user has access to this scope
-        scope_access = ScopeAccess.query.filter_by(
-            ScopeID=scope_id,
-            AccountID=current_user.id,
-            InviteStatus='accepted'
-        ).first()
-        
-        if not scope_access:
+        if scope_id not in get_accessible_scope_ids():
             return jsonify({"error": "You don't have access to this scope"}), 403
         
         # Exchange the public token for an access token and item ID
@@ -341,19 +387,7 @@ def get_access_token():
         item_response = client.item_get(item_request)
         
         institution_id = item_response['item']['institution_id']
-        institution_name = "Unknown Institution"
-        
-        try:
-            # Get institution name if available
-            institution_request = InstitutionsGetByIdRequest(
-                institution_id=institution_id,
-                country_codes=list(map(lambda x: CountryCode(x), PLAID_COUNTRY_CODES))
-            )
-            institution_response = client.institutions_get_by_id(institution_request)
-            institution_name = institution_response['institution'].get('name', institution_name)
-        except plaid.ApiException:
-            # Continue even if we can't get the institution name
-            pass
+        institution_name = get_institution_name(institution_id)
         # Check if we already have this Plaid item in our database
         existing_item = PlaidItem.query.filter_by(PlaidItemID=item_id).first()
         
@@ -362,9 +396,10 @@ def get_access_token():
             existing_item.AccessToken = access_token
             existing_item.LastUpdated = datetime.now().date()
             db.session.commit()
+            plaid_item = existing_item
         else:
             # Store the Plaid item in our database
-            new_item = PlaidItem(
+            plaid_item = PlaidItem(
                 ScopeID=scope_id,
                 PlaidItemID=item_id,
                 AccessToken=access_token,
@@ -374,8 +409,20 @@ def get_access_token():
                 CreateDate=datetime.now().date(),
                 LastUpdated=datetime.now().date()
             )
-            db.session.add(new_item)
+            db.session.add(plaid_item)
             db.session.commit()
+
+        # Remember which accounts belong to the item; sync refreshes them later
+        try:
+            accounts_response = client.accounts_get(AccountsGetRequest(access_token=access_token))
+            with current_app.config["ENGINE"].connect() as conn:
+                record_plaid_accounts(
+                    conn, plaid_item.ItemID, plaid_item.ScopeID,
+                    accounts_response.to_dict()['accounts'],
+                )
+                conn.commit()
+        except plaid.ApiException:
+            pass
         
         # Return a success response with institution name for frontend display
         return jsonify({
@@ -399,6 +446,12 @@ def get_access_token():
 @plaid_routes.route('/api/sync_transactions', methods=['POST'])
 @login_required_api
 def sync_transactions():
+    """
+    Queue a transactions sync for a Plaid item and return its job ID.
+
+    The sync itself runs on a background worker; poll
+    /api/sync_jobs/<job_id> for progress and the result.
+    """
     try:
         data = request.get_json()
         item_id = data.get('item_id')
@@ -412,202 +465,500 @@ def sync_transactions():
             return jsonify({"error": "Plaid item not found"}), 404
             
         # Verify user has access to the item's scope
-        scope_access = ScopeAccess.query.filter_by(
-            ScopeID=plaid_item.ScopeID,
-            AccountID=current_user.id,
-            InviteStatus='accepted'
-        ).first()
-        
-        if not scope_access:
+        if plaid_item.ScopeID not in get_accessible_scope_ids():
             return jsonify({"error": "You don't have access to this scope"}), 403
-            
-        # Set cursor to empty to receive initial updates, or use saved cursor for subsequent syncs
-        cursor = plaid_item.SyncToken or ''
-        
-        # New transaction updates since "cursor"
-        added = []
-        modified = []
-        removed = []  # Removed transaction ids
-        has_more = True
-        
-        # Iterate through each page of new transaction updates for item
-        while has_more:
-            sync_request = TransactionsSyncRequest(
-                access_token=plaid_item.AccessToken,
-                cursor=cursor,
+
+        try:
+            job = sync_jobs.submit(
+                current_app._get_current_object(),
+                item_id,
+                current_user.id,
+                run_sync_job,
+                item_id,
+                scope_id=plaid_item.ScopeID,
             )
-            response = client.transactions_sync(sync_request).to_dict()
-            
-            # Update cursor with the new value
-            cursor = response['next_cursor']
-            
-            # Add this page of results
-            added.extend(response['added'])
-            modified.extend(response['modified'])
-            removed.extend(response['removed'])
-            has_more = response['has_more']
-            
-        # Save the cursor for future syncs
-        plaid_item.SyncToken = cursor
-        plaid_item.LastSynced = datetime.now()
-        plaid_item.LastUpdated = datetime.now().date()
-        db.session.commit()
-        
-        # Submit any new transactions to the database
-        if added:
-            # Submit the Plaid transactions to the backend
-            result = submit_plaid_transactions_to_db(added, plaid_item.ScopeID)
-            
+        except KeyClaimedError:
+            return jsonify({
+                "error": "This connection is already being synced or removed"
+            }), 409
         return jsonify({
             "success": True,
-            "added": len(added),
-            "modified": len(modified),
-            "removed": len(removed),
-            "cursor": cursor,
+            "job_id": job.job_id,
+            "status": job.status,
             "institution_name": plaid_item.InstitutionName
-        })
-        
-    except plaid.ApiException as e:
-        error_response = format_error(e)
-        return jsonify(error_response)
+        }), 202
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-def submit_plaid_transactions_to_db(transactions, scope_id):
+@plaid_routes.route('/api/sync_jobs/<job_id>', methods=['GET'])
+@login_required_api
+def get_sync_job(job_id):
+    """Report the status, progress and result of a queued sync."""
+    job = sync_jobs.get(job_id)
+    # A job queued by a webhook or another household member may be returned
+    # for the caller's item, so access to its scope is enough
+    if job is None or not sync_jobs.can_read(job, current_user.id, get_accessible_scope_ids()):
+        return jsonify({"success": False, "error": "Sync job not found"}), 404
+    return jsonify({"success": True, **job.to_dict()})
+
+
+# Plaid's webhook signing keys by key ID; Plaid rotates them rarely
+webhook_key_cache = TTLCache(maxsize=32, ttl=24 * 60 * 60)
+
+# Transactions webhooks that mean new changes can be pulled with /transactions/sync
+SYNC_WEBHOOK_CODES = {'SYNC_UPDATES_AVAILABLE', 'DEFAULT_UPDATE'}
+
+
+def get_webhook_verification_key(key_id):
+    """Return the JWK Plaid signs webhooks with, fetching it on first use."""
+    key = webhook_key_cache.get(key_id)
+    if key is None:
+        response = client.webhook_verification_key_get(
+            WebhookVerificationKeyGetRequest(key_id=key_id)
+        )
+        key = response.to_dict()['key']
+        webhook_key_cache.put(key_id, key)
+    return key
+
+
+@plaid_routes.route('/api/plaid/webhook', methods=['POST'])
+def plaid_webhook():
     """
-    Helper function to submit Plaid transactions to the database
+    Receive Plaid webhooks and queue an incremental sync for the item when
+    new transactions are available.
+
+    Requests are verified against Plaid's signature unless
+    PLAID_WEBHOOK_VERIFY is disabled (e.g. for scripts/send_plaid_webhook.py
+    against a local server). Plaid retries webhooks that don't get a 200,
+    so ones the app doesn't act on are still acknowledged.
     """
-    new_transactions = 0
-    skipped = 0
-    
-    # Open a connection
-    with current_app.config["ENGINE"].connect() as conn:
-        # Build a list of unique (account_id, transaction_id) pairs from incoming transactions
-        transaction_keys = [
-            (txn.get("account_id"), txn.get("transaction_id"))
-            for txn in transactions
-            if txn.get("account_id") and txn.get("transaction_id")
-        ]
+    body = request.get_data()
 
-        # Execute a single query to find any existing records matching these key pairs
-        # Build a list of conditions for each (PlaidAccountID, PlaidTransactionID) pair.
-        conditions = [
-            and_(
-                expenses_table.c.PlaidAccountID == account_id,
-                expenses_table.c.PlaidTransactionID == transaction_id
+    if current_app.config.get("PLAID_WEBHOOK_VERIFY", True):
+        try:
+            verify_plaid_webhook(
+                body,
+                request.headers.get('Plaid-Verification'),
+                get_webhook_verification_key,
             )
-            for account_id, transaction_id in transaction_keys
-        ]
+        except WebhookVerificationError as e:
+            return jsonify({"success": False, "error": str(e)}), 401
+        except plaid.ApiException:
+            # Couldn't fetch the key; let Plaid retry later
+            return jsonify({"success": False, "error": "Verification key unavailable"}), 503
 
-        # Only add the WHERE clause if there is at least one condition
-        if conditions:
-            existing_rows = conn.execute(
-                expenses_table.select().where(or_(*conditions))
-            ).fetchall()
-        else:
-            existing_rows = []
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid JSON body"}), 400
 
-        # Create a set of keys for quick lookup
-        existing_keys = {
-            (row.PlaidAccountID, row.PlaidTransactionID) for row in existing_rows
-        }
+    webhook_type = payload.get('webhook_type')
+    webhook_code = payload.get('webhook_code')
+    if webhook_type != 'TRANSACTIONS' or webhook_code not in SYNC_WEBHOOK_CODES:
+        return jsonify({"success": True, "action": "ignored"})
 
-        # Prepare a list of new transaction records to insert
-        values_to_insert = []
+    plaid_item = PlaidItem.query.filter_by(PlaidItemID=payload.get('item_id')).first()
+    if not plaid_item:
+        return jsonify({"success": True, "action": "ignored"})
 
-        for txn in transactions:
-            key = (txn.get("account_id"), txn.get("transaction_id"))
-            if key in existing_keys:
-                skipped += 1
-                continue
+    try:
+        job = sync_jobs.submit(
+            current_app._get_current_object(),
+            plaid_item.PlaidItemID,
+            None,  # Not tied to a user session
+            run_sync_job,
+            plaid_item.PlaidItemID,
+            scope_id=plaid_item.ScopeID,
+        )
+    except KeyClaimedError:
+        # A sync of every item is running and will pick these changes up, or
+        # the item is being removed
+        return jsonify({"success": True, "action": "busy"})
+    return jsonify({"success": True, "action": "sync_queued", "job_id": job.job_id})
 
-            # Parse dates using dateutil.parser for flexibility
-            try:
-                authorized_date_str = txn.get("authorized_date")
-                plaid_authorized_date = parser.parse(authorized_date_str).date() if authorized_date_str else None
-            except Exception:
-                plaid_authorized_date = None
 
+def run_sync_job(job, item_id):
+    """Worker entry point: sync one item and report the outcome."""
+    try:
+        return sync_plaid_item(item_id, progress=job.update_progress)
+    except plaid.ApiException as e:
+        # Surface Plaid's message rather than the raw HTTP response
+        raise RuntimeError(plaid_error_message(e)) from e
+
+
+def iter_transaction_pages(access_token, cursor):
+    """
+    Yield /transactions/sync response pages for an item, starting at cursor.
+
+    If Plaid reports that the item changed mid-pagination, paging restarts
+    from the starting cursor as Plaid requires. Pages already yielded are
+    then seen again, so consumers must apply pages idempotently.
+
+    Args:
+        access_token (str): The item's access token
+        cursor (str): Saved cursor, or '' for the full history
+
+    Yields:
+        dict: A page with added, modified, removed, next_cursor and has_more
+    """
+    start_cursor = cursor
+    restarts = 0
+    has_more = True
+
+    while has_more:
+        sync_request = TransactionsSyncRequest(
+            access_token=access_token,
+            cursor=cursor,
+            count=PLAID_SYNC_PAGE_SIZE,
+        )
+        try:
+            response = client.transactions_sync(sync_request).to_dict()
+        except plaid.ApiException as e:
             try:
-                date_str = txn.get("date")
-                plaid_date = parser.parse(date_str).date() if date_str else None
-            except Exception:
-                plaid_date = None
-
-            # AFTER: Now we ensure every transaction has date information
-            if plaid_date:
-                day = plaid_date.day
-                month = plaid_date.strftime("%B")  # e.g., "November"
-                year = plaid_date.year
-                expense_date = plaid_date
-                expense_day_of_week = plaid_date.strftime("%A")
+                error_code = json.loads(e.body or '{}').get('error_code')
+            except (ValueError, AttributeError):
+                # A proxy or gateway error page rather than a Plaid error
+                error_code = None
+            if (error_code != 'TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION'
+                    or restarts >= MAX_SYNC_RESTARTS):
+                raise
+            restarts += 1
+            cursor = start_cursor
+            continue
+
+        # Update cursor with the new value
+        cursor = response['next_cursor']
+        has_more = response['has_more']
+        yield response
+
+
+def fetch_transaction_updates(access_token, cursor, progress=None):
+    """
+    Page through /transactions/sync from a cursor, collecting every change.
+
+    Only calls Plaid, so it is safe to run for several items at once.
+
+    Args:
+        access_token (str): The item's access token
+        cursor (str): Saved cursor, or '' for the full history
+        progress (callable, optional): Called with keyword counters after
+            each page
+
+    Returns:
+        tuple: (added, modified, removed, next_cursor, accounts)
+    """
+    # New transaction updates since "cursor"
+    added = {}
+    modified = {}
+    removed = {}  # Removed transaction ids
+    accounts = []
+    pages = 0
+
+    # Keyed by transaction ID so later pages supersede earlier ones and pages
+    # replayed after a restart aren't doubled
+    for page in iter_transaction_pages(access_token, cursor):
+        added.update((txn['transaction_id'], txn) for txn in page['added'])
+        for txn in page['modified']:
+            if txn['transaction_id'] in added:
+                added[txn['transaction_id']] = txn
             else:
-                # Default to today's date if no date is provided
-                today = datetime.now().date()
-                day = today.day
-                month = today.strftime("%B")
-                year = today.year
-                expense_date = today
-                expense_day_of_week = today.strftime("%A")
+                modified[txn['transaction_id']] = txn
+        for txn in page['removed']:
+            added.pop(txn['transaction_id'], None)
+            modified.pop(txn['transaction_id'], None)
+            removed[txn['transaction_id']] = txn
+        accounts = page.get('accounts') or accounts
+        cursor = page['next_cursor']
 
-            
-            # Get the appropriate category for this transaction
-            category = get_category_for_transaction(txn)
-            is_income = is_income_category(category)
-
-            # Build a dictionary of values for insertion
-            record = {
-                "ScopeID": scope_id,
-                "PersonID": None,  # Adjust if tying to a specific user
-                "Day": day,
-                "Month": month,
-                "Year": year,
-                "ExpenseDate": expense_date,
-                "ExpenseDayOfWeek": expense_day_of_week,
-                "Amount": txn.get("amount"),
-                "AdjustedAmount": txn.get("amount"),  # Initially the same as Amount
-                "ExpenseCategory": category,  # Can be updated later (04022025 - i updated it)
-                "AdditionalNotes": None,
-                "CreateDate": datetime.now().date(),
-                "LastUpdated": datetime.now().date(),
-                "Currency": txn.get("iso_currency_code"),
-                "SuggestedCategory": None,
-                "CategoryConfirmed": False,
-                "IsIncome": is_income,
-
-                # Plaid-specific fields
-                "PlaidAccountID": txn.get("account_id"),
-                "PlaidTransactionID": txn.get("transaction_id"),
-                "PlaidTransactionType": txn.get("transaction_type"),
-                "PlaidCategoryID": txn.get("category_id"),
-                "PlaidAuthorizedDate": plaid_authorized_date,
-                "PlaidDate": plaid_date,
-                "PlaidAmount": txn.get("amount"),
-                "PlaidCurrencyCode": txn.get("iso_currency_code"),
-                "PlaidMerchantLogoURL": txn.get("logo_url"),
-                "PlaidMerchantEntityID": txn.get("merchant_entity_id"),
-                "PlaidMerchantName": txn.get("merchant_name"),
-                "PlaidName": txn.get("name"),
-                "PlaidPending": txn.get("pending"),
-                "PlaidPendingTransactionID": txn.get("pending_transaction_id"),
-                "PlaidPersonalFinanceCategoryConfidence": txn.get("personal_finance_category", {}).get("confidence_level"),
-                "PlaidPersonalFinanceCategoryDetailed": txn.get("personal_finance_category", {}).get("detailed"),
-                "PlaidPersonalFinanceCategoryPrimary": txn.get("personal_finance_category", {}).get("primary"),
-                "PlaidPersonalFinanceCategoryIconURL": txn.get("personal_finance_category_icon_url"),
-            }
-            values_to_insert.append(record)
-            new_transactions += 1
-
-        # Execute a bulk insert for all new records
-        if values_to_insert:
-            conn.execute(expenses_table.insert(), values_to_insert)
+        pages += 1
+        if progress:
+            progress(pages=pages, added=len(added), modified=len(modified), removed=len(removed))
+
+    return (list(added.values()), list(modified.values()), list(removed.values()),
+            cursor, accounts)
+
+
+def sync_plaid_item(item_id, progress=None):
+    """
+    Stream /transactions/sync pages for an item into the database.
+
+    Each page is applied and committed before the item's saved cursor moves
+    past it, so memory stays bounded by the page size and an interrupted
+    sync resumes from the last committed page. Applying a page is
+    idempotent, so a page replayed after a crash between the two commits
+    is harmless.
+
+    Args:
+        item_id (str): PlaidItemID to sync
+        progress (callable, optional): Called with keyword counters after
+            each page
+
+    Returns:
+        dict: Counts of added, modified and removed transactions, what was
+            written to the database, and the new cursor
+    """
+    plaid_item = PlaidItem.query.filter_by(PlaidItemID=item_id).first()
+    if not plaid_item:
+        raise LookupError(f"Plaid item {item_id} not found")
+
+    summary = {
+        "pages": 0,
+        "added": 0,
+        "modified": 0,
+        "removed": 0,
+        "inserted": 0,
+        "updated": 0,
+        "deleted": 0,
+    }
+
+    # Set cursor to empty to receive initial updates, or use saved cursor for subsequent syncs
+    cursor = plaid_item.SyncToken or ''
+    accounts = []
+    for page in iter_transaction_pages(plaid_item.AccessToken, cursor):
+        added, modified, removed = page['added'], page['modified'], page['removed']
+        accounts = page.get('accounts') or accounts
+        if added or modified or removed:
+            result = submit_plaid_transactions_to_db(
+                added, plaid_item.ScopeID, modified=modified, removed=removed
+            )
+            summary["inserted"] += result["new_transactions"]
+            summary["updated"] += result["updated"] + result["reconciled_pending"]
+            summary["deleted"] += result["deleted"]
+
+        # The page is stored, so the saved cursor can move past it
+        cursor = page['next_cursor']
+        plaid_item.SyncToken = cursor
+        plaid_item.LastUpdated = datetime.now().date()
+        db.session.commit()
+
+        summary["pages"] += 1
+        summary["added"] += len(added)
+        summary["modified"] += len(modified)
+        summary["removed"] += len(removed)
+        if progress:
+            progress(**summary)
+
+    plaid_item.LastSynced = datetime.now()
+    db.session.commit()
+    with current_app.config["ENGINE"].connect() as conn:
+        record_plaid_accounts(conn, plaid_item.ItemID, plaid_item.ScopeID, accounts)
         conn.commit()
-        
-    return {
-        "new_transactions": new_transactions,
-        "skipped": skipped
+    # Balances have likely moved along with the new transactions
+    item_accounts_cache.invalidate(item_id)
+
+    summary["cursor"] = cursor
+    summary["institution_name"] = plaid_item.InstitutionName
+    return summary
+
+
+@plaid_routes.route('/api/sync_all_items', methods=['POST'])
+@login_required_api
+def sync_all_items():
+    """
+    Queue one job that syncs every Plaid item the user can access.
+
+    Items are fetched from Plaid concurrently and their changes applied in
+    one pass per scope; poll /api/sync_jobs/<job_id> for the result, which
+    includes per-item timing.
+    """
+    try:
+        accessible_scope_ids = get_accessible_scope_ids()
+        item_ids = [
+            item_id for (item_id,) in db.session.query(PlaidItem.PlaidItemID)
+            .filter(PlaidItem.ScopeID.in_(accessible_scope_ids))
+            .all()
+        ]
+        if not item_ids:
+            return jsonify({"success": False, "error": "No Plaid items to sync"}), 404
+
+        job = sync_jobs.submit(
+            current_app._get_current_object(),
+            ("all", current_user.id),
+            current_user.id,
+            run_sync_all_job,
+            item_ids,
+        )
+        return jsonify({
+            "success": True,
+            "job_id": job.job_id,
+            "status": job.status,
+            "items": len(item_ids)
+        }), 202
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def run_sync_all_job(job, item_ids):
+    """Worker entry point: sync several items and report the outcome."""
+    return sync_plaid_items(item_ids, progress=job.update_progress, holder=job)
+
+
+def sync_plaid_items(item_ids, progress=None, holder=None):
+    """
+    Sync several Plaid items, fetching their pages concurrently.
+
+    Plaid pagination for each item runs on a bounded thread pool
+    (PLAID_SYNC_CONCURRENCY threads), so the wall-clock time is close to
+    the slowest item. The fetched changes are then merged and applied with
+    one submit_plaid_transactions_to_db pass per scope. The items are
+    claimed in sync_jobs for the whole run, so no other sync or teardown can
+    start on them; items another job is already using are skipped, so no
+    cursor is advanced twice.
+
+    Args:
+        item_ids (list): PlaidItemIDs to sync
+        progress (callable, optional): Called with keyword counters as items
+            finish
+        holder (object, optional): Owner of the item claims, e.g. the
+            calling job; they are released before returning either way
+
+    Returns:
+        dict: Totals across items plus per-item counts, timing and errors
+    """
+    holder = holder if holder is not None else object()
+    claimed = set(sync_jobs.claim(item_ids, holder))
+    try:
+        return _sync_claimed_items(item_ids, claimed, progress)
+    finally:
+        sync_jobs.release(holder)
+
+
+def _sync_claimed_items(item_ids, claimed, progress):
+    plaid_items = PlaidItem.query.filter(PlaidItem.PlaidItemID.in_(item_ids)).all()
+    # Plain values only: ORM objects must not cross into the fetch threads
+    targets = [
+        (item.PlaidItemID, item.AccessToken, item.SyncToken or '')
+        for item in plaid_items
+        if item.PlaidItemID in claimed
+    ]
+    items = {
+        item.PlaidItemID: {
+            "item_id": item.PlaidItemID,
+            "institution_name": item.InstitutionName,
+            "scope_id": item.ScopeID,
+            "item_row_id": item.ItemID,
+        }
+        for item in plaid_items
+    }
+    target_ids = {target[0] for target in targets}
+    for item_id, info in items.items():
+        if item_id not in target_ids:
+            info["error"] = "A sync for this item is already running"
+
+    def fetch(target):
+        item_id, access_token, cursor = target
+        started = time.perf_counter()
+        updates = fetch_transaction_updates(access_token, cursor)
+        return item_id, updates, time.perf_counter() - started
+
+    fetched = {}
+    max_workers = max(1, min(current_app.config.get("PLAID_SYNC_CONCURRENCY", 4), len(targets) or 1))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, target): target[0] for target in targets}
+        for future in as_completed(futures):
+            item_id = futures[future]
+            try:
+                _, updates, seconds = future.result()
+            except plaid.ApiException as e:
+                items[item_id]["error"] = plaid_error_message(e)
+                continue
+            except Exception as e:
+                items[item_id]["error"] = str(e)
+                continue
+            fetched[item_id] = updates
+            added, modified, removed, _, _ = updates
+            items[item_id].update({
+                "added": len(added),
+                "modified": len(modified),
+                "removed": len(removed),
+                "fetch_seconds": round(seconds, 3),
+            })
+            if progress:
+                progress(items_fetched=len(fetched), items_total=len(targets))
+    fetch_seconds = time.perf_counter() - started
+
+    # Merge the fetched changes per scope and apply each scope in one pass
+    by_scope = {}
+    for item_id, (added, modified, removed, _, _) in fetched.items():
+        merged = by_scope.setdefault(items[item_id]["scope_id"], ([], [], []))
+        merged[0].extend(added)
+        merged[1].extend(modified)
+        merged[2].extend(removed)
+
+    started = time.perf_counter()
+    totals = {"inserted": 0, "updated": 0, "deleted": 0}
+    for scope_id, (added, modified, removed) in by_scope.items():
+        if not (added or modified or removed):
+            continue
+        result = submit_plaid_transactions_to_db(
+            added, scope_id, modified=modified, removed=removed
+        )
+        totals["inserted"] += result["new_transactions"]
+        totals["updated"] += result["updated"] + result["reconciled_pending"]
+        totals["deleted"] += result["deleted"]
+
+    # Only advance the cursors of items whose changes were applied
+    for plaid_item in plaid_items:
+        if plaid_item.PlaidItemID in fetched:
+            plaid_item.SyncToken = fetched[plaid_item.PlaidItemID][3]
+            plaid_item.LastSynced = datetime.now()
+            plaid_item.LastUpdated = datetime.now().date()
+    db.session.commit()
+    with current_app.config["ENGINE"].connect() as conn:
+        for item_id, updates in fetched.items():
+            record_plaid_accounts(
+                conn, items[item_id]["item_row_id"], items[item_id]["scope_id"], updates[4]
+            )
+        conn.commit()
+    item_accounts_cache.invalidate(*fetched)
+    ingest_seconds = time.perf_counter() - started
+
+    summary = {
+        "added": sum(info.get("added", 0) for info in items.values()),
+        "modified": sum(info.get("modified", 0) for info in items.values()),
+        "removed": sum(info.get("removed", 0) for info in items.values()),
+        **totals,
+        "fetch_seconds": round(fetch_seconds, 3),
+        "ingest_seconds": round(ingest_seconds, 3),
+        "items": [
+            {key: value for key, value in info.items() if key != "item_row_id"}
+            for info in items.values()
+        ],
     }
+    if progress:
+        progress(**{key: value for key, value in summary.items() if key != "items"})
+    return summary
+
+
+def submit_plaid_transactions_to_db(transactions, scope_id, modified=None, removed=None):
+    """
+    Helper function to apply Plaid transaction updates to the database
+
+    Runs ingest_plaid_transactions on its own connection with the app's
+    batch size, logging how long each stage took.
+    """
+    with current_app.config["ENGINE"].connect() as conn:
+        result = ingest_plaid_transactions(
+            conn,
+            scope_id,
+            transactions,
+            modified=modified,
+            removed=removed,
+            batch_size=current_app.config.get("PLAID_INSERT_BATCH_SIZE"),
+        )
+
+    current_app.logger.info(
+        "Ingested Plaid page for scope %s: %s new, %s updated, %s deleted, "
+        "%s rows/sec inserted, stage seconds %s",
+        scope_id, result["new_transactions"],
+        result["updated"] + result["reconciled_pending"], result["deleted"],
+        result["rows_per_second"], result["stage_seconds"],
+    )
+    return result
 
 # API route to get available scopes for the current user
 
@@ -642,15 +993,8 @@ def get_available_scopes():
 @login_required_api
 def get_plaid_items():
     try:
-        # Get all scopes that the user has access to
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         # Get all Plaid items associated with these scopes
         plaid_items = PlaidItem.query.filter(
@@ -687,15 +1031,8 @@ def get_plaid_items():
 def get_plaid_status():
     """Get the status of the user's Plaid connections"""
     try:
-        # Get all scopes that the user has access to
-        scope_query = (
-            db.session.query(ScopeAccess.ScopeID)
-            .filter(
-                ScopeAccess.AccountID == current_user.id,
-                ScopeAccess.InviteStatus == 'accepted'
-            )
-        )
-        accessible_scope_ids = [result[0] for result in scope_query.all()]
+        # Get user's accessible scope IDs (resolved once per request)
+        accessible_scope_ids = get_accessible_scope_ids()
 
         # Count plaid items
         plaid_items_count = PlaidItem.query.filter(
@@ -760,14 +1097,16 @@ def get_transactions():
             )
             response = client.transactions_sync(request).to_dict()
             cursor = response['next_cursor']
-            # If no transactions are available yet, wait and poll the endpoint.
-            # Normally, we would listen for a webhook, but the Quickstart doesn't 
-            # support webhooks. For a webhook example, see 
-            # https://github.com/plaid/tutorial-resources or
-            # https://github.com/plaid/pattern
+            # An empty cursor means Plaid hasn't pulled transactions for the
+            # item yet. Rather than sleeping and polling, report that nothing
+            # is ready; the SYNC_UPDATES_AVAILABLE webhook triggers the sync
+            # once it is.
             if cursor == '':
-                time.sleep(2)
-                continue  
+                return jsonify({
+                    'latest_transactions': [],
+                    'all_transactions': [],
+                    'ready': False
+                })
             # If cursor is not an empty string, we got results, 
             # so add this page of results
             added.extend(response['added'])
@@ -876,22 +1215,18 @@ def get_assets():
         pretty_print_response(response.to_dict())
         asset_report_token = response['asset_report_token']
 
-        # Poll for the completion of the Asset Report.
-        request = AssetReportGetRequest(
-            asset_report_token=asset_report_token,
-        )
-        response = poll_with_retries(lambda: client.asset_report_get(request))
-        asset_report_json = response['report']
-
-        request = AssetReportPDFGetRequest(
-            asset_report_token=asset_report_token,
+        # Poll for the completion of the Asset Report in the background;
+        # fetch it from /api/reports/<report_id> once it's ready.
+        return queue_report(
+            ('asset_report', asset_report_token),
+            lambda: poll_with_retries(
+                'asset_report_get',
+                AssetReportGetRequest(asset_report_token=asset_report_token),
+            ).to_dict()['report'],
+            lambda: client.asset_report_pdf_get(
+                AssetReportPDFGetRequest(asset_report_token=asset_report_token)
+            ),
         )
-        pdf = client.asset_report_pdf_get(request)
-        return jsonify({
-            'error': None,
-            'json': asset_report_json.to_dict(),
-            'pdf': base64.b64encode(pdf.read()).decode('utf-8'),
-        })
     except plaid.ApiException as e:
         error_response = format_error(e)
         return jsonify(error_response)
@@ -1087,79 +1422,135 @@ def item():
 # PDF: https://plaid.com/docs/check/api/#cracheck_reportpdfget
 @plaid_routes.route('/api/cra/get_base_report', methods=['GET'])
 def cra_check_report():
-    try:
-        get_response = poll_with_retries(lambda: client.cra_check_report_base_report_get(
-            CraCheckReportBaseReportGetRequest(user_token=user_token, item_ids=[])
-        ))
-        pretty_print_response(get_response.to_dict())
-
-        pdf_response = client.cra_check_report_pdf_get(
-            CraCheckReportPDFGetRequest(user_token=user_token)
-        )
-        return jsonify({
-            'report': get_response.to_dict()['report'],
-            'pdf': base64.b64encode(pdf_response.read()).decode('utf-8')
-        })
-    except plaid.ApiException as e:
-        error_response = format_error(e)
-        return jsonify(error_response)
+    token = user_token
+    return queue_report(
+        ('cra_base_report', token),
+        lambda: poll_with_retries(
+            'cra_check_report_base_report_get',
+            CraCheckReportBaseReportGetRequest(user_token=token, item_ids=[])
+        ).to_dict()['report'],
+        lambda: client.cra_check_report_pdf_get(
+            CraCheckReportPDFGetRequest(user_token=token)
+        ),
+    )
 
 # Retrieve CRA Income Insights and PDF with Insights
 # Income insights: https://plaid.com/docs/check/api/#cracheck_reportincome_insightsget
 # PDF w/ income insights: https://plaid.com/docs/check/api/#cracheck_reportpdfget
 @plaid_routes.route('/api/cra/get_income_insights', methods=['GET'])
 def cra_income_insights():
+    token = user_token
+    return queue_report(
+        ('cra_income_insights', token),
+        lambda: poll_with_retries(
+            'cra_check_report_income_insights_get',
+            CraCheckReportIncomeInsightsGetRequest(user_token=token)
+        ).to_dict()['report'],
+        lambda: client.cra_check_report_pdf_get(
+            CraCheckReportPDFGetRequest(user_token=token, add_ons=[CraPDFAddOns('cra_income_insights')]),
+        ),
+    )
+
+# Retrieve CRA Partner Insights
+# https://plaid.com/docs/check/api/#cracheck_reportpartner_insightsget
+@plaid_routes.route('/api/cra/get_partner_insights', methods=['GET'])
+def cra_partner_insights():
+    token = user_token
+    return queue_report(
+        ('cra_partner_insights', token),
+        lambda: poll_with_retries(
+            'cra_check_report_partner_insights_get',
+            CraCheckReportPartnerInsightsGetRequest(user_token=token)
+        ).to_dict(),
+    )
+
+
+def queue_report(key, fetch_report, fetch_pdf=None):
+    """
+    Queue a background job that waits for a Plaid report and stores it.
+
+    Returns a 202 response with the report ID to poll at
+    /api/reports/<report_id>.
+    """
+    job = report_jobs.submit(
+        current_app._get_current_object(),
+        key,
+        None,  # Quickstart reports aren't tied to a user session
+        run_report_job,
+        fetch_report,
+        fetch_pdf,
+    )
+    return jsonify({'error': None, 'report_id': job.job_id, 'status': job.status}), 202
+
+
+def run_report_job(job, fetch_report, fetch_pdf=None):
+    """Worker entry point: wait for a report, then write its JSON and PDF to disk."""
     try:
-        get_response = poll_with_retries(lambda: client.cra_check_report_income_insights_get(
-            CraCheckReportIncomeInsightsGetRequest(user_token=user_token))
-        )
-        pretty_print_response(get_response.to_dict())
+        report = fetch_report()
+        pdf = fetch_pdf() if fetch_pdf else None
+    except plaid.ApiException as e:
+        raise RuntimeError(format_error(e)['error']['display_message']) from e
 
-        pdf_response = client.cra_check_report_pdf_get(
-            CraCheckReportPDFGetRequest(user_token=user_token, add_ons=[CraPDFAddOns('cra_income_insights')]),
-        )
+    save_report(current_app.config["PLAID_REPORTS_DIR"], job.job_id, report, pdf)
+    return {'report_id': job.job_id, 'has_pdf': pdf is not None}
+
+
+@plaid_routes.route('/api/reports/<report_id>', methods=['GET'])
+def get_report(report_id):
+    """Return a stored report's JSON, or its job status while it's being built."""
+    reports_dir = current_app.config["PLAID_REPORTS_DIR"]
+    try:
+        report = load_report(reports_dir, report_id)
+        _, pdf_path = report_paths(reports_dir, report_id)
+    except ValueError:
+        return jsonify({'error': 'Report not found'}), 404
 
+    if report is not None:
         return jsonify({
-            'report': get_response.to_dict()['report'],
-            'pdf': base64.b64encode(pdf_response.read()).decode('utf-8')
+            'error': None,
+            'status': 'succeeded',
+            'report': report,
+            'pdf_url': f'/api/reports/{report_id}/pdf' if os.path.exists(pdf_path) else None,
         })
-    except plaid.ApiException as e:
-        error_response = format_error(e)
-        return jsonify(error_response)
 
-# Retrieve CRA Partner Insights
-# https://plaid.com/docs/check/api/#cracheck_reportpartner_insightsget
-@plaid_routes.route('/api/cra/get_partner_insights', methods=['GET'])
-def cra_partner_insights():
+    job = report_jobs.get(report_id)
+    if job is None:
+        return jsonify({'error': 'Report not found'}), 404
+    return jsonify({'error': job.error, 'status': job.status}), 202 if job.active else 200
+
+
+@plaid_routes.route('/api/reports/<report_id>/pdf', methods=['GET'])
+def get_report_pdf(report_id):
+    """Stream a stored report PDF from disk."""
     try:
-        response = poll_with_retries(lambda: client.cra_check_report_partner_insights_get(
-            CraCheckReportPartnerInsightsGetRequest(user_token=user_token)
-        ))
-        pretty_print_response(response.to_dict())
+        _, pdf_path = report_paths(current_app.config["PLAID_REPORTS_DIR"], report_id)
+    except ValueError:
+        return jsonify({'error': 'Report not found'}), 404
+    if not os.path.exists(pdf_path):
+        return jsonify({'error': 'Report not found'}), 404
+    return send_file(pdf_path, mimetype='application/pdf', download_name=f'{report_id}.pdf')
 
-        return jsonify(response.to_dict())
-    except plaid.ApiException as e:
-        error_response = format_error(e)
-        return jsonify(error_response)
 
-# Since this quickstart does not support webhooks, this function can be used to poll
-# an API that would otherwise be triggered by a webhook.
-# For a webhook example, see
-# https://github.com/plaid/tutorial-resources or
-# https://github.com/plaid/pattern
-def poll_with_retries(request_callback, ms=1000, retries_left=20):
-    while retries_left > 0:
-        try:
-            return request_callback()
-        except plaid.ApiException as e:
-            response = json.loads(e.body)
-            if response['error_code'] != 'PRODUCT_NOT_READY':
-                raise e
-            elif retries_left == 0:
-                raise Exception('Ran out of retries while polling') from e
-            else:
-                retries_left -= 1
-                time.sleep(ms / 1000)
+def poll_with_retries(endpoint, request, ms=1000, retries_left=20):
+    """
+    Call a Plaid endpoint until its product is ready, backing off between
+    attempts (jittered, starting at `ms` milliseconds).
+    """
+    return client.call(endpoint, request, max_retries=retries_left, base_delay=ms / 1000)
+
+
+@plaid_routes.route('/api/plaid/client_stats', methods=['GET'])
+@login_required_api
+def plaid_client_stats():
+    """Per-endpoint Plaid latency, error and retry counters, and Plaid cache hit rates"""
+    return jsonify({
+        "success": True,
+        "endpoints": client.stats(),
+        "caches": {
+            "institutions": institution_cache.stats(),
+            "item_accounts": item_accounts_cache.stats(),
+        },
+    })
 
 def pretty_print_response(response):
   print(json.dumps(response, indent=2, sort_keys=True, default=str))
@@ -1169,6 +1560,13 @@ def format_error(e):
     return {'error': {'status_code': e.status, 'display_message':
                       response['error_message'], 'error_code': response['error_code'], 'error_type': response['error_type']}}
 
+def plaid_error_message(e, default="The request to Plaid failed"):
+    """Return Plaid's message for an ApiException, or default if it has none."""
+    try:
+        return format_error(e)['error']['display_message'] or default
+    except (ValueError, KeyError, TypeError):
+        return default
+
 # Add these new endpoints to flask_backend/routes/plaid_routes.py
 
 # Replace the existing get_item_accounts function in flask_backend/routes/plaid_routes.py with this improved version
@@ -1188,15 +1586,15 @@ def get_item_accounts():
             return jsonify({"success": False, "error": "Plaid item not found"}), 404
         
         # Verify user has access to the scope
-        scope_access = ScopeAccess.query.filter_by(
-            ScopeID=plaid_item.ScopeID,
-            AccountID=current_user.id,
-            InviteStatus='accepted'
-        ).first()
-        
-        if not scope_access:
+        if plaid_item.ScopeID not in get_accessible_scope_ids():
             return jsonify({"success": False, "error": "You don't have access to this item"}), 403
         
+        # Serve recent balances from the cache unless a refresh is requested
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        cached = None if refresh else item_accounts_cache.get(item_id)
+        if cached is not None:
+            return jsonify({"success": True, "cached": True, **cached})
+
         try:
             # Use the stored access token for this specific item
             request_obj = AccountsBalanceGetRequest(
@@ -1204,12 +1602,16 @@ def get_item_accounts():
             )
             response = client.accounts_balance_get(request_obj)
             
-            # Update the last synced timestamp
-            plaid_item.LastSynced = datetime.now()
-            db.session.commit()
-            
             # Convert the response to a dict first to handle serialization
             response_dict = response.to_dict()
+
+            # Keep the stored accounts and their balances current
+            with current_app.config["ENGINE"].connect() as conn:
+                record_plaid_accounts(
+                    conn, plaid_item.ItemID, plaid_item.ScopeID,
+                    response_dict.get('accounts', []),
+                )
+                conn.commit()
             
             # Extract accounts data and manually build serializable objects
             accounts = []
@@ -1229,11 +1631,10 @@ def get_item_accounts():
                     'mask': account.get('mask')
                 }
                 accounts.append(account_data)
-            
-            return jsonify({
-                "success": True,
-                "accounts": accounts
-            })
+
+            result = {"accounts": accounts, "fetched_at": datetime.now().isoformat()}
+            item_accounts_cache.put(item_id, result)
+            return jsonify({"success": True, "cached": False, **result})
         except plaid.ApiException as e:
             error_response = format_error(e)
             print(f"Plaid API error for item {item_id}:", error_response)
@@ -1265,57 +1666,55 @@ def delete_plaid_item():
             return jsonify({"success": False, "error": "Plaid item not found"}), 404
         
         # Verify user has access to the scope
-        scope_access = ScopeAccess.query.filter_by(
-            ScopeID=plaid_item.ScopeID,
-            AccountID=current_user.id,
-            InviteStatus='accepted'
-        ).first()
-        
-        if not scope_access:
+        if plaid_item.ScopeID not in get_accessible_scope_ids():
             return jsonify({"success": False, "error": "You don't have access to this item"}), 403
 
+        # A running sync would write the item's transactions back, so hold
+        # the item's key in the sync queue until it is gone
+        claim = object()
+        if not sync_jobs.claim([item_id], claim):
+            return jsonify({
+                "success": False,
+                "error": "This connection is syncing; try again when the sync finishes"
+            }), 409
+
         # Store info for response
         institution_name = plaid_item.InstitutionName
         scope_id = plaid_item.ScopeID
         
         # Begin transaction
         try:
-            # If requested, delete all transactions associated with this item
-            deleted_count = 0
-            if delete_transactions:
-                with current_app.config["ENGINE"].connect() as conn:
-                    # Get accounts associated with this item
+            with current_app.config["ENGINE"].connect() as conn:
+                if delete_transactions and not count_item_accounts(conn, plaid_item.ItemID):
+                    # Linked before accounts were recorded: look them up once
                     try:
-                        # Use the stored access token to get account IDs
-                        accounts_request = AccountsGetRequest(
-                            access_token=plaid_item.AccessToken
-                        )
-                        accounts_response = client.accounts_get(accounts_request)
-                        account_ids = [account['account_id'] for account in accounts_response['accounts']]
-                        
-                        # Delete expenses with matching PlaidAccountID
-                        if account_ids:
-                            delete_stmt = expenses_table.delete().where(
-                                expenses_table.c.PlaidAccountID.in_(account_ids)
-                            )
-                            result = conn.execute(delete_stmt)
-                            deleted_count = result.rowcount
-                            conn.commit()
-                    except plaid.ApiException:
-                        # If we can't get accounts from Plaid, try deleting by scope
-                        delete_stmt = expenses_table.delete().where(
-                            and_(
-                                expenses_table.c.ScopeID == scope_id,
-                                expenses_table.c.PlaidTransactionID.isnot(None)
-                            )
+                        accounts_response = client.accounts_get(
+                            AccountsGetRequest(access_token=plaid_item.AccessToken)
                         )
-                        result = conn.execute(delete_stmt)
-                        deleted_count = result.rowcount
-                        conn.commit()
-            
-            # Delete the plaid item from database
-            db.session.delete(plaid_item)
-            db.session.commit()
+                    except plaid.ApiException as e:
+                        return jsonify({
+                            "success": False,
+                            "error": "Couldn't look up this connection's accounts, so its "
+                                     "transactions weren't deleted: "
+                                     + format_error(e)['error']['display_message']
+                        }), 502
+                    record_plaid_accounts(
+                        conn, plaid_item.ItemID, scope_id,
+                        accounts_response.to_dict()['accounts'],
+                    )
+                    conn.commit()
+
+                # Deletes the item's expenses (if requested), accounts and the
+                # item itself in short, chunked transactions
+                deleted = teardown_plaid_item(
+                    conn,
+                    plaid_item.ItemID,
+                    scope_id,
+                    delete_transactions=delete_transactions,
+                    batch_size=current_app.config.get("TEARDOWN_BATCH_SIZE"),
+                )
+
+            item_accounts_cache.invalidate(item_id)
             
             # Optionally, you could also call Plaid's API to remove the item
             # from Plaid's servers, but this isn't usually necessary
@@ -1323,12 +1722,14 @@ def delete_plaid_item():
             return jsonify({
                 "success": True,
                 "message": f"Successfully removed connection to {institution_name}",
-                "deleted_transactions": deleted_count if delete_transactions else 0
+                "deleted_transactions": deleted["expenses"]
             })
             
         except Exception as db_err:
             db.session.rollback()
             raise db_err
+        finally:
+            sync_jobs.release(claim)
             
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
\ No newline at end of file
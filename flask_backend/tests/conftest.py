@@ -5,7 +5,7 @@ from dotenv import load_dotenv, find_dotenv
 from flask_backend.create_app import create_app
 from flask_backend.database.models import Account, Person, Scope, ScopeAccess, db
 from flask_backend.utils.db_tools import populate_categories_table
-from flask_backend.database.tables import categories_table, CATEGORY_LIST
+from flask_backend.database.tables import categories_table, monthly_category_totals_table, CATEGORY_LIST
 from werkzeug.security import generate_password_hash
 
 
@@ -31,12 +31,21 @@ def client(app):
     return app.test_client()
 
 
+def clear_monthly_totals(engine):
+    # The rollup is a Core table, so db.drop_all() leaves it in place, and
+    # scope IDs restart once the scopes table is recreated
+    with engine.begin() as conn:
+        conn.execute(monthly_category_totals_table.delete())
+
+
 @pytest.fixture
 def init_database(app):
     db.create_all()
     populate_categories_table(app.config["ENGINE"], categories_table, CATEGORY_LIST)
+    clear_monthly_totals(app.config["ENGINE"])
     yield db
     db.drop_all()
+    clear_monthly_totals(app.config["ENGINE"])
 
 
 @pytest.fixture
@@ -65,3 +65,21 @@ def test_auth_status(client, test_user, app):
     response = client.get("/api/auth/status")
     assert response.status_code == 200
     assert response.json["authenticated"] is True
+
+
+# Test that repeated authenticated requests are served from the account cache
+def test_account_cache_stats(client, test_user, app):
+    client.post(
+        "/api/login",
+        data=json.dumps({"username": "testuser", "password": "testpass"}),
+        content_type="application/json",
+    )
+
+    client.get("/api/auth/status")
+    client.get("/api/auth/status")
+
+    response = client.get("/api/cache_stats")
+    assert response.status_code == 200
+    stats = response.json["account_cache"]
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 1
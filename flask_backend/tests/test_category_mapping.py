@@ -0,0 +1,85 @@
+from itertools import product
+
+from flask_backend.utils.category_mapping import (
+    MERCHANT_TO_CATEGORY_MAP,
+    categorize_transactions,
+    get_app_category_from_plaid,
+    get_category_for_transaction,
+)
+
+
+def per_key_loop_category(transaction):
+    """get_category_for_transaction as it was before the compiled matcher."""
+    merchant_name = transaction.get("merchant_name") or transaction.get("name", "")
+    if merchant_name:
+        merchant_upper = merchant_name.upper()
+        for key, category in MERCHANT_TO_CATEGORY_MAP.items():
+            if key in merchant_upper:
+                return category
+
+    plaid_pfc = transaction.get("personal_finance_category", {})
+    if plaid_pfc:
+        detailed = plaid_pfc.get("detailed")
+        primary = plaid_pfc.get("primary")
+        if detailed:
+            app_category = get_app_category_from_plaid(detailed, merchant_name)
+            if app_category:
+                return app_category
+        if primary:
+            app_category = get_app_category_from_plaid(primary, merchant_name)
+            if app_category:
+                return app_category
+    return "Miscellaneous"
+
+
+def test_merchant_keys_take_priority_in_listed_order():
+    # Both keys match; UBER is listed before LYFT
+    assert get_category_for_transaction(
+        {"name": "Lyft vs Uber refund", "personal_finance_category": {"primary": "INCOME"}}
+    ) == "Taxi and Ride-Sharing"
+    assert get_category_for_transaction({"merchant_name": "Amazon Prime*2K4"}) == (
+        "Other Memberships and Fees"
+    )
+
+
+def test_personal_finance_category_fallbacks():
+    def pfc(detailed, primary):
+        return {"name": "POS 1234", "personal_finance_category": {
+            "detailed": detailed, "primary": primary,
+        }}
+
+    assert categorize_transactions([
+        pfc("INCOME_WAGES", "INCOME"),
+        pfc("FOOD_AND_DRINK_GROCERIES", "FOOD_AND_DRINK"),
+        pfc("HOME_SOMETHING_NEW", None),
+        pfc(None, None),
+        {"name": None, "personal_finance_category": None},
+    ]) == [
+        "Income: Salary/Wages",
+        # Neither the detailed category nor its prefix is mapped, and the
+        # primary is only used without a detailed one
+        "Miscellaneous",
+        "Household Goods",
+        "Miscellaneous",
+        "Miscellaneous",
+    ]
+
+
+def test_compiled_matcher_matches_the_per_key_loop():
+    merchants = [None, "", "Uber 063015 SF**POOL**", "lyft ride", "NETFLIX.COM", "Amazon Prime*2K4",
+                 "Airbnb HMQ", "Spotify USA", "Starbucks", "Whole Foods", "POS 1234"]
+    categories = [None, {}, {"detailed": None, "primary": None},
+                  {"detailed": "FOOD_AND_DRINK_GROCERIES", "primary": "FOOD_AND_DRINK"},
+                  {"detailed": "TRANSPORTATION_GAS", "primary": "TRANSPORTATION"},
+                  {"detailed": "INCOME_WAGES", "primary": "INCOME"},
+                  {"detailed": "HOME_SOMETHING_NEW", "primary": None},
+                  {"detailed": None, "primary": "TRAVEL"},
+                  {"detailed": "UNKNOWN", "primary": "RENT_AND_UTILITIES"}]
+    transactions = [
+        {"merchant_name": merchant, "name": name, "personal_finance_category": pfc}
+        for merchant, name, pfc in product(merchants, ["NETFLIX 123", "GROCER 9", None], categories)
+    ]
+
+    assert categorize_transactions(transactions) == [
+        per_key_loop_category(transaction) for transaction in transactions
+    ]
@@ -1,7 +1,10 @@
 import pytest
 from flask import json
 from datetime import datetime
+from sqlalchemy import select
 from flask_backend.database.models import db, Person, Expense
+from flask_backend.database.tables import monthly_category_totals_table
+from flask_backend.utils.rollups import find_rollup_mismatches, rebuild_monthly_totals
 
 
 @pytest.fixture
@@ -50,6 +53,8 @@ def test_get_expenses(client, test_user, test_scope, login_as_test_user, setup_e
     assert "success" in data
     assert data["success"] is True
     assert len(data["expenses"]) == 2
+    # Pagination is opt-in; the plain listing keeps its original shape
+    assert "next_cursor" not in data
     
     # Verify scope information is present
     for expense in data["expenses"]:
@@ -130,6 +135,48 @@ def test_submit_expense_to_invalid_scope(client, test_user, test_scope, login_as
     assert "error" in data
 
 
+def test_submit_expenses_reports_every_invalid_row(client, test_user, test_scope, login_as_test_user):
+    login_as_test_user()
+    valid = {
+        "scope": test_scope.ScopeID,
+        "day": 20,
+        "month": "February",
+        "year": 2021,
+        "amount": "1,200.00",
+        "category": "Utilities",
+    }
+    new_expenses = {"expenses": [
+        valid,
+        dict(valid, day=30),  # February 30th
+        valid,
+        dict(valid, month="Febtember"),
+    ]}
+    response = client.post(
+        "/api/submit_expenses",
+        data=json.dumps(new_expenses),
+        content_type="application/json",
+    )
+    data = response.get_json()
+
+    assert data["success"] is False
+    assert data["errors"] == [
+        {"row": 1, "error": "Invalid date: 30-February-2021"},
+        {"row": 3, "error": "Invalid month selected"},
+    ]
+    # Nothing is recorded unless every row is valid
+    assert Expense.query.filter_by(ScopeID=test_scope.ScopeID).count() == 0
+
+    new_expenses["expenses"] = [valid] * 250
+    response = client.post(
+        "/api/submit_expenses",
+        data=json.dumps(new_expenses),
+        content_type="application/json",
+    )
+
+    assert response.get_json()["success"] is True
+    assert Expense.query.filter_by(ScopeID=test_scope.ScopeID).count() == 250
+
+
 def test_delete_expenses(client, test_user, test_scope, login_as_test_user, setup_expenses):
     login_as_test_user()
     
@@ -167,4 +214,142 @@ def test_delete_expenses_from_unauthorized_scope(client, test_user, login_as_tes
     assert response.status_code == 200
     assert data["success"] is False
     assert "message" in data
-    assert "No expenses were deleted" in data["message"]
\ No newline at end of file
+    assert "No expenses were deleted" in data["message"]
+
+def test_get_expenses_paginated(client, test_user, test_scope, login_as_test_user, setup_expenses):
+    login_as_test_user()
+    response = client.get("/api/get_expenses?limit=1")
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data["success"] is True
+    assert len(data["expenses"]) == 1
+    assert data["has_more"] is True
+    # Newest expense comes first
+    assert data["expenses"][0]["Day"] == 16
+
+    response = client.get(f"/api/get_expenses?limit=1&cursor={data['next_cursor']}")
+    data = response.get_json()
+
+    assert len(data["expenses"]) == 1
+    assert data["expenses"][0]["Day"] == 15
+    assert data["has_more"] is False
+    assert data["next_cursor"] is None
+
+
+def test_get_expenses_filters(client, test_user, test_scope, login_as_test_user, setup_expenses):
+    login_as_test_user()
+    response = client.get("/api/get_expenses?category=Groceries&start_date=2021-01-01&end_date=2021-01-31")
+    data = response.get_json()
+
+    assert data["success"] is True
+    assert len(data["expenses"]) == 1
+    assert data["expenses"][0]["ExpenseCategory"] == "Groceries"
+
+    response = client.get("/api/get_expenses?scope_id=999999")
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_get_expenses_all(client, test_user, test_scope, login_as_test_user, setup_expenses):
+    login_as_test_user()
+    response = client.get("/api/get_expenses?all=true")
+    data = response.get_json()
+
+    assert data["success"] is True
+    assert len(data["expenses"]) == 2
+    assert "next_cursor" not in data
+
+
+def test_get_expenses_ndjson(client, test_user, test_scope, login_as_test_user, setup_expenses):
+    login_as_test_user()
+    response = client.get("/api/get_expenses?format=ndjson")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 2
+    assert {line["ExpenseCategory"] for line in lines} == {"Groceries", "Entertainment"}
+
+
+def test_get_category_averages(client, app, test_user, test_scope, login_as_test_user):
+    login_as_test_user()
+    today = datetime.now().date()
+    db.session.add_all([
+        Expense(
+            ScopeID=test_scope.ScopeID,
+            Day=today.day,
+            Month=today.strftime("%B"),
+            Year=today.year,
+            ExpenseDate=today,
+            Amount=amount,
+            ExpenseCategory="Groceries",
+            Currency="USD",
+            IsIncome=False,
+        )
+        for amount in (30.00, 20.00)
+    ])
+    db.session.commit()
+    # Seeded through the ORM, so the rollup (which whole months are read
+    # from) has to be brought up to date by hand
+    with app.config["ENGINE"].begin() as connection:
+        rebuild_monthly_totals(connection, [test_scope.ScopeID])
+
+    response = client.get("/api/get_category_averages")
+    data = response.get_json()
+
+    assert data["success"] is True
+    assert data["period"]["active_months"] == 1
+    assert data["averages"] == [{
+        "category": "Groceries",
+        "monthly_average": 50.00,
+        "total_12_months": 50.00,
+        "active_months": 1,
+    }]
+
+
+def test_submit_and_delete_expenses_maintain_monthly_totals(client, app, test_user, test_scope, login_as_test_user):
+    login_as_test_user()
+    new_expenses = {
+        "expenses": [
+            {
+                "scope": test_scope.ScopeID,
+                "day": day,
+                "month": "March",
+                "year": 2022,
+                "amount": amount,
+                "category": "Groceries",
+            }
+            for day, amount in ((3, "40.00"), (9, "2.50"))
+        ]
+    }
+    client.post(
+        "/api/submit_expenses",
+        data=json.dumps(new_expenses),
+        content_type="application/json",
+    )
+
+    with app.config["ENGINE"].connect() as connection:
+        rollup = connection.execute(
+            select(monthly_category_totals_table).where(
+                monthly_category_totals_table.c.ScopeID == test_scope.ScopeID
+            )
+        ).fetchall()
+        assert len(rollup) == 1
+        assert (rollup[0].Year, rollup[0].Month) == (2022, 3)
+        assert rollup[0].Total == 42.50
+        assert rollup[0].ExpenseCount == 2
+        assert find_rollup_mismatches(connection, [test_scope.ScopeID]) == []
+
+    expense_ids = [
+        expense.ExpenseID
+        for expense in Expense.query.filter_by(ScopeID=test_scope.ScopeID).all()
+    ]
+    client.post(
+        "/api/delete_expenses",
+        data=json.dumps({"expenseIds": expense_ids}),
+        content_type="application/json",
+    )
+
+    with app.config["ENGINE"].connect() as connection:
+        assert find_rollup_mismatches(connection, [test_scope.ScopeID]) == []
@@ -0,0 +1,165 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import func, select
+from flask_backend.database.models import db, Expense, PlaidItem, Scope, ScopeAccess
+from flask_backend.database.tables import (
+    category_targets_table,
+    expenses_table,
+    scope_access_table,
+)
+from flask_backend.routes.household_routes import run_household_teardown_job
+from flask_backend.utils.sync_jobs import KeyClaimedError, SyncJob, sync_jobs
+from flask_backend.utils.teardown import DELETING, claim_scope_items, teardown_jobs, teardown_scope
+
+
+def test_teardown_scope_removes_dependent_rows(app, test_user, test_scope):
+    scope_id = test_scope.ScopeID
+    db.session.add_all([
+        Expense(
+            ScopeID=scope_id,
+            Day=day,
+            Month="January",
+            Year=2021,
+            ExpenseDate=datetime(2021, 1, day),
+            Amount=10.00,
+            ExpenseCategory="Groceries",
+            Currency="USD",
+        )
+        for day in range(1, 6)
+    ])
+    db.session.commit()
+
+    engine = app.config["ENGINE"]
+    # Created by scripts/create_category_targets_table.py outside the tests
+    category_targets_table.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        conn.execute(category_targets_table.insert().values(
+            ScopeID=scope_id,
+            AccountID=test_user.id,
+            CategoryName="Groceries",
+            MonthlyTarget=200.0,
+            IsActive=True,
+        ))
+        conn.commit()
+
+    progress = []
+    with engine.connect() as conn:
+        deleted = teardown_scope(
+            conn, scope_id, batch_size=2, progress=lambda **counts: progress.append(counts)
+        )
+
+    assert deleted["expenses"] == 5
+    assert deleted["category_targets"] == 1
+    assert deleted["scope_access"] == 1
+    assert deleted["scopes"] == 1
+    # Expenses went in chunks of two, each reported as it finished
+    assert [counts["expenses"] for counts in progress[:3]] == [2, 4, 5]
+
+    with engine.connect() as conn:
+        for table in (expenses_table, category_targets_table, scope_access_table):
+            remaining = conn.execute(
+                select(func.count()).select_from(table).where(table.c.ScopeID == scope_id)
+            ).scalar()
+            assert remaining == 0
+    assert db.session.get(Scope, scope_id, populate_existing=True) is None
+    assert ScopeAccess.query.filter_by(ScopeID=scope_id).count() == 0
+
+
+def test_teardown_claims_the_scopes_plaid_items(app, test_scope):
+    db.session.add(PlaidItem(
+        ScopeID=test_scope.ScopeID,
+        PlaidItemID="item-1",
+        AccessToken="access-sandbox-1",
+        CreateDate=datetime.now().date(),
+        LastUpdated=datetime.now().date(),
+    ))
+    db.session.commit()
+    syncing, teardown = object(), object()
+
+    with app.config["ENGINE"].connect() as conn:
+        # A sync holding the item makes the teardown wait, then give up
+        assert sync_jobs.claim(["item-1"], syncing) == ["item-1"]
+        with pytest.raises(TimeoutError):
+            claim_scope_items(conn, test_scope.ScopeID, teardown, timeout=0)
+        sync_jobs.release(syncing)
+
+        # Once claimed, no new sync can start on the item
+        claim_scope_items(conn, test_scope.ScopeID, teardown, timeout=0)
+    try:
+        with pytest.raises(KeyClaimedError):
+            sync_jobs.submit(app, "item-1", None, lambda job: None)
+    finally:
+        sync_jobs.release(teardown)
+
+
+def groceries(scope_id, day):
+    return Expense(
+        ScopeID=scope_id,
+        Day=day,
+        Month="January",
+        Year=2021,
+        ExpenseDate=datetime(2021, 1, day),
+        Amount=10.00,
+        ExpenseCategory="Groceries",
+        Currency="USD",
+    )
+
+
+def test_teardown_sweeps_up_expenses_written_while_it_runs(app, test_scope):
+    scope_id = test_scope.ScopeID
+    db.session.add_all([groceries(scope_id, day) for day in range(1, 4)])
+    db.session.commit()
+    late_writes = []
+
+    def write_during_teardown(**counts):
+        # A request that checked access before it was revoked lands after
+        # the expenses pass
+        if counts["scope_access"] and not late_writes:
+            late_writes.append(groceries(scope_id, 20))
+            db.session.add(late_writes[0])
+            db.session.commit()
+
+    with app.config["ENGINE"].connect() as conn:
+        deleted = teardown_scope(conn, scope_id, batch_size=2, progress=write_during_teardown)
+
+    assert deleted["expenses"] == 4
+    assert deleted["scopes"] == 1
+    assert db.session.get(Scope, scope_id, populate_existing=True) is None
+
+
+def test_delete_household_revokes_access_before_the_teardown(
+    client, app, test_user, test_scope, login_as_test_user, monkeypatch
+):
+    queued = []
+
+    def queue_teardown(app, key, owner_id, func, *args):
+        job = SyncJob(key, owner_id)
+        queued.append((job, func, args))
+        return job
+
+    monkeypatch.setattr(teardown_jobs, "submit", queue_teardown)
+    login_as_test_user()
+    scope_id = test_scope.ScopeID
+
+    response = client.post("/api/delete_household", json={"scopeId": scope_id})
+    assert response.status_code == 202
+
+    # Queued but not yet run: the scope is already off limits
+    access = ScopeAccess.query.filter_by(ScopeID=scope_id).one()
+    db.session.refresh(access)
+    assert access.InviteStatus == DELETING
+    submitted = client.post("/api/submit_expenses", json={"expenses": [{
+        "scope": scope_id,
+        "day": 3,
+        "month": "March",
+        "year": 2022,
+        "amount": "5.00",
+        "category": "Groceries",
+    }]}).get_json()
+    assert submitted["success"] is False
+    assert submitted["errors"][0]["error"] == "Invalid or inaccessible scope"
+
+    job, func, args = queued[0]
+    assert func is run_household_teardown_job
+    result = func(job, *args)
+    assert result["deleted"]["scopes"] == 1
@@ -0,0 +1,70 @@
+import io
+
+from flask import jsonify, request
+
+from flask_backend.database.tables import idempotency_keys_table
+from flask_backend.utils.idempotency import REPLAYED_HEADER, idempotent
+from flask_backend.utils.session import login_required_api
+
+
+def test_idempotency_key_replays_the_first_response(app, client, test_user, login_as_test_user):
+    calls = []
+
+    @login_required_api
+    @idempotent
+    def record_call():
+        calls.append(request.get_json())
+        return jsonify({"success": True, "call": len(calls)})
+
+    app.add_url_rule("/api/test_idempotent", "test_idempotent", record_call, methods=["POST"])
+    with app.config["ENGINE"].begin() as conn:
+        conn.execute(idempotency_keys_table.delete().where(
+            idempotency_keys_table.c.Endpoint == "test_idempotent"
+        ))
+    login_as_test_user()
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = client.post("/api/test_idempotent", json={"amount": 5}, headers=headers)
+    retry = client.post("/api/test_idempotent", json={"amount": 5}, headers=headers)
+    reused = client.post("/api/test_idempotent", json={"amount": 6}, headers=headers)
+    unkeyed = client.post("/api/test_idempotent", json={"amount": 5})
+
+    assert first.get_json() == retry.get_json() == {"success": True, "call": 1}
+    assert REPLAYED_HEADER not in first.headers
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert reused.status_code == 422
+    assert unkeyed.get_json()["call"] == 2
+    assert len(calls) == 2
+
+
+def test_idempotency_key_covers_uploaded_file_contents(app, client, test_user, login_as_test_user):
+    @login_required_api
+    @idempotent
+    def upload_statement():
+        return jsonify({"success": True, "size": len(request.files["file"].stream.read())})
+
+    app.add_url_rule("/api/test_idempotent_upload", "test_idempotent_upload", upload_statement,
+                     methods=["POST"])
+    with app.config["ENGINE"].begin() as conn:
+        conn.execute(idempotency_keys_table.delete().where(
+            idempotency_keys_table.c.Endpoint == "test_idempotent_upload"
+        ))
+    login_as_test_user()
+
+    def post(content):
+        return client.post(
+            "/api/test_idempotent_upload",
+            data={"scope": "1", "file": (io.BytesIO(content), "statement.csv")},
+            headers={"Idempotency-Key": "upload-1"},
+            content_type="multipart/form-data",
+        )
+
+    first = post(b"Date,Description,Amount\n")
+    retry = post(b"Date,Description,Amount\n")
+    # Same name and size, different statement
+    changed = post(b"Date,Description,Amount\r")
+
+    # The hash reads the file, but the view still sees all of it
+    assert first.get_json() == {"success": True, "size": 24}
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert changed.status_code == 422
@@ -0,0 +1,160 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import select
+
+from flask_backend.database.models import Scope, db
+from flask_backend.database.tables import expenses_table, monthly_category_totals_table
+from flask_backend.utils.plaid_ingestion import (
+    INGESTION_STAGES,
+    build_plaid_expense_records,
+    ingest_plaid_transactions,
+)
+
+
+@pytest.fixture
+def plaid_expenses(app, init_database):
+    """Swap the ORM's expenses table for the full one, which has the Plaid columns."""
+    engine = app.config["ENGINE"]
+    expenses_table.drop(engine, checkfirst=True)
+    expenses_table.create(engine)
+    yield engine
+    expenses_table.drop(engine, checkfirst=True)
+
+
+def plaid_txn(transaction_id, amount=12.5, **fields):
+    txn = {
+        "account_id": "acct-1",
+        "transaction_id": transaction_id,
+        "amount": amount,
+        "date": date(2024, 3, 5),
+        "name": "CORNER COFFEE",
+        "merchant_name": "Corner Coffee",
+        "pending": False,
+        "pending_transaction_id": None,
+    }
+    txn.update(fields)
+    return txn
+
+
+def stored_expenses(conn):
+    return conn.execute(
+        select(expenses_table).order_by(expenses_table.c.ExpenseID)
+    ).fetchall()
+
+
+def test_records_keep_plaid_dates_in_any_form():
+    transactions = [
+        # The Plaid client returns date objects; JSON payloads carry strings
+        {"transaction_id": "a", "amount": 5.0, "date": date(2024, 2, 29)},
+        {"transaction_id": "b", "amount": 5.0, "date": "2024-02-29", "authorized_date": "2024-02-28"},
+        {"transaction_id": "c", "amount": 5.0, "date": "Feb 29 2024"},
+        {"transaction_id": "d", "amount": 5.0, "date": None},
+    ]
+
+    records = build_plaid_expense_records(transactions, scope_id=1)
+
+    for record in records[:3]:
+        assert record["ExpenseDate"] == date(2024, 2, 29)
+        assert (record["Day"], record["Month"], record["Year"]) == (29, "February", 2024)
+        assert record["ExpenseDayOfWeek"] == "Thursday"
+    assert records[1]["PlaidAuthorizedDate"] == date(2024, 2, 28)
+    assert records[3]["ExpenseDate"] == datetime.now().date()
+    assert records[3]["PlaidDate"] is None
+
+
+def test_posted_transaction_takes_over_its_pending_row(plaid_expenses, test_scope):
+    with plaid_expenses.connect() as conn:
+        ingest_plaid_transactions(conn, test_scope.ScopeID, [plaid_txn("pending-1", pending=True)])
+        conn.execute(
+            expenses_table.update()
+            .where(expenses_table.c.PlaidTransactionID == "pending-1")
+            .values(AdditionalNotes="team coffee")
+        )
+        conn.commit()
+
+        result = ingest_plaid_transactions(conn, test_scope.ScopeID, [
+            plaid_txn("posted-1", amount=14.0, pending_transaction_id="pending-1"),
+        ])
+        rows = stored_expenses(conn)
+
+    assert result["reconciled_pending"] == 1
+    assert result["new_transactions"] == 0
+    assert len(rows) == 1
+    assert rows[0].PlaidTransactionID == "posted-1"
+    assert rows[0].PlaidPending is False
+    assert rows[0].Amount == rows[0].AdjustedAmount == 14.0
+    assert rows[0].AdditionalNotes == "team coffee"
+
+
+def test_modified_transaction_stored_in_another_scope_is_not_inserted(plaid_expenses, test_scope):
+    other_scope = Scope(ScopeName="Old household", ScopeType="household",
+                        CreateDate=date.today(), LastUpdated=date.today())
+    db.session.add(other_scope)
+    db.session.commit()
+
+    with plaid_expenses.connect() as conn:
+        ingest_plaid_transactions(conn, other_scope.ScopeID, [plaid_txn("txn-1")])
+        result = ingest_plaid_transactions(
+            conn, test_scope.ScopeID, [], modified=[plaid_txn("txn-1", amount=20.0)]
+        )
+        rows = stored_expenses(conn)
+
+    assert result["updated"] == 0
+    assert result["new_transactions"] == 0
+    assert [(row.ScopeID, row.Amount) for row in rows] == [(other_scope.ScopeID, 12.5)]
+
+
+def test_replayed_pending_transaction_stays_reconciled(plaid_expenses, test_scope):
+    pending = plaid_txn("pending-1", pending=True)
+    posted = plaid_txn("posted-1", pending_transaction_id="pending-1")
+
+    with plaid_expenses.connect() as conn:
+        ingest_plaid_transactions(conn, test_scope.ScopeID, [pending])
+        ingest_plaid_transactions(conn, test_scope.ScopeID, [posted])
+        # A sync restart replays both pages
+        first = ingest_plaid_transactions(conn, test_scope.ScopeID, [pending])
+        second = ingest_plaid_transactions(conn, test_scope.ScopeID, [posted])
+        rows = stored_expenses(conn)
+
+    assert first["skipped"] == second["skipped"] == 1
+    assert [row.PlaidTransactionID for row in rows] == ["posted-1"]
+
+
+def test_ingest_dedupes_reconciles_and_inserts_a_page(plaid_expenses, test_scope):
+    scope_id = test_scope.ScopeID
+    stages = []
+
+    with plaid_expenses.connect() as conn:
+        ingest_plaid_transactions(conn, scope_id, [
+            plaid_txn("stored-1", amount=3.0),
+            plaid_txn("pending-1", amount=7.0, pending=True),
+        ])
+
+        result = ingest_plaid_transactions(
+            conn,
+            scope_id,
+            [
+                plaid_txn("stored-1", amount=3.0),  # already stored
+                plaid_txn("posted-1", amount=8.0, pending_transaction_id="pending-1"),
+                plaid_txn("new-1", amount=10.0),
+                plaid_txn("new-1", amount=10.0),  # repeated in the page
+            ],
+            batch_size=1,
+            on_stage=lambda stage, seconds, rows: stages.append((stage, rows)),
+        )
+        rows = stored_expenses(conn)
+        totals = conn.execute(
+            select(monthly_category_totals_table.c.Total, monthly_category_totals_table.c.ExpenseCount)
+            .where(monthly_category_totals_table.c.ScopeID == scope_id)
+        ).fetchall()
+
+    assert result["skipped"] == 2
+    assert result["reconciled_pending"] == 1
+    assert result["new_transactions"] == 1
+    assert result["insert_batches"] == 1
+    assert set(result["stage_seconds"]) == set(INGESTION_STAGES)
+    assert stages == [("dedupe", 4), ("classify", 2), ("normalize", 2), ("write", 1)]
+    assert sorted(row.PlaidTransactionID for row in rows) == ["new-1", "posted-1", "stored-1"]
+    assert sum(total for total, _ in totals) == 21.0
+    assert sum(count for _, count in totals) == 3
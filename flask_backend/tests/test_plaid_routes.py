@@ -0,0 +1,136 @@
+from datetime import datetime
+
+import plaid
+import pytest
+from flask import json
+from flask_backend.database.models import db, PlaidItem
+from flask_backend.database.tables import plaid_accounts_table
+from flask_backend.routes import plaid_routes
+from flask_backend.utils.plaid_accounts import record_plaid_accounts
+
+# Same bodies as scripts/send_plaid_webhook.py
+CANNED_WEBHOOKS = {
+    "SYNC_UPDATES_AVAILABLE": {
+        "webhook_type": "TRANSACTIONS",
+        "webhook_code": "SYNC_UPDATES_AVAILABLE",
+        "initial_update_complete": True,
+        "historical_update_complete": True,
+    },
+    "DEFAULT_UPDATE": {
+        "webhook_type": "TRANSACTIONS",
+        "webhook_code": "DEFAULT_UPDATE",
+        "new_transactions": 3,
+    },
+}
+
+
+def post_webhook(client, body, headers=None):
+    return client.post(
+        "/api/plaid/webhook",
+        data=json.dumps(body),
+        content_type="application/json",
+        headers=headers or {},
+    )
+
+
+def add_plaid_item(scope_id, plaid_item_id="item-1"):
+    plaid_item = PlaidItem(
+        ScopeID=scope_id,
+        PlaidItemID=plaid_item_id,
+        AccessToken="access-sandbox-1",
+        CreateDate=datetime.now().date(),
+        LastUpdated=datetime.now().date(),
+    )
+    db.session.add(plaid_item)
+    db.session.commit()
+    return plaid_item
+
+
+def test_webhook_requires_signature(client, init_database):
+    body = dict(CANNED_WEBHOOKS["SYNC_UPDATES_AVAILABLE"], item_id="item-1")
+
+    response = post_webhook(client, body)
+
+    assert response.status_code == 401
+    assert response.get_json()["success"] is False
+
+
+def test_webhook_queues_sync_for_item(client, app, test_scope, monkeypatch):
+    app.config["PLAID_WEBHOOK_VERIFY"] = False
+    add_plaid_item(test_scope.ScopeID)
+
+    queued = []
+
+    class FakeJob:
+        job_id = "job-1"
+
+    def fake_submit(app, key, owner_id, func, *args, **kwargs):
+        queued.append((key, args))
+        return FakeJob()
+
+    monkeypatch.setattr(plaid_routes.sync_jobs, "submit", fake_submit)
+
+    for code in ("SYNC_UPDATES_AVAILABLE", "DEFAULT_UPDATE"):
+        response = post_webhook(client, dict(CANNED_WEBHOOKS[code], item_id="item-1"))
+        assert response.status_code == 200
+        assert response.get_json()["action"] == "sync_queued"
+
+    # Unknown items and other webhook types are acknowledged but ignored
+    response = post_webhook(
+        client, dict(CANNED_WEBHOOKS["DEFAULT_UPDATE"], item_id="item-unknown")
+    )
+    assert response.get_json()["action"] == "ignored"
+    response = post_webhook(
+        client, {"webhook_type": "ITEM", "webhook_code": "ERROR", "item_id": "item-1"}
+    )
+    assert response.get_json()["action"] == "ignored"
+
+    assert queued == [("item-1", ("item-1",)), ("item-1", ("item-1",))]
+
+
+def test_delete_item_forgets_recorded_accounts(
+    client, app, test_scope, login_as_test_user, monkeypatch
+):
+    plaid_item = add_plaid_item(test_scope.ScopeID)
+    item_row_id = plaid_item.ItemID
+    with app.config["ENGINE"].connect() as conn:
+        record_plaid_accounts(conn, item_row_id, test_scope.ScopeID, [
+            {"account_id": "acct-1", "name": "Checking", "balances": {"current": 10.0}},
+            {"account_id": "acct-2", "name": "Savings", "balances": {}},
+        ])
+        conn.commit()
+
+    class NoPlaid:
+        def __getattr__(self, name):
+            raise AssertionError(f"Plaid was called: {name}")
+
+    monkeypatch.setattr(plaid_routes, "client", NoPlaid())
+    login_as_test_user()
+
+    response = client.post(
+        "/api/delete_plaid_item",
+        data=json.dumps({"item_id": "item-1", "delete_transactions": False}),
+        content_type="application/json",
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["success"] is True
+    assert PlaidItem.query.filter_by(PlaidItemID="item-1").first() is None
+    with app.config["ENGINE"].connect() as conn:
+        remaining = conn.execute(
+            plaid_accounts_table.select().where(plaid_accounts_table.c.ItemID == item_row_id)
+        ).all()
+    assert remaining == []
+
+
+def test_sync_paging_reraises_errors_without_a_json_body(monkeypatch):
+    class FailingClient:
+        def transactions_sync(self, sync_request):
+            error = plaid.ApiException(status=502, reason="Bad Gateway")
+            error.body = "<html><body>502 Bad Gateway</body></html>"
+            raise error
+
+    monkeypatch.setattr(plaid_routes, "client", FailingClient())
+
+    with pytest.raises(plaid.ApiException):
+        list(plaid_routes.iter_transaction_pages("access-token", ""))
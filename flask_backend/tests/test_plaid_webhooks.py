@@ -0,0 +1,27 @@
+import base64
+import json
+
+import pytest
+
+from flask_backend.utils.plaid_webhooks import WebhookVerificationError, verify_plaid_webhook
+
+
+def unsigned_token(header):
+    def segment(value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b"=").decode()
+    return f"{segment(header)}.{segment({'iat': 0})}.c2ln"
+
+
+@pytest.mark.parametrize("header", [
+    {"alg": "ES256", "typ": "JWT"},
+    {"alg": "ES256", "typ": "JWT", "kid": ""},
+    {"alg": "ES256", "typ": "JWT", "kid": ["key-1"]},
+    {"alg": "HS256", "typ": "JWT", "kid": "key-1"},
+    {"alg": "none", "typ": "JWT", "kid": "key-1"},
+])
+def test_bad_token_headers_are_rejected_before_fetching_a_key(header):
+    def get_verification_key(key_id):
+        raise AssertionError("Plaid must not be asked for a key")
+
+    with pytest.raises(WebhookVerificationError):
+        verify_plaid_webhook(b"{}", unsigned_token(header), get_verification_key)
@@ -37,7 +37,11 @@ def test_unauthenticated_get_routes(client, init_database):
         "/api/get_categories",
         "/api/get_scopes",  # New route
         "/api/get_pending_invites",  # New route
-        "/api/get_household_members?scopeId=1"  # New route
+        "/api/get_household_members?scopeId=1",  # New route
+        "/api/sync_jobs/abc123",
+        "/api/plaid/client_stats",
+        "/api/teardown_jobs/abc123",
+        "/api/cache_stats",
     ]
 
     for route in routes:
@@ -61,7 +65,10 @@ def test_unauthenticated_post_routes(client, init_database):
         ("/api/respond_to_invite", {"scopeId": 1, "response": "accept"}),  # New route
         ("/api/leave_household", {"scopeId": 1}),  # New route
         ("/api/delete_household", {"scopeId": 1}),  # New route
-        ("/api/remove_household_member", {"scopeId": 1, "email": "test@test.com"})  # New route
+        ("/api/remove_household_member", {"scopeId": 1, "email": "test@test.com"}),  # New route
+        ("/api/sync_transactions", {"item_id": "item-1"}),
+        ("/api/sync_all_items", {}),
+        ("/api/import_statement", {}),
     ]
 
     for route, data in routes_and_data:
@@ -0,0 +1,95 @@
+import io
+from datetime import date
+
+import pytest
+
+from flask_backend.utils.expense_fingerprints import expense_fingerprint
+from flask_backend.utils.manual_expenses import build_manual_expense_record
+from flask_backend.utils.statement_import import (
+    StatementFormatError,
+    StatementRowError,
+    build_imported_expense_record,
+    iter_csv_statement,
+    iter_ofx_statement,
+)
+
+
+def test_csv_statement_columns_and_signs():
+    statement = (
+        "Posted Date,Payee,Debit,Credit\r\n"
+        "2024-03-01,STARBUCKS #123,4.50,\r\n"
+        "2024-03-02,ACME PAYROLL,,\"1,500.00\"\r\n"
+        "\r\n"
+        "not a date,BROKEN,1.00,\r\n"
+    )
+
+    rows = list(iter_csv_statement(io.BytesIO(statement.encode("utf-8-sig"))))
+
+    assert rows[0] == (2, {"date": date(2024, 3, 1), "amount": 4.5, "name": "STARBUCKS #123"})
+    # Money in is stored as a negative amount, as Plaid does
+    assert rows[1] == (3, {"date": date(2024, 3, 2), "amount": -1500.0, "name": "ACME PAYROLL"})
+    assert rows[2][0] == 5 and isinstance(rows[2][1], StatementRowError)
+
+
+def test_csv_statement_without_amount_columns_is_rejected():
+    with pytest.raises(StatementFormatError):
+        list(iter_csv_statement(io.BytesIO(b"Date,Description\n2024-03-01,Coffee\n")))
+
+
+def test_ofx_statement_spanning_read_chunks():
+    transaction = (
+        "<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20240301120000[-5:EST]\n"
+        "<TRNAMT>-12.34\n<FITID>{fitid}\n<NAME>UBER TRIP\n</STMTTRN>\n"
+    )
+    body = "".join(transaction.format(fitid=i) for i in range(5000))
+    statement = f"OFXHEADER:100\n\n<OFX><BANKTRANLIST>\n{body}</BANKTRANLIST></OFX>\n"
+
+    rows = list(iter_ofx_statement(io.BytesIO(statement.encode())))
+
+    assert len(rows) == 5000
+    assert rows[-1] == (5000, {
+        "date": date(2024, 3, 1), "amount": 12.34, "name": "UBER TRIP", "fitid": "4999", "account": None,
+    })
+
+
+def test_ofx_transactions_carry_their_statements_account():
+    def statement(acctid, fitid):
+        return (
+            f"<STMTRS><BANKACCTFROM><BANKID>111000025<ACCTID>{acctid}<ACCTTYPE>CHECKING"
+            f"</BANKACCTFROM><BANKTRANLIST><STMTTRN><DTPOSTED>20240301<TRNAMT>-5.00"
+            f"<FITID>{fitid}<NAME>COFFEE</STMTTRN></BANKTRANLIST></STMTRS>"
+        )
+    body = statement("1234", "1") + statement("9876", "1")
+
+    rows = list(iter_ofx_statement(io.BytesIO(f"<OFX>{body}</OFX>".encode())))
+
+    first, second = rows[0][1], rows[1][1]
+    assert first["fitid"] == second["fitid"] == "1"
+    assert first["account"] and second["account"]
+    # Same FITID, different accounts: not the same transaction
+    assert first["account"] != second["account"]
+    assert "1234" not in first["account"]
+
+
+def test_imported_and_manual_expenses_share_fingerprints():
+    imported = build_imported_expense_record(
+        {"date": date(2024, 3, 1), "amount": 4.5, "name": "  starbucks   #123 "}, scope_id=1
+    )
+    manual = build_manual_expense_record(
+        {"scope": 1, "day": 1, "month": "March", "year": 2024, "amount": "4.50",
+         "category": "Coffee", "merchant": "STARBUCKS #123"},
+        accessible_scope_ids={1},
+    )
+
+    assert imported["Fingerprint"] == manual["Fingerprint"]
+    assert manual["Fingerprint"] != expense_fingerprint(date(2024, 3, 1), 4.51, "STARBUCKS #123")
+
+
+def test_unreadable_csv_is_a_format_error():
+    statement = b"Date,Description,Amount\n2024-03-01,Coffee,-4.50\n2024-03-02,\"" + b"x" * 200_000 + b"\",-1\n"
+
+    rows = iter_csv_statement(io.BytesIO(statement))
+
+    assert next(rows)[0] == 2
+    with pytest.raises(StatementFormatError, match="line"):
+        next(rows)
@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from flask_backend.utils.sync_jobs import KeyClaimedError, SyncJobQueue
+
+
+def test_coalesced_job_is_readable_by_scope_members():
+    queue = SyncJobQueue(max_workers=1)
+    app = Flask(__name__)
+    release = threading.Event()
+
+    # Queued by a webhook, then returned to a user syncing the same item
+    job = queue.submit(app, "item-1", None, lambda job: release.wait(5), scope_id=7)
+    coalesced = queue.submit(app, "item-1", 42, lambda job: None, scope_id=7)
+    release.set()
+
+    assert coalesced is job
+    assert queue.can_read(job, 42, {7, 8})
+    assert not queue.can_read(job, 42, {8})
+
+
+def test_claimed_keys_block_new_jobs_until_released():
+    queue = SyncJobQueue(max_workers=1)
+    app = Flask(__name__)
+    release = threading.Event()
+    running = queue.submit(app, "item-1", 42, lambda job: release.wait(5))
+    holder = object()
+
+    # Keys with an active job aren't claimed; the rest are, atomically
+    assert queue.claim(["item-1", "item-2", "item-3"], holder) == ["item-2", "item-3"]
+    assert queue.claim(["item-2"], object()) == []
+    with pytest.raises(KeyClaimedError):
+        queue.submit(app, "item-2", 42, lambda job: None)
+    assert queue.submit(app, "item-1", 42, lambda job: None) is running
+
+    queue.release(holder)
+    release.set()
+    assert not queue.is_active("item-2")
+    queue.submit(app, "item-2", 42, lambda job: None)
@@ -0,0 +1,162 @@
+"""
+Aggregate queries used by the dashboard endpoints.
+
+The database does the summing, so only one row per
+(category, scope, year, month) crosses the wire instead of every expense.
+Whole calendar months are read from the monthly_category_totals rollup;
+only partial months at the edges of a date range touch the expenses table.
+"""
+
+import calendar
+from datetime import timedelta
+
+from sqlalchemy import select, func, and_
+
+from flask_backend.database.tables import (
+    expenses_table,
+    monthly_category_totals_table,
+)
+
+
+def _full_month_range(start_date, end_date):
+    """
+    Return the first and last day of the whole calendar months inside
+    [start_date, end_date], or None if the range covers no whole month.
+    """
+    first = start_date
+    if first.day != 1:
+        first = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    last = end_date
+    if last.day != calendar.monthrange(last.year, last.month)[1]:
+        last = last.replace(day=1) - timedelta(days=1)
+
+    if first > last:
+        return None
+    return first, last
+
+
+def get_monthly_category_totals(connection, scope_ids, start_date, end_date):
+    """
+    Sum non-income spending per category, scope and calendar month.
+
+    Args:
+        connection (Connection): An open SQLAlchemy Core connection
+        scope_ids (list): Scope IDs to include
+        start_date (date): First ExpenseDate to include
+        end_date (date): Last ExpenseDate to include
+
+    Returns:
+        list: Rows with ExpenseCategory, ScopeID, Year, Month and Total
+    """
+    if not scope_ids:
+        return []
+
+    full_months = _full_month_range(start_date, end_date)
+    if full_months is None:
+        return _sum_expenses(connection, scope_ids, start_date, end_date)
+
+    first, last = full_months
+    totals = _read_rollup(connection, scope_ids, first, last)
+    if start_date < first:
+        totals += _sum_expenses(
+            connection, scope_ids, start_date, first - timedelta(days=1)
+        )
+    if last < end_date:
+        totals += _sum_expenses(
+            connection, scope_ids, last + timedelta(days=1), end_date
+        )
+    return totals
+
+
+def _read_rollup(connection, scope_ids, first, last):
+    table = monthly_category_totals_table
+    month_key = table.c.Year * 100 + table.c.Month
+
+    query = (
+        select(
+            table.c.ExpenseCategory,
+            table.c.ScopeID,
+            table.c.Year,
+            table.c.Month,
+            table.c.Total,
+        )
+        .where(
+            and_(
+                table.c.ScopeID.in_(scope_ids),
+                month_key >= first.year * 100 + first.month,
+                month_key <= last.year * 100 + last.month,
+                table.c.IsIncome != True,  # Exclude income
+                table.c.ExpenseCount > 0,
+            )
+        )
+    )
+
+    return connection.execute(query).fetchall()
+
+
+def _sum_expenses(connection, scope_ids, start_date, end_date):
+    year_expr = func.year(expenses_table.c.ExpenseDate)
+    month_expr = func.month(expenses_table.c.ExpenseDate)
+
+    query = (
+        select(
+            expenses_table.c.ExpenseCategory,
+            expenses_table.c.ScopeID,
+            year_expr.label("Year"),
+            month_expr.label("Month"),
+            func.sum(expenses_table.c.Amount).label("Total"),
+        )
+        .where(
+            and_(
+                expenses_table.c.ScopeID.in_(scope_ids),
+                expenses_table.c.ExpenseDate >= start_date,
+                expenses_table.c.ExpenseDate <= end_date,
+                expenses_table.c.IsIncome != True,  # Exclude income
+            )
+        )
+        .group_by(
+            expenses_table.c.ExpenseCategory,
+            expenses_table.c.ScopeID,
+            year_expr,
+            month_expr,
+        )
+    )
+
+    return connection.execute(query).fetchall()
+
+
+def sum_by_category(monthly_totals):
+    """
+    Collapse monthly totals into {category: total}, skipping NULL categories.
+    """
+    category_totals = {}
+    for row in monthly_totals:
+        if row.ExpenseCategory is None:
+            continue
+        category_totals[row.ExpenseCategory] = (
+            category_totals.get(row.ExpenseCategory, 0) + row.Total
+        )
+    return category_totals
+
+
+def sum_by_category_and_scope(monthly_totals):
+    """
+    Collapse monthly totals into {(category, scope_id): total}.
+    """
+    totals = {}
+    for row in monthly_totals:
+        key = (row.ExpenseCategory, row.ScopeID)
+        totals[key] = totals.get(key, 0) + row.Total
+    return totals
+
+
+def sum_by_month(monthly_totals):
+    """
+    Collapse monthly totals into {(year, month): total}.
+    """
+    totals = {}
+    for row in monthly_totals:
+        key = (row.Year, row.Month)
+        totals[key] = totals.get(key, 0) + row.Total
+    return totals
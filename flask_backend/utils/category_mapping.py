@@ -2,6 +2,11 @@
 Maps Plaid Personal Finance Categories to app expense categories.
 """
 
+import re
+from functools import lru_cache
+
+DEFAULT_CATEGORY = "Miscellaneous"
+
 # Map Plaid's Personal Finance Categories (primary) to our app categories
 PLAID_TO_APP_CATEGORY_MAP = {
     # Food & Drink
@@ -107,7 +112,7 @@ def get_app_category_from_plaid(plaid_category, merchant_name=None):
             return PLAID_TO_APP_CATEGORY_MAP[primary_category]
     
     # If no mapping is found, return a default category
-    return "Miscellaneous"
+    return DEFAULT_CATEGORY
 
 
 # Certain merchants we can categorize directly regardless of Plaid category
@@ -120,6 +125,58 @@ MERCHANT_TO_CATEGORY_MAP = {
     "AIRBNB": "Hotel and Lodging",
 }
 
+# Every merchant key in one alternation, compiled once, so a merchant name is
+# scanned a single time rather than once per key
+_MERCHANT_PATTERN = re.compile(
+    "|".join(re.escape(key) for key in MERCHANT_TO_CATEGORY_MAP)
+)
+
+
+@lru_cache(maxsize=4096)
+def get_merchant_category(merchant_name):
+    """
+    Return the category of a merchant listed in MERCHANT_TO_CATEGORY_MAP.
+
+    Args:
+        merchant_name (str): Merchant name or transaction description
+
+    Returns:
+        str: The merchant's category, or None if it isn't listed
+    """
+    if not merchant_name:
+        return None
+    merchant_upper = merchant_name.upper()
+    if not _MERCHANT_PATTERN.search(merchant_upper):
+        return None
+    # Several keys can match one name; the first listed wins
+    for key, category in MERCHANT_TO_CATEGORY_MAP.items():
+        if key in merchant_upper:
+            return category
+    return None
+
+
+@lru_cache(maxsize=1024)
+def get_category_for_plaid_categories(detailed, primary):
+    """
+    Map a (detailed, primary) personal finance category pair to an app category.
+
+    The detailed category is used when present, otherwise the primary one,
+    each through get_app_category_from_plaid.
+
+    Args:
+        detailed (str): personal_finance_category.detailed, or None
+        primary (str): personal_finance_category.primary, or None
+
+    Returns:
+        str: The mapped application category
+    """
+    if detailed:
+        return get_app_category_from_plaid(detailed)
+    if primary:
+        return get_app_category_from_plaid(primary)
+    return DEFAULT_CATEGORY
+
+
 def get_category_for_transaction(transaction):
     """
     Determine the best category for a transaction based on Plaid data
@@ -132,31 +189,29 @@ def get_category_for_transaction(transaction):
     """
     # Check if we have merchant-specific mapping
     merchant_name = transaction.get("merchant_name") or transaction.get("name", "")
-    if merchant_name:
-        merchant_upper = merchant_name.upper()
-        for key, category in MERCHANT_TO_CATEGORY_MAP.items():
-            if key in merchant_upper:
-                return category
-    
+    merchant_category = get_merchant_category(merchant_name)
+    if merchant_category:
+        return merchant_category
+
     # Try to use Plaid's personal finance categories (most reliable)
-    plaid_pfc = transaction.get("personal_finance_category", {})
-    if plaid_pfc:
-        # Try detailed category first, then primary
-        detailed = plaid_pfc.get("detailed")
-        primary = plaid_pfc.get("primary")
-        
-        if detailed:
-            app_category = get_app_category_from_plaid(detailed, merchant_name)
-            if app_category:
-                return app_category
-                
-        if primary:
-            app_category = get_app_category_from_plaid(primary, merchant_name)
-            if app_category:
-                return app_category
-    
-    # Fallback to a default category
-    return "Miscellaneous" 
+    plaid_pfc = transaction.get("personal_finance_category") or {}
+    return get_category_for_plaid_categories(
+        plaid_pfc.get("detailed"), plaid_pfc.get("primary")
+    )
+
+
+def categorize_transactions(transactions):
+    """
+    Categorize a page of Plaid transactions.
+
+    Args:
+        transactions (list): Plaid transaction dicts
+
+    Returns:
+        list: The category of each transaction, in order
+    """
+    return [get_category_for_transaction(transaction) for transaction in transactions]
+
 
 def is_income_category(category):
     """
@@ -0,0 +1,124 @@
+"""
+Content fingerprints of manual and imported expenses.
+
+Plaid transactions carry their own natural key (PlaidAccountID,
+PlaidTransactionID); every other expense gets a Fingerprint, a hash of its
+date, amount and normalized merchant name. Together with ScopeID it is
+indexed (IX_expenses_ScopeID_Fingerprint), so checking whether an expense is
+already stored is an index seek rather than a scan of the scope.
+"""
+
+import hashlib
+import re
+from collections import Counter
+
+from sqlalchemy import and_, bindparam, select
+
+from flask_backend.database.tables import expenses_table
+
+# Expenses that are fingerprinted: everything without a Plaid natural key
+FINGERPRINTED = expenses_table.c.PlaidTransactionID.is_(None)
+
+# Fingerprints per lookup query, well under SQL Server's 2,100 parameters
+FINGERPRINTS_PER_QUERY = 500
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_merchant(name):
+    """Uppercase and collapse whitespace so merchant names compare reliably."""
+    return _WHITESPACE.sub(" ", name or "").strip().upper()
+
+
+def expense_fingerprint(expense_date, amount, merchant_name):
+    """
+    Return the fingerprint of an expense as 64 hex characters.
+
+    The scope isn't hashed; it leads the index instead, so lookups are
+    always made within one scope.
+
+    Args:
+        expense_date (date): The expense's ExpenseDate
+        amount (float): The expense's Amount, compared to the cent
+        merchant_name (str): The expense's MerchantName
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    content = f"{expense_date.isoformat()}|{round(amount or 0.0, 2):.2f}|{normalize_merchant(merchant_name)}"
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def add_fingerprints(records):
+    """Set the Fingerprint of expenses_table records in place."""
+    for record in records:
+        record["Fingerprint"] = expense_fingerprint(
+            record["ExpenseDate"], record["Amount"], record.get("MerchantName")
+        )
+    return records
+
+
+def count_fingerprints(conn, scope_id, fingerprints):
+    """
+    Count a scope's stored expenses per fingerprint.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        scope_id (int): The scope to look in
+        fingerprints (iterable): Fingerprints to look up
+
+    Returns:
+        Counter: Stored expenses per fingerprint; absent ones count 0
+    """
+    fingerprints = list(set(fingerprints))
+    counts = Counter()
+    for start in range(0, len(fingerprints), FINGERPRINTS_PER_QUERY):
+        counts.update(conn.execute(
+            select(expenses_table.c.Fingerprint).where(and_(
+                expenses_table.c.ScopeID == scope_id,
+                expenses_table.c.Fingerprint.in_(fingerprints[start:start + FINGERPRINTS_PER_QUERY]),
+            ))
+        ).scalars())
+    return counts
+
+
+def refresh_expense_fingerprints(conn, condition, batch_size=1000):
+    """
+    Recompute the fingerprints of the fingerprinted expenses matching a
+    condition, e.g. after their date, amount or merchant was edited.
+
+    The caller commits.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        condition (ColumnElement): WHERE clause selecting the expenses
+        batch_size (int): Rows per UPDATE executemany
+
+    Returns:
+        int: Number of expenses whose fingerprint changed
+    """
+    rows = conn.execute(
+        select(
+            expenses_table.c.ExpenseID,
+            expenses_table.c.ExpenseDate,
+            expenses_table.c.Amount,
+            expenses_table.c.MerchantName,
+            expenses_table.c.Fingerprint,
+        ).where(and_(condition, FINGERPRINTED, expenses_table.c.ExpenseDate.isnot(None)))
+    ).all()
+
+    changes = []
+    for row in rows:
+        fingerprint = expense_fingerprint(row.ExpenseDate, row.Amount, row.MerchantName)
+        if fingerprint != row.Fingerprint:
+            changes.append({"expense_id": row.ExpenseID, "fingerprint": fingerprint})
+
+    stmt = (
+        expenses_table.update()
+        .where(expenses_table.c.ExpenseID == bindparam("expense_id"))
+        .values(Fingerprint=bindparam("fingerprint"))
+    )
+    for start in range(0, len(changes), batch_size):
+        conn.execute(stmt, changes[start:start + batch_size])
+    return len(changes)
+
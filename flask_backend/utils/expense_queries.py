@@ -0,0 +1,289 @@
+"""
+Query builders shared by the expense listing endpoints.
+"""
+
+import base64
+from datetime import date
+
+from sqlalchemy import select, case, and_, or_
+from sqlalchemy.sql import null
+
+from flask_backend.database.tables import (
+    expenses_table,
+    persons_table,
+    scopes_table,
+)
+
+# Page size used by /api/get_expenses when the caller doesn't pass a limit
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+# Rows fetched per round trip when streaming an export
+EXPORT_BATCH_SIZE = 1000
+
+SOURCE_TYPES = ("manual", "plaid")
+
+TRUE_VALUES = ("1", "true", "yes")
+FALSE_VALUES = ("0", "false", "no")
+
+
+def parse_bool_arg(value):
+    """
+    Parse a boolean query string argument.
+
+    Args:
+        value (str): The raw argument value (may be None)
+
+    Returns:
+        bool or None: None if the argument was not provided
+    """
+    if value is None or value == "":
+        return None
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean value: {value}")
+
+
+def parse_expense_filters(args, accessible_scope_ids):
+    """
+    Build the filter dictionary for an expense listing from request arguments.
+
+    Supported arguments: start_date, end_date (YYYY-MM-DD), scope_id,
+    category (repeatable), source_type ('manual' or 'plaid') and is_income.
+
+    Args:
+        args (MultiDict): The request query string arguments
+        accessible_scope_ids (list): Scope IDs the current user can read
+
+    Returns:
+        dict: Normalized filters
+
+    Raises:
+        ValueError: If an argument is malformed or the scope is not accessible
+    """
+    filters = {"scope_ids": list(accessible_scope_ids)}
+
+    for key in ("start_date", "end_date"):
+        raw = args.get(key)
+        if raw:
+            try:
+                filters[key] = date.fromisoformat(raw)
+            except ValueError:
+                raise ValueError(f"{key} must be in YYYY-MM-DD format")
+
+    scope_id = args.get("scope_id")
+    if scope_id:
+        try:
+            scope_id = int(scope_id)
+        except ValueError:
+            raise ValueError("scope_id must be an integer")
+        if scope_id not in accessible_scope_ids:
+            raise ValueError("Invalid or inaccessible scope")
+        filters["scope_ids"] = [scope_id]
+
+    categories = [category for category in args.getlist("category") if category]
+    if categories:
+        filters["categories"] = categories
+
+    source_type = args.get("source_type")
+    if source_type:
+        if source_type not in SOURCE_TYPES:
+            raise ValueError(f"source_type must be one of: {', '.join(SOURCE_TYPES)}")
+        filters["source_type"] = source_type
+
+    is_income = parse_bool_arg(args.get("is_income"))
+    if is_income is not None:
+        filters["is_income"] = is_income
+
+    return filters
+
+
+def build_expenses_query(filters):
+    """
+    Build the SELECT used to list expenses, joined with persons and scopes.
+
+    Args:
+        filters (dict): Filters as returned by parse_expense_filters
+
+    Returns:
+        Select: The query, without ordering or limits
+    """
+    # Create a conditional expression for PersonName
+    person_name_expr = case(
+        (expenses_table.c.PersonID == null(), "Joint"),
+        else_=persons_table.c.PersonName
+    ).label("PersonName")
+
+    conditions = [expenses_table.c.ScopeID.in_(filters["scope_ids"])]
+    if "start_date" in filters:
+        conditions.append(expenses_table.c.ExpenseDate >= filters["start_date"])
+    if "end_date" in filters:
+        conditions.append(expenses_table.c.ExpenseDate <= filters["end_date"])
+    if "categories" in filters:
+        conditions.append(expenses_table.c.ExpenseCategory.in_(filters["categories"]))
+    if "source_type" in filters:
+        conditions.append(expenses_table.c.SourceType == filters["source_type"])
+    if filters.get("is_income") is True:
+        conditions.append(expenses_table.c.IsIncome == True)
+    elif filters.get("is_income") is False:
+        # Legacy rows may have a NULL IsIncome, which counts as an expense
+        conditions.append(
+            or_(expenses_table.c.IsIncome == False, expenses_table.c.IsIncome.is_(None))
+        )
+
+    return (
+        select(
+            expenses_table.c.ExpenseID,
+            expenses_table.c.ExpenseDate,
+            expenses_table.c.Amount,
+            expenses_table.c.ExpenseCategory,
+            expenses_table.c.AdditionalNotes,
+            expenses_table.c.Currency,
+            expenses_table.c.ScopeID,
+            scopes_table.c.ScopeName,
+            scopes_table.c.ScopeType,
+            person_name_expr,
+            # Plaid-related fields
+            expenses_table.c.PlaidAccountID,
+            expenses_table.c.PlaidTransactionID,
+            expenses_table.c.MerchantName,
+            expenses_table.c.SourceType,
+            expenses_table.c.PlaidMerchantName,
+            expenses_table.c.PlaidName,
+            expenses_table.c.PlaidMerchantLogoURL,
+            expenses_table.c.CategoryConfirmed,
+            expenses_table.c.PlaidPersonalFinanceCategoryPrimary,
+            expenses_table.c.IsIncome
+        )
+        .select_from(
+            expenses_table.join(
+                persons_table,
+                expenses_table.c.PersonID == persons_table.c.PersonID,
+                isouter=True,
+            ).join(
+                scopes_table,
+                expenses_table.c.ScopeID == scopes_table.c.ScopeID
+            )
+        )
+        .where(and_(*conditions))
+    )
+
+
+def encode_cursor(expense_date, expense_id):
+    """
+    Encode the keyset position of the last row of a page as an opaque string.
+    """
+    date_part = expense_date.isoformat() if expense_date is not None else ""
+    raw = f"{date_part}|{expense_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        tuple: (ExpenseDate or None, ExpenseID)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        date_part, id_part = raw.split("|", 1)
+        expense_date = date.fromisoformat(date_part) if date_part else None
+        return expense_date, int(id_part)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def apply_keyset(query, cursor=None):
+    """
+    Order a listing query newest first and resume it after the given cursor.
+
+    Rows are ordered by (ExpenseDate DESC, ExpenseID DESC). SQL Server sorts
+    NULL dates last in descending order, so they come after every dated row.
+    """
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        if last_date is None:
+            query = query.where(
+                and_(
+                    expenses_table.c.ExpenseDate.is_(None),
+                    expenses_table.c.ExpenseID < last_id,
+                )
+            )
+        else:
+            query = query.where(
+                or_(
+                    expenses_table.c.ExpenseDate < last_date,
+                    and_(
+                        expenses_table.c.ExpenseDate == last_date,
+                        expenses_table.c.ExpenseID < last_id,
+                    ),
+                    expenses_table.c.ExpenseDate.is_(None),
+                )
+            )
+
+    return query.order_by(
+        expenses_table.c.ExpenseDate.desc(),
+        expenses_table.c.ExpenseID.desc(),
+    )
+
+
+def parse_page_size(raw_limit):
+    """
+    Parse the 'limit' argument, clamped to MAX_PAGE_SIZE.
+    """
+    if not raw_limit:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def iter_expense_rows(engine, query, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield the rows of a listing query from a server-side cursor.
+
+    The connection stays open until the generator is exhausted or closed,
+    and at most batch_size rows are buffered at a time.
+    """
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(query)
+        for row in result:
+            yield row
+
+
+def format_expense_row(row):
+    """
+    Convert a listing row into the dictionary returned by the API, splitting
+    the date and formatting the amount in the expense's currency.
+    """
+    expense_dict = row._asdict()
+
+    # Handle possible None values for ExpenseDate
+    if row.ExpenseDate is not None:
+        expense_dict["Day"] = row.ExpenseDate.day
+        expense_dict["Month"] = row.ExpenseDate.strftime("%B")
+        expense_dict["Year"] = row.ExpenseDate.year
+    else:
+        expense_dict["Day"] = None
+        expense_dict["Month"] = None
+        expense_dict["Year"] = None
+
+    if expense_dict["Currency"] == "USD":
+        expense_dict["Amount"] = "${:,.2f}".format(expense_dict["Amount"])
+    elif expense_dict["Currency"] == "EUR":
+        expense_dict["Amount"] = "€{:,.2f}".format(expense_dict["Amount"])
+
+    return expense_dict
@@ -0,0 +1,198 @@
+"""
+Idempotency-Key support for write endpoints.
+
+A client that retries a request after a timeout can't tell whether the first
+attempt was applied. Sending the same Idempotency-Key header on both makes the
+retry safe: the first request's response is stored in idempotency_keys and
+replayed for any repeat, so the write happens once.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from flask_login import current_user
+from sqlalchemy import and_, select
+from sqlalchemy.exc import IntegrityError
+
+from flask_backend.database.tables import idempotency_keys_table
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_UPLOAD_READ_SIZE = 64 * 1024
+
+# A claim whose request never finished (e.g. the worker died) can be taken
+# over after this long
+STALE_CLAIM_SECONDS = 600
+
+
+def _request_hash():
+    """
+    Hash what identifies the request, to catch a key reused for a different one.
+
+    JSON bodies are hashed whole. For uploads, the form fields, file names
+    and file contents are hashed. Each file is read in chunks and rewound, so
+    the view can still stream it.
+    """
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    if request.files:
+        for name, value in sorted(request.form.items(multi=True)):
+            digest.update(f"{name}={value}\n".encode())
+        for name, upload in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+            digest.update(f"{name}:{upload.filename}\n".encode())
+            for chunk in iter(lambda: upload.stream.read(_UPLOAD_READ_SIZE), b""):
+                digest.update(chunk)
+            upload.stream.seek(0)
+    else:
+        digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _claim(conn, key_values, ttl_seconds):
+    """
+    Claim an idempotency key for this request.
+
+    Returns:
+        Row: The stored row if the key is already taken, or None if this
+            request now holds the claim
+    """
+    keys = idempotency_keys_table.c
+    now = datetime.now()
+    key_condition = and_(
+        keys.AccountID == key_values["AccountID"],
+        keys.Endpoint == key_values["Endpoint"],
+        keys.IdempotencyKey == key_values["IdempotencyKey"],
+    )
+
+    # Drop this account's expired keys, and a stale claim on this one
+    conn.execute(idempotency_keys_table.delete().where(and_(
+        keys.AccountID == key_values["AccountID"],
+        keys.CreateDate < now - timedelta(seconds=ttl_seconds),
+    )))
+    conn.execute(idempotency_keys_table.delete().where(and_(
+        key_condition,
+        keys.StatusCode.is_(None),
+        keys.CreateDate < now - timedelta(seconds=STALE_CLAIM_SECONDS),
+    )))
+
+    try:
+        conn.execute(idempotency_keys_table.insert().values(**key_values, CreateDate=now))
+        conn.commit()
+        return None
+    except IntegrityError:
+        conn.rollback()
+
+    return conn.execute(select(idempotency_keys_table).where(key_condition)).first()
+
+
+def _release(conn, key_values):
+    keys = idempotency_keys_table.c
+    conn.execute(idempotency_keys_table.delete().where(and_(
+        keys.AccountID == key_values["AccountID"],
+        keys.Endpoint == key_values["Endpoint"],
+        keys.IdempotencyKey == key_values["IdempotencyKey"],
+        keys.StatusCode.is_(None),
+    )))
+    conn.commit()
+
+
+def _store(conn, key_values, response):
+    keys = idempotency_keys_table.c
+    conn.execute(
+        idempotency_keys_table.update()
+        .where(and_(
+            keys.AccountID == key_values["AccountID"],
+            keys.Endpoint == key_values["Endpoint"],
+            keys.IdempotencyKey == key_values["IdempotencyKey"],
+        ))
+        .values(StatusCode=response.status_code, ResponseBody=response.get_data(as_text=True))
+    )
+    conn.commit()
+
+
+def _succeeded(response):
+    if response.status_code >= 400:
+        return False
+    body = response.get_json(silent=True)
+    return not (isinstance(body, dict) and body.get("success") is False)
+
+
+def idempotent(f):
+    """
+    Make a login-protected write endpoint safe to retry with an
+    Idempotency-Key header.
+
+    Without the header the endpoint behaves as before. With it:
+        - the first request runs, and a successful response is stored
+        - a repeat with the same key gets the stored response again, with an
+          Idempotent-Replayed: true header, and nothing is written
+        - a repeat while the first is still running gets 409
+        - the same key sent with a different request gets 422
+
+    Failed requests (errors, or a JSON body with "success": false) aren't
+    stored, since they wrote nothing; the key can be retried, e.g. after the
+    client fixes its input. Keys are scoped to the account and endpoint and
+    kept for IDEMPOTENCY_KEY_TTL seconds.
+
+    Apply below login_required_api.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not idempotency_key:
+            return f(*args, **kwargs)
+
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return jsonify({
+                "success": False,
+                "error": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters",
+            }), 400
+
+        key_values = {
+            "AccountID": current_user.id,
+            "Endpoint": request.endpoint,
+            "IdempotencyKey": idempotency_key,
+            "RequestHash": _request_hash(),
+        }
+        engine = current_app.config["ENGINE"]
+
+        with engine.connect() as conn:
+            stored = _claim(conn, key_values, current_app.config.get("IDEMPOTENCY_KEY_TTL", 86400))
+
+        if stored is not None:
+            if stored.RequestHash != key_values["RequestHash"]:
+                return jsonify({
+                    "success": False,
+                    "error": f"This {IDEMPOTENCY_HEADER} was already used for a different request",
+                }), 422
+            if stored.StatusCode is None:
+                return jsonify({
+                    "success": False,
+                    "error": f"A request with this {IDEMPOTENCY_HEADER} is still being processed",
+                }), 409
+            response = current_app.response_class(
+                stored.ResponseBody, status=stored.StatusCode, mimetype="application/json"
+            )
+            response.headers[REPLAYED_HEADER] = "true"
+            return response
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            with engine.connect() as conn:
+                _release(conn, key_values)
+            raise
+
+        with engine.connect() as conn:
+            if _succeeded(response):
+                _store(conn, key_values, response)
+            else:
+                _release(conn, key_values)
+        return response
+
+    return decorated_function
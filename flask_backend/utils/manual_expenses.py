@@ -0,0 +1,124 @@
+"""
+Validation of hand-entered expenses before they are written to the
+expenses table.
+"""
+
+from datetime import date, datetime
+
+from flask_backend.utils.category_mapping import is_income_category
+from flask_backend.utils.expense_fingerprints import expense_fingerprint
+from flask_backend.utils.plaid_ingestion import MONTH_NAMES
+
+MONTH_NUMBERS = {name: number for number, name in enumerate(MONTH_NAMES) if name}
+
+MIN_YEAR = 2000
+MAX_YEAR = 2050
+
+
+class ExpenseValidationError(ValueError):
+    """Raised when a submitted expense can't be recorded."""
+
+
+def parse_amount(amount):
+    """Parse an amount such as 1200, "1,200.50" or "-15"."""
+    try:
+        return float(str(amount).replace(",", ""))
+    except ValueError:
+        raise ExpenseValidationError(f"Invalid amount: {amount}") from None
+
+
+def build_manual_expense_record(expense, accessible_scope_ids, currency=None, today=None):
+    """
+    Validate one submitted expense and map it to expenses_table column values.
+
+    Args:
+        expense (dict): scope, day, month (name), year, amount, category and
+            optionally merchant and notes, as sent by the expense form
+        accessible_scope_ids (set): Scopes the user may write to
+        currency (str, optional): The user's currency
+        today (date, optional): CreateDate/LastUpdated value
+
+    Returns:
+        dict: Column values for expenses_table
+
+    Raises:
+        ExpenseValidationError: With a message suitable for the user
+    """
+    scope = expense.get("scope")
+    day = expense.get("day")
+    month = expense.get("month")
+    year = expense.get("year")
+    amount = expense.get("amount")
+    category = expense.get("category")
+
+    if not all([scope, day, month, year, amount, category]):
+        raise ExpenseValidationError("Missing required fields in the expense data")
+
+    if scope not in accessible_scope_ids:
+        raise ExpenseValidationError("Invalid or inaccessible scope")
+
+    try:
+        day = int(day)
+        year = int(year)
+    except (TypeError, ValueError):
+        raise ExpenseValidationError("Day and Year must be integers") from None
+    if not (1 <= day <= 31):
+        raise ExpenseValidationError("Day must be between 1 and 31")
+    if not (MIN_YEAR <= year <= MAX_YEAR):
+        raise ExpenseValidationError(f"Year must be between {MIN_YEAR} and {MAX_YEAR}")
+
+    month_number = MONTH_NUMBERS.get(month)
+    if month_number is None:
+        raise ExpenseValidationError("Invalid month selected")
+
+    try:
+        expense_date = date(year, month_number, day)
+    except ValueError:
+        raise ExpenseValidationError(f"Invalid date: {day}-{month}-{year}") from None
+
+    amount = parse_amount(amount)
+    merchant = expense.get("merchant", "")
+    today = today or datetime.now().date()
+    return {
+        "ScopeID": scope,
+        "PersonID": None,
+        "Day": day,
+        "Month": month,
+        "Year": year,
+        "ExpenseDate": expense_date,
+        "Amount": amount,
+        "ExpenseCategory": category,
+        "MerchantName": merchant,
+        "SourceType": "manual",
+        "AdditionalNotes": expense.get("notes"),
+        "Currency": currency,
+        "CreateDate": today,
+        "LastUpdated": today,
+        "CategoryConfirmed": True,  # Manual entries are pre-confirmed by user
+        "IsIncome": is_income_category(category),
+        "Fingerprint": expense_fingerprint(expense_date, amount, merchant),
+    }
+
+
+def build_manual_expense_records(expenses, accessible_scope_ids, currency=None):
+    """
+    Validate a whole batch of submitted expenses.
+
+    Every row is checked, so the caller can report all problems at once
+    rather than stopping at the first.
+
+    Returns:
+        tuple: (records, errors), where errors is a list of
+            {"row": index, "error": message} for the rows that failed
+    """
+    today = datetime.now().date()
+    records = []
+    errors = []
+    for index, expense in enumerate(expenses):
+        try:
+            records.append(
+                build_manual_expense_record(expense, accessible_scope_ids, currency, today)
+            )
+        except ExpenseValidationError as e:
+            errors.append({"row": index, "error": str(e)})
+    return records, errors
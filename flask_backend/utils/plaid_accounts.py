@@ -0,0 +1,114 @@
+"""
+Bookkeeping for the plaid_accounts table, which maps each PlaidAccountID to
+the linked item (plaid_items.ItemID) it belongs to.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select
+
+from flask_backend.database.tables import plaid_accounts_table
+
+
+def _enum_value(value):
+    # Plaid returns AccountType/AccountSubtype model objects, not strings
+    return str(value) if value is not None else None
+
+
+def build_plaid_account_record(account, item_row_id, scope_id):
+    """
+    Map a Plaid account dict to plaid_accounts_table column values.
+
+    Args:
+        account (dict): An account from /accounts/get, /accounts/balance/get
+            or /transactions/sync
+        item_row_id (int): plaid_items.ItemID of the item that owns it
+        scope_id (int): The item's scope
+
+    Returns:
+        dict: Column values for plaid_accounts_table
+    """
+    balances = account.get("balances") or {}
+    now = datetime.now()
+    return {
+        "PlaidAccountID": account.get("account_id"),
+        "ItemID": item_row_id,
+        "ScopeID": scope_id,
+        "Name": account.get("name"),
+        "OfficialName": account.get("official_name"),
+        "Mask": account.get("mask"),
+        "Type": _enum_value(account.get("type")),
+        "Subtype": _enum_value(account.get("subtype")),
+        "CurrentBalance": balances.get("current"),
+        "AvailableBalance": balances.get("available"),
+        "IsoCurrencyCode": balances.get("iso_currency_code"),
+        "BalanceUpdated": now,
+        "CreateDate": now.date(),
+        "LastUpdated": now.date(),
+    }
+
+
+def record_plaid_accounts(conn, item_row_id, scope_id, accounts):
+    """
+    Insert or refresh the accounts of a Plaid item.
+
+    Args:
+        conn (Connection): An open connection; the caller commits
+        item_row_id (int): plaid_items.ItemID of the item
+        scope_id (int): The item's scope
+        accounts (list): Account dicts as returned by Plaid
+
+    Returns:
+        int: Number of accounts recorded
+    """
+    table = plaid_accounts_table
+    records = [
+        build_plaid_account_record(account, item_row_id, scope_id)
+        for account in accounts
+        if account.get("account_id")
+    ]
+    if not records:
+        return 0
+
+    existing = set(conn.execute(
+        select(table.c.PlaidAccountID).where(
+            table.c.PlaidAccountID.in_([record["PlaidAccountID"] for record in records])
+        )
+    ).scalars())
+
+    new_records = [record for record in records if record["PlaidAccountID"] not in existing]
+    if new_records:
+        conn.execute(table.insert(), new_records)
+
+    # An item has a handful of accounts, so refreshing them row by row is fine
+    for record in records:
+        if record["PlaidAccountID"] in existing:
+            values = {key: value for key, value in record.items()
+                      if key not in ("PlaidAccountID", "CreateDate")}
+            conn.execute(
+                table.update()
+                .where(table.c.PlaidAccountID == record["PlaidAccountID"])
+                .values(**values)
+            )
+
+    return len(records)
+
+
+def item_account_ids(item_row_id):
+    """Subquery selecting the PlaidAccountIDs recorded for an item."""
+    return select(plaid_accounts_table.c.PlaidAccountID).where(
+        plaid_accounts_table.c.ItemID == item_row_id
+    )
+
+
+def count_item_accounts(conn, item_row_id):
+    """Return how many accounts are recorded for an item."""
+    return len(conn.execute(item_account_ids(item_row_id)).scalars().all())
+
+
+def forget_item_accounts(conn, item_row_id):
+    """Delete an item's recorded accounts; the caller commits."""
+    result = conn.execute(
+        plaid_accounts_table.delete().where(plaid_accounts_table.c.ItemID == item_row_id)
+    )
+    return result.rowcount
@@ -0,0 +1,177 @@
+"""
+Plaid API client wrapper with connection pooling, timeouts, retries and
+per-endpoint latency counters.
+"""
+
+import json
+import random
+import socket
+import threading
+import time
+
+import plaid
+from plaid.api import plaid_api
+from urllib3.connection import HTTPConnection
+
+# Errors that clear up on their own if the call is repeated later
+RETRYABLE_ERROR_CODES = {"PRODUCT_NOT_READY", "RATE_LIMIT_EXCEEDED"}
+RETRYABLE_ERROR_TYPES = {"RATE_LIMIT_EXCEEDED"}
+
+
+def plaid_error_details(e):
+    """Return (error_type, error_code) from a plaid.ApiException body."""
+    try:
+        body = json.loads(e.body or "{}")
+    except (TypeError, ValueError):
+        return None, None
+    return body.get("error_type"), body.get("error_code")
+
+
+def is_retryable(e):
+    """Return True if a Plaid error is worth retrying after a delay."""
+    if e.status == 429:
+        return True
+    error_type, error_code = plaid_error_details(e)
+    return error_type in RETRYABLE_ERROR_TYPES or error_code in RETRYABLE_ERROR_CODES
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """
+    Seconds to wait before retry number `attempt` (starting at 1).
+
+    Uses "full jitter": a random delay up to an exponentially growing cap,
+    so many workers rate-limited at once don't retry in lockstep.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+class PlaidClient:
+    """
+    Drop-in wrapper around plaid_api.PlaidApi.
+
+    Endpoint methods are called as on PlaidApi (client.transactions_sync(...))
+    with a default request timeout, and are retried with jittered exponential
+    backoff on rate limits and PRODUCT_NOT_READY. Latency, error and retry
+    counts are kept per endpoint.
+    """
+
+    def __init__(self, api, timeout=30, max_retries=4, base_delay=0.5, max_delay=8):
+        self.api = api
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self.api, name)
+        if name.startswith("_") or not callable(method):
+            return method
+
+        def call_endpoint(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+
+        return call_endpoint
+
+    def call(self, endpoint, *args, max_retries=None, base_delay=None, **kwargs):
+        """
+        Call a PlaidApi endpoint by name, retrying transient errors.
+
+        Args:
+            endpoint (str): PlaidApi method name, e.g. "asset_report_get"
+            max_retries (int, optional): Overrides the client's retry budget,
+                e.g. for polling reports that take a while to build
+            base_delay (float, optional): Overrides the first backoff delay
+
+        Returns:
+            The endpoint's response
+        """
+        method = getattr(self.api, endpoint)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        base_delay = self.base_delay if base_delay is None else base_delay
+        kwargs.setdefault("_request_timeout", self.timeout)
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = method(*args, **kwargs)
+            except plaid.ApiException as e:
+                self._record(endpoint, time.perf_counter() - started, error=True)
+                if attempt >= max_retries or not is_retryable(e):
+                    raise
+                attempt += 1
+                self._record_retry(endpoint)
+                time.sleep(backoff_delay(attempt, base_delay, self.max_delay))
+                continue
+            except Exception:
+                self._record(endpoint, time.perf_counter() - started, error=True)
+                raise
+            self._record(endpoint, time.perf_counter() - started)
+            return response
+
+    def _entry(self, endpoint):
+        return self._stats.setdefault(endpoint, {
+            "calls": 0,
+            "errors": 0,
+            "retries": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+        })
+
+    def _record(self, endpoint, seconds, error=False):
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    def _record_retry(self, endpoint):
+        with self._lock:
+            self._entry(endpoint)["retries"] += 1
+
+    def stats(self):
+        """Return {endpoint: counters}, including average latency."""
+        with self._lock:
+            return {
+                endpoint: {
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "retries": entry["retries"],
+                    "avg_ms": round(1000 * entry["total_seconds"] / entry["calls"], 1),
+                    "max_ms": round(1000 * entry["max_seconds"], 1),
+                    "total_seconds": round(entry["total_seconds"], 3),
+                }
+                for endpoint, entry in self._stats.items()
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def build_plaid_client(configuration, pool_size=10, timeout=30, max_retries=4):
+    """
+    Create a PlaidClient whose connections are pooled and kept alive.
+
+    Args:
+        configuration (plaid.Configuration): Host and API keys
+        pool_size (int): Connections kept open to Plaid; should be at least
+            the number of threads calling Plaid at once
+        timeout (float): Per-call request timeout in seconds
+        max_retries (int): Retries for rate-limited or not-ready calls
+
+    Returns:
+        PlaidClient
+    """
+    configuration.connection_pool_maxsize = pool_size
+    # TCP keep-alive so idle pooled connections aren't silently dropped
+    configuration.socket_options = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+    api_client = plaid.ApiClient(configuration)
+    return PlaidClient(
+        plaid_api.PlaidApi(api_client), timeout=timeout, max_retries=max_retries
+    )
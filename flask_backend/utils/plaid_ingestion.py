@@ -0,0 +1,615 @@
+"""
+Set-based helpers for writing Plaid transactions to the expenses table, and
+ingest_plaid_transactions, the pipeline every Plaid write path runs through.
+"""
+
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from dateutil import parser
+from sqlalchemy import MetaData, Table, Column, select, text, and_, case
+
+from flask_backend.database.tables import expenses_table
+from flask_backend.utils.category_mapping import categorize_transactions, is_income_category
+from flask_backend.utils.rollups import (
+    apply_rollup_deltas,
+    collect_rollup_deltas,
+    rollup_deltas_from_records,
+)
+
+# Session-scoped temp tables used to stage incoming batches
+STAGING_TABLE = "#plaid_incoming_keys"
+UPDATES_STAGING_TABLE = "#plaid_updates"
+REMOVED_STAGING_TABLE = "#plaid_removed_ids"
+
+# Columns refreshed when Plaid reports a change to a stored transaction.
+# Category columns are handled separately so user-confirmed categories stick.
+PLAID_UPDATE_COLUMNS = (
+    "Day",
+    "Month",
+    "Year",
+    "ExpenseDate",
+    "ExpenseDayOfWeek",
+    "Amount",
+    "Currency",
+    "PlaidAccountID",
+    "PlaidTransactionID",
+    "PlaidTransactionType",
+    "PlaidCategoryID",
+    "PlaidAuthorizedDate",
+    "PlaidDate",
+    "PlaidAmount",
+    "PlaidCurrencyCode",
+    "PlaidMerchantLogoURL",
+    "PlaidMerchantEntityID",
+    "PlaidMerchantName",
+    "PlaidName",
+    "PlaidPending",
+    "PlaidPendingTransactionID",
+    "PlaidPersonalFinanceCategoryConfidence",
+    "PlaidPersonalFinanceCategoryDetailed",
+    "PlaidPersonalFinanceCategoryPrimary",
+    "PlaidPersonalFinanceCategoryIconURL",
+)
+
+# Rows per INSERT/commit when no batch size is configured
+DEFAULT_INSERT_BATCH_SIZE = 1000
+
+
+def plaid_transaction_key(txn):
+    """Return the (account_id, transaction_id) natural key of a transaction."""
+    return (txn.get("account_id"), txn.get("transaction_id"))
+
+
+# Month and weekday names as strftime("%B") / strftime("%A") spell them,
+# indexed by date.month and date.weekday()
+MONTH_NAMES = ("",) + tuple(date(2000, month, 1).strftime("%B") for month in range(1, 13))
+WEEKDAY_NAMES = tuple(date(2000, 1, 3 + offset).strftime("%A") for offset in range(7))
+
+
+def parse_plaid_date(value):
+    """
+    Return a Plaid date field as a date.
+
+    The Plaid client already returns date objects, and JSON payloads carry
+    ISO YYYY-MM-DD strings, so dateutil is only a fallback for anything else.
+
+    Returns:
+        date: The parsed date, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return parser.parse(value).date()
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def build_plaid_expense_records(transactions, scope_id, categories=None):
+    """
+    Map a page of Plaid transaction dicts to expenses_table column values.
+
+    Args:
+        transactions (list): Transactions from /transactions/sync
+        scope_id (int): The scope the transactions are recorded in
+        categories (list, optional): Precomputed category of each
+            transaction; computed with categorize_transactions if omitted
+
+    Returns:
+        list: Dicts of column values for expenses_table, in order
+    """
+    if categories is None:
+        categories = categorize_transactions(transactions)
+
+    # Default to today's date if no date is provided
+    today = datetime.now().date()
+    records = []
+
+    for txn, category in zip(transactions, categories):
+        plaid_date = parse_plaid_date(txn.get("date"))
+        expense_date = plaid_date or today
+        amount = txn.get("amount")
+        currency = txn.get("iso_currency_code")
+        pfc = txn.get("personal_finance_category") or {}
+
+        records.append({
+            "ScopeID": scope_id,
+            "PersonID": None,  # Adjust if tying to a specific user
+            "Day": expense_date.day,
+            "Month": MONTH_NAMES[expense_date.month],  # e.g., "November"
+            "Year": expense_date.year,
+            "ExpenseDate": expense_date,
+            "ExpenseDayOfWeek": WEEKDAY_NAMES[expense_date.weekday()],
+            "Amount": amount,
+            "AdjustedAmount": amount,  # Initially the same as Amount
+            "ExpenseCategory": category,
+            "MerchantName": txn.get("merchant_name"),
+            "SourceType": "plaid",
+            "AdditionalNotes": None,
+            "CreateDate": today,
+            "LastUpdated": today,
+            "Currency": currency,
+            "SuggestedCategory": None,
+            "CategoryConfirmed": False,
+            "IsIncome": is_income_category(category),
+
+            # Plaid-specific fields
+            "PlaidAccountID": txn.get("account_id"),
+            "PlaidTransactionID": txn.get("transaction_id"),
+            "PlaidTransactionType": txn.get("transaction_type"),
+            "PlaidCategoryID": txn.get("category_id"),
+            "PlaidAuthorizedDate": parse_plaid_date(txn.get("authorized_date")),
+            "PlaidDate": plaid_date,
+            "PlaidAmount": amount,
+            "PlaidCurrencyCode": currency,
+            "PlaidMerchantLogoURL": txn.get("logo_url"),
+            "PlaidMerchantEntityID": txn.get("merchant_entity_id"),
+            "PlaidMerchantName": txn.get("merchant_name"),
+            "PlaidName": txn.get("name"),
+            "PlaidPending": txn.get("pending"),
+            "PlaidPendingTransactionID": txn.get("pending_transaction_id"),
+            "PlaidPersonalFinanceCategoryConfidence": pfc.get("confidence_level"),
+            "PlaidPersonalFinanceCategoryDetailed": pfc.get("detailed"),
+            "PlaidPersonalFinanceCategoryPrimary": pfc.get("primary"),
+            "PlaidPersonalFinanceCategoryIconURL": txn.get("personal_finance_category_icon_url"),
+        })
+
+    return records
+
+
+@contextmanager
+def _staging_table(conn, name, columns):
+    """
+    Create a session temp table with the given expenses columns, yield it as
+    a Core Table and drop it afterwards.
+
+    Column types and collations are copied from expenses (SELECT TOP 0 ...
+    INTO), so joins back to expenses can seek on its indexes without
+    implicit conversions. `columns` maps staging column names to the
+    expenses column they mirror.
+    """
+    select_list = ", ".join(
+        f"[{source}] AS [{column}]" for column, source in columns.items()
+    )
+    # Pooled connections are reused, so clear out any table left behind by
+    # a request that failed before dropping it.
+    conn.execute(text(f"IF OBJECT_ID('tempdb..{name}') IS NOT NULL DROP TABLE {name}"))
+    conn.execute(text(f"SELECT TOP 0 {select_list} INTO {name} FROM expenses"))
+
+    table = Table(
+        name,
+        MetaData(),
+        *(Column(column, expenses_table.c[source].type)
+          for column, source in columns.items()),
+    )
+    try:
+        yield table
+    finally:
+        conn.execute(text(f"DROP TABLE {name}"))
+
+
+def find_existing_plaid_keys(conn, keys, include_pending=False):
+    """
+    Return the subset of (PlaidAccountID, PlaidTransactionID) pairs that are
+    already stored in the expenses table.
+
+    The incoming keys are bulk-loaded into a temp table and matched with a
+    single join, so the statement size doesn't grow with the batch (unlike
+    one OR'ed condition per key, which hits SQL Server's 2,100 parameter
+    limit) and only the key columns come back.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        keys (iterable): (account_id, transaction_id) pairs; pairs with a
+            missing ID are ignored
+        include_pending (bool): Also count a pair as stored when it is the
+            pending transaction a stored posted row replaced
+
+    Returns:
+        set: The pairs that already exist
+    """
+    unique_keys = {key for key in keys if key[0] and key[1]}
+    if not unique_keys:
+        return set()
+
+    columns = {
+        "PlaidAccountID": "PlaidAccountID",
+        "PlaidTransactionID": "PlaidTransactionID",
+    }
+    with _staging_table(conn, STAGING_TABLE, columns) as staged:
+        conn.execute(
+            staged.insert(),
+            [
+                {"PlaidAccountID": account_id, "PlaidTransactionID": transaction_id}
+                for account_id, transaction_id in unique_keys
+            ],
+        )
+        query = (
+            select(staged.c.PlaidAccountID, staged.c.PlaidTransactionID)
+            .join(
+                expenses_table,
+                and_(
+                    expenses_table.c.PlaidAccountID == staged.c.PlaidAccountID,
+                    expenses_table.c.PlaidTransactionID == staged.c.PlaidTransactionID,
+                ),
+            )
+        )
+        if include_pending:
+            query = query.union(
+                select(staged.c.PlaidAccountID, staged.c.PlaidTransactionID)
+                .join(
+                    expenses_table,
+                    and_(
+                        expenses_table.c.PlaidAccountID == staged.c.PlaidAccountID,
+                        expenses_table.c.PlaidPendingTransactionID == staged.c.PlaidTransactionID,
+                    ),
+                )
+            )
+        existing_rows = conn.execute(query).fetchall()
+
+    return {(row.PlaidAccountID, row.PlaidTransactionID) for row in existing_rows}
+
+
+def insert_expenses_in_batches(conn, records, batch_size=DEFAULT_INSERT_BATCH_SIZE,
+                               on_batch=None):
+    """
+    Insert expense records in bounded batches, committing after each one.
+
+    Each batch is a single executemany, which the engine sends as one
+    parameter array when pyodbc's fast_executemany is enabled. Committing
+    per batch keeps large initial syncs from holding one long transaction
+    (and its locks) open on the expenses table.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        records (list): Dicts of expenses_table column values
+        batch_size (int): Maximum rows per INSERT and commit
+        on_batch (callable): Optional on_batch(conn, batch) hook run before
+            each commit, e.g. to update rollups in the same transaction
+
+    Returns:
+        dict: rows, batches, seconds and rows_per_second
+    """
+    batch_size = max(1, int(batch_size or DEFAULT_INSERT_BATCH_SIZE))
+    started = time.perf_counter()
+    batches = 0
+
+    for offset in range(0, len(records), batch_size):
+        batch = records[offset:offset + batch_size]
+        conn.execute(expenses_table.insert(), batch)
+        if on_batch is not None:
+            on_batch(conn, batch)
+        conn.commit()
+        batches += 1
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": len(records),
+        "batches": batches,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(len(records) / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def delete_expenses_in_batches(conn, condition, batch_size=DEFAULT_INSERT_BATCH_SIZE,
+                               on_batch=None):
+    """
+    Delete the expenses matching a condition in bounded chunks, committing
+    after each one.
+
+    Each chunk deletes at most batch_size rows by ExpenseID and moves the
+    monthly rollup with them, so a large delete never holds locks on (or
+    escalates to) the whole expenses table for long.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        condition (ColumnElement): WHERE clause selecting the expenses
+        batch_size (int): Maximum rows per DELETE and commit
+        on_batch (callable): Optional on_batch(deleted_so_far) hook run
+            after each commit, e.g. to report progress
+
+    Returns:
+        int: Number of expenses deleted
+    """
+    batch_size = max(1, int(batch_size or DEFAULT_INSERT_BATCH_SIZE))
+    deleted = 0
+
+    while True:
+        expense_ids = conn.execute(
+            select(expenses_table.c.ExpenseID).where(condition).limit(batch_size)
+        ).scalars().all()
+        if not expense_ids:
+            break
+
+        chunk = expenses_table.c.ExpenseID.in_(expense_ids)
+        deltas = collect_rollup_deltas(conn, chunk, sign=-1)
+        deleted += conn.execute(expenses_table.delete().where(chunk)).rowcount
+        apply_rollup_deltas(conn, deltas)
+        conn.commit()
+
+        if on_batch is not None:
+            on_batch(deleted)
+
+    return deleted
+
+
+def update_plaid_transactions(conn, scope_id, records_by_match_id):
+    """
+    Overwrite stored Plaid transactions with fresh values in one UPDATE.
+
+    Each record replaces the row in the scope whose PlaidTransactionID is
+    its match ID. For a modified transaction that is its own ID; for a
+    posted transaction it is the pending transaction it replaces, so the
+    pending row (and any notes or category the user gave it) becomes the
+    posted one instead of being duplicated. AdjustedAmount follows Amount
+    unless the user changed it, and the category is only re-derived while
+    the user hasn't confirmed it. Rollup totals move with the rows.
+
+    Args:
+        conn (Connection): An open connection; the caller commits
+        scope_id (int): Scope whose rows may be updated
+        records_by_match_id (dict): {PlaidTransactionID to replace: record}
+
+    Returns:
+        set: The match IDs that were found and updated
+    """
+    if not records_by_match_id:
+        return set()
+
+    columns = {"MatchTransactionID": "PlaidTransactionID"}
+    columns.update({column: column for column in PLAID_UPDATE_COLUMNS})
+    columns.update({"ExpenseCategory": "ExpenseCategory", "IsIncome": "IsIncome"})
+
+    with _staging_table(conn, UPDATES_STAGING_TABLE, columns) as staged:
+        conn.execute(
+            staged.insert(),
+            [
+                dict(
+                    {column: record.get(column) for column in columns},
+                    MatchTransactionID=match_id,
+                )
+                for match_id, record in records_by_match_id.items()
+            ],
+        )
+
+        matched_ids = set(conn.execute(
+            select(staged.c.MatchTransactionID)
+            .join(
+                expenses_table,
+                expenses_table.c.PlaidTransactionID == staged.c.MatchTransactionID,
+            )
+            .where(expenses_table.c.ScopeID == scope_id)
+        ).scalars())
+        if not matched_ids:
+            return set()
+
+        scope_condition = expenses_table.c.ScopeID == scope_id
+        deltas = collect_rollup_deltas(
+            conn,
+            and_(
+                scope_condition,
+                expenses_table.c.PlaidTransactionID.in_(
+                    select(staged.c.MatchTransactionID)
+                ),
+            ),
+            sign=-1,
+        )
+
+        category_confirmed = expenses_table.c.CategoryConfirmed == True
+        values = {column: staged.c[column] for column in PLAID_UPDATE_COLUMNS}
+        values.update({
+            "AdjustedAmount": case(
+                (expenses_table.c.AdjustedAmount == expenses_table.c.Amount,
+                 staged.c.Amount),
+                else_=expenses_table.c.AdjustedAmount,
+            ),
+            "ExpenseCategory": case(
+                (category_confirmed, expenses_table.c.ExpenseCategory),
+                else_=staged.c.ExpenseCategory,
+            ),
+            "IsIncome": case(
+                (category_confirmed, expenses_table.c.IsIncome),
+                else_=staged.c.IsIncome,
+            ),
+            "LastUpdated": datetime.now().date(),
+        })
+        conn.execute(
+            expenses_table.update()
+            .where(
+                scope_condition,
+                expenses_table.c.PlaidTransactionID == staged.c.MatchTransactionID,
+            )
+            .values(values)
+        )
+
+        collect_rollup_deltas(
+            conn,
+            and_(
+                scope_condition,
+                expenses_table.c.PlaidTransactionID.in_(
+                    select(staged.c.PlaidTransactionID)
+                ),
+            ),
+            sign=1,
+            deltas=deltas,
+        )
+        apply_rollup_deltas(conn, deltas)
+
+    return matched_ids
+
+
+def delete_plaid_transactions(conn, scope_id, transaction_ids):
+    """
+    Delete the scope's expenses for the given Plaid transaction IDs in one
+    statement, keeping the monthly rollup in step.
+
+    Args:
+        conn (Connection): An open connection; the caller commits
+        scope_id (int): Scope whose rows may be deleted
+        transaction_ids (iterable): PlaidTransactionIDs reported as removed
+
+    Returns:
+        int: Number of expenses deleted
+    """
+    unique_ids = {transaction_id for transaction_id in transaction_ids if transaction_id}
+    if not unique_ids:
+        return 0
+
+    columns = {"PlaidTransactionID": "PlaidTransactionID"}
+    with _staging_table(conn, REMOVED_STAGING_TABLE, columns) as staged:
+        conn.execute(
+            staged.insert(),
+            [{"PlaidTransactionID": transaction_id} for transaction_id in unique_ids],
+        )
+        condition = and_(
+            expenses_table.c.ScopeID == scope_id,
+            expenses_table.c.PlaidTransactionID.in_(select(staged.c.PlaidTransactionID)),
+        )
+        deltas = collect_rollup_deltas(conn, condition, sign=-1)
+        result = conn.execute(expenses_table.delete().where(condition))
+        apply_rollup_deltas(conn, deltas)
+
+    return result.rowcount
+
+
+# Stages of ingest_plaid_transactions, in the order they run
+INGESTION_STAGES = ("dedupe", "classify", "normalize", "write")
+
+
+def ingest_plaid_transactions(conn, scope_id, added, modified=None, removed=None,
+                              batch_size=DEFAULT_INSERT_BATCH_SIZE, on_stage=None):
+    """
+    Apply a page of Plaid transaction changes to a scope's expenses.
+
+    Every Plaid write path goes through here, in four stages:
+
+    - dedupe: drop added transactions that are already stored (as
+      themselves, or as the pending version of a stored posted row) or
+      repeated in the page, so nothing below is spent on them
+    - classify: categorize the remaining added and modified transactions
+    - normalize: build expenses_table records from them
+    - write: a posted transaction whose pending version is stored takes
+      over that row; modified transactions are upserted by
+      PlaidTransactionID; removed ones are deleted; the rest is inserted in
+      committed batches of batch_size, keeping the rollup in step
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        scope_id (int): The scope the transactions are recorded in
+        added (list): New transactions
+        modified (list, optional): Changed transactions
+        removed (list, optional): Removed transactions (only transaction_id
+            is read)
+        batch_size (int): Maximum rows per INSERT and commit
+        on_stage (callable, optional): on_stage(stage, seconds, rows) called
+            as each stage finishes, e.g. to log or export timings
+
+    Returns:
+        dict: Counts of new, skipped, reconciled, updated and deleted
+            transactions, insert throughput, and per-stage seconds
+    """
+    removed_ids = {txn.get("transaction_id") for txn in removed or []}
+    modified = [
+        txn for txn in modified or []
+        if txn.get("transaction_id") and txn.get("transaction_id") not in removed_ids
+    ]
+    timings = {}
+
+    def finish_stage(stage, started, rows):
+        seconds = time.perf_counter() - started
+        timings[stage] = round(seconds, 4)
+        if on_stage is not None:
+            on_stage(stage, seconds, rows)
+
+    # Stage the incoming (account_id, transaction_id) pairs and find the
+    # ones already stored with a single set-based join. A pending
+    # transaction replayed after its posted version took over the row is
+    # stored too, just under the posted ID.
+    started = time.perf_counter()
+    existing_keys = find_existing_plaid_keys(
+        conn, [plaid_transaction_key(txn) for txn in added], include_pending=True
+    )
+    new_transactions = []
+    for txn in added:
+        key = plaid_transaction_key(txn)
+        if key in existing_keys:
+            continue
+        if all(key):
+            existing_keys.add(key)  # Skip repeats within this page too
+        new_transactions.append(txn)
+    finish_stage("dedupe", started, len(added))
+
+    started = time.perf_counter()
+    transactions = new_transactions + modified
+    categories = categorize_transactions(transactions)
+    finish_stage("classify", started, len(transactions))
+
+    started = time.perf_counter()
+    records = build_plaid_expense_records(transactions, scope_id, categories)
+    new_records = records[:len(new_transactions)]
+    modified_records = {
+        record["PlaidTransactionID"]: record for record in records[len(new_transactions):]
+    }
+    finish_stage("normalize", started, len(records))
+
+    started = time.perf_counter()
+    # Posted transactions replace their stored pending versions in place
+    reconciled = update_plaid_transactions(conn, scope_id, {
+        record["PlaidPendingTransactionID"]: record
+        for record in new_records
+        if record["PlaidPendingTransactionID"]
+    })
+    # Modified transactions overwrite the stored rows with the same ID
+    updated = update_plaid_transactions(conn, scope_id, modified_records)
+    deleted = delete_plaid_transactions(conn, scope_id, removed_ids)
+    conn.commit()
+
+    # Everything that didn't match a stored row is inserted. A modified
+    # transaction can miss because its row is stored in another scope (the
+    # item moved households); the natural key is unique across scopes, so
+    # those are left alone rather than inserted again.
+    values_to_insert = [
+        record for record in new_records
+        if record["PlaidPendingTransactionID"] not in reconciled
+    ]
+    unmatched_modified = [
+        record for transaction_id, record in modified_records.items()
+        if transaction_id not in updated and transaction_id not in reconciled
+    ]
+    stored_elsewhere = find_existing_plaid_keys(
+        conn,
+        [(record["PlaidAccountID"], record["PlaidTransactionID"]) for record in unmatched_modified],
+    )
+    values_to_insert += [
+        record for record in unmatched_modified
+        if (record["PlaidAccountID"], record["PlaidTransactionID"]) not in stored_elsewhere
+    ]
+    insert_stats = insert_expenses_in_batches(
+        conn,
+        values_to_insert,
+        batch_size,
+        on_batch=lambda batch_conn, batch: apply_rollup_deltas(
+            batch_conn, rollup_deltas_from_records(batch)
+        ),
+    )
+    finish_stage("write", started, len(values_to_insert) + len(updated) + deleted)
+
+    return {
+        "new_transactions": len(values_to_insert),
+        "skipped": len(added) - len(new_transactions),
+        "reconciled_pending": len(reconciled),
+        "updated": len(updated),
+        "deleted": deleted,
+        "insert_batches": insert_stats["batches"],
+        "rows_per_second": insert_stats["rows_per_second"],
+        "stage_seconds": timings,
+    }
@@ -0,0 +1,67 @@
+"""
+Verification of Plaid webhook requests.
+
+Plaid signs each webhook with an ES256 JWT in the Plaid-Verification header.
+The JWT's key ID names a public key fetched from
+/webhook_verification_key/get, and its claims carry the SHA-256 of the
+request body and the time it was issued.
+See https://plaid.com/docs/api/webhooks/webhook-verification/
+"""
+
+import hashlib
+import hmac
+import json
+import time
+
+import jwt
+
+# Webhooks older than this are rejected as possible replays
+MAX_WEBHOOK_AGE_SECONDS = 5 * 60
+
+
+class WebhookVerificationError(Exception):
+    """Raised when a webhook's signature or body can't be verified."""
+
+
+def verify_plaid_webhook(body, signed_jwt, get_verification_key):
+    """
+    Check that a webhook body was sent by Plaid and hasn't been altered.
+
+    Args:
+        body (bytes): The raw request body
+        signed_jwt (str): The Plaid-Verification header
+        get_verification_key (callable): get_verification_key(key_id)
+            returning the JWK dict from /webhook_verification_key/get
+
+    Raises:
+        WebhookVerificationError: If the webhook fails any check
+    """
+    if not signed_jwt:
+        raise WebhookVerificationError("Missing Plaid-Verification header")
+
+    try:
+        header = jwt.get_unverified_header(signed_jwt)
+    except jwt.PyJWTError as e:
+        raise WebhookVerificationError(f"Malformed verification token: {e}") from e
+    if header.get("alg") != "ES256":
+        raise WebhookVerificationError("Unexpected signing algorithm")
+    key_id = header.get("kid")
+    if not key_id or not isinstance(key_id, str):
+        raise WebhookVerificationError("Verification token has no key ID")
+
+    key = get_verification_key(key_id)
+    if not key or key.get("expired_at"):
+        raise WebhookVerificationError("Unknown or expired verification key")
+
+    try:
+        public_key = jwt.algorithms.ECAlgorithm.from_jwk(json.dumps(key))
+        claims = jwt.decode(signed_jwt, public_key, algorithms=["ES256"])
+    except jwt.PyJWTError as e:
+        raise WebhookVerificationError(f"Invalid signature: {e}") from e
+
+    if time.time() - claims.get("iat", 0) > MAX_WEBHOOK_AGE_SECONDS:
+        raise WebhookVerificationError("Webhook is too old")
+
+    body_hash = hashlib.sha256(body).hexdigest()
+    if not hmac.compare_digest(body_hash, claims.get("request_body_sha256", "")):
+        raise WebhookVerificationError("Body does not match its signature")
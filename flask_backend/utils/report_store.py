@@ -0,0 +1,69 @@
+"""
+On-disk storage for Plaid reports (asset reports, CRA reports) produced by
+background jobs.
+
+Each report is kept as <report_id>.json plus an optional <report_id>.pdf in
+the reports directory, so a PDF can be streamed with send_file instead of
+being base64-encoded into a JSON response.
+"""
+
+import json
+import os
+import re
+import shutil
+
+from flask_backend.utils.sync_jobs import SyncJobQueue
+
+# Background pollers waiting for Plaid to finish building reports
+report_jobs = SyncJobQueue(max_workers=2, name="plaid-report")
+
+_REPORT_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def report_paths(reports_dir, report_id):
+    """
+    Return the (json_path, pdf_path) of a report.
+
+    Raises:
+        ValueError: If report_id isn't a job ID, so it can't escape reports_dir
+    """
+    if not _REPORT_ID_PATTERN.fullmatch(report_id or ""):
+        raise ValueError("Invalid report ID")
+    base = os.path.join(reports_dir, report_id)
+    return f"{base}.json", f"{base}.pdf"
+
+
+def save_report(reports_dir, report_id, report, pdf=None):
+    """
+    Write a report's JSON and, optionally, its PDF.
+
+    Files are written under a temporary name and renamed into place, and the
+    JSON last, so a report is never seen half-written: once the JSON file
+    exists the whole report is ready.
+
+    Args:
+        reports_dir (str): Directory to store reports in
+        report_id (str): The report's job ID
+        report (dict): Report JSON
+        pdf (file, optional): Readable binary file with the report PDF
+    """
+    os.makedirs(reports_dir, exist_ok=True)
+    json_path, pdf_path = report_paths(reports_dir, report_id)
+
+    if pdf is not None:
+        with open(f"{pdf_path}.tmp", "wb") as out:
+            shutil.copyfileobj(pdf, out)
+        os.replace(f"{pdf_path}.tmp", pdf_path)
+
+    with open(f"{json_path}.tmp", "w", encoding="utf-8") as out:
+        json.dump(report, out, default=str)
+    os.replace(f"{json_path}.tmp", json_path)
+
+
+def load_report(reports_dir, report_id):
+    """Return a stored report's JSON, or None if it isn't ready."""
+    json_path, _ = report_paths(reports_dir, report_id)
+    if not os.path.exists(json_path):
+        return None
+    with open(json_path, encoding="utf-8") as report_file:
+        return json.load(report_file)
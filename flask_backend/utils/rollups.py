@@ -0,0 +1,290 @@
+"""
+Incremental maintenance of the monthly_category_totals rollup table.
+
+Every code path that inserts, updates or deletes expenses collects the
+change as a set of deltas keyed by
+(ScopeID, Year, Month, ExpenseCategory, IsIncome) and applies them on the
+same connection before committing, so the rollup moves together with the
+expenses it summarizes.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select, func, and_, literal
+from sqlalchemy.exc import IntegrityError
+
+from flask_backend.database.tables import (
+    expenses_table,
+    monthly_category_totals_table,
+)
+
+# Tolerance used by the consistency checker when comparing float totals
+TOTAL_TOLERANCE = 0.005
+
+
+def _rollup_key(scope_id, year, month, category, is_income):
+    return (
+        scope_id,
+        year,
+        month,
+        category,
+        None if is_income is None else bool(is_income),
+    )
+
+
+def _add_delta(deltas, key, amount, count):
+    total, existing_count = deltas.get(key, (0, 0))
+    deltas[key] = (total + amount, existing_count + count)
+
+
+def rollup_deltas_from_records(records, deltas=None):
+    """
+    Compute rollup deltas for expense records that are about to be inserted.
+
+    Args:
+        records (list): Insert dictionaries with ScopeID, ExpenseDate,
+            ExpenseCategory, Amount and (optionally) IsIncome
+        deltas (dict, optional): Existing deltas to add to
+
+    Returns:
+        dict: {(ScopeID, Year, Month, ExpenseCategory, IsIncome): (total, count)}
+    """
+    deltas = {} if deltas is None else deltas
+    for record in records:
+        if record.get("ExpenseDate") is None or record.get("Amount") is None:
+            continue
+        key = _rollup_key(
+            record["ScopeID"],
+            record["ExpenseDate"].year,
+            record["ExpenseDate"].month,
+            record.get("ExpenseCategory"),
+            # The IsIncome column defaults to False when it isn't supplied
+            record.get("IsIncome", False),
+        )
+        _add_delta(deltas, key, record["Amount"], 1)
+    return deltas
+
+
+def collect_rollup_deltas(conn, condition, sign=1, deltas=None):
+    """
+    Compute rollup deltas for the expenses currently matching a condition.
+
+    Call with sign=-1 before rows are updated or deleted, and with sign=1
+    after they are updated, to move their totals between rollup buckets.
+
+    Args:
+        conn (Connection): An open connection, inside the write's transaction
+        condition (ColumnElement): WHERE clause selecting the affected expenses
+        sign (int): 1 to add the rows to the rollup, -1 to remove them
+        deltas (dict, optional): Existing deltas to add to
+
+    Returns:
+        dict: {(ScopeID, Year, Month, ExpenseCategory, IsIncome): (total, count)}
+    """
+    deltas = {} if deltas is None else deltas
+    query = _expense_totals_query(condition)
+
+    for row in conn.execute(query):
+        key = _rollup_key(
+            row.ScopeID, row.Year, row.Month, row.ExpenseCategory, row.IsIncome
+        )
+        _add_delta(deltas, key, sign * (row.Total or 0), sign * row.ExpenseCount)
+    return deltas
+
+
+def _key_condition(key):
+    scope_id, year, month, category, is_income = key
+    table = monthly_category_totals_table
+    return and_(
+        table.c.ScopeID == scope_id,
+        table.c.Year == year,
+        table.c.Month == month,
+        table.c.ExpenseCategory.is_(None) if category is None
+        else table.c.ExpenseCategory == category,
+        table.c.IsIncome.is_(None) if is_income is None
+        else table.c.IsIncome == is_income,
+    )
+
+
+def _update_bucket(conn, condition, total, count, today):
+    table = monthly_category_totals_table
+    return conn.execute(
+        table.update()
+        .where(condition)
+        .values(
+            Total=table.c.Total + total,
+            ExpenseCount=table.c.ExpenseCount + count,
+            LastUpdated=today,
+        )
+    ).rowcount
+
+
+def apply_rollup_deltas(conn, deltas):
+    """
+    Apply deltas to the rollup table on the given connection.
+
+    The caller commits, so the rollup change lands in the same transaction
+    as the expense write that produced it. Buckets whose count drops to
+    zero are removed.
+
+    A missing bucket is inserted inside a savepoint. If a concurrent write
+    created it first, the unique key rejects the insert; only the savepoint
+    is rolled back and the delta is added to the other writer's row instead.
+    """
+    table = monthly_category_totals_table
+    today = datetime.now().date()
+
+    for key, (total, count) in deltas.items():
+        if total == 0 and count == 0:
+            continue
+
+        condition = _key_condition(key)
+        if _update_bucket(conn, condition, total, count, today) == 0:
+            if count > 0:
+                scope_id, year, month, category, is_income = key
+                try:
+                    with conn.begin_nested():
+                        conn.execute(
+                            table.insert().values(
+                                ScopeID=scope_id,
+                                Year=year,
+                                Month=month,
+                                ExpenseCategory=category,
+                                IsIncome=is_income,
+                                Total=total,
+                                ExpenseCount=count,
+                                LastUpdated=today,
+                            )
+                        )
+                except IntegrityError:
+                    _update_bucket(conn, condition, total, count, today)
+        elif count < 0:
+            conn.execute(
+                table.delete().where(and_(condition, table.c.ExpenseCount <= 0))
+            )
+
+
+def _expense_totals_query(*conditions):
+    year_expr = func.year(expenses_table.c.ExpenseDate)
+    month_expr = func.month(expenses_table.c.ExpenseDate)
+    conditions = conditions + (expenses_table.c.ExpenseDate.isnot(None),)
+
+    return (
+        select(
+            expenses_table.c.ScopeID,
+            year_expr.label("Year"),
+            month_expr.label("Month"),
+            expenses_table.c.ExpenseCategory,
+            expenses_table.c.IsIncome,
+            func.sum(expenses_table.c.Amount).label("Total"),
+            func.count().label("ExpenseCount"),
+            literal(datetime.now().date()).label("LastUpdated"),
+        )
+        .where(and_(*conditions))
+        .group_by(
+            expenses_table.c.ScopeID,
+            year_expr,
+            month_expr,
+            expenses_table.c.ExpenseCategory,
+            expenses_table.c.IsIncome,
+        )
+    )
+
+
+def _scope_conditions(scope_ids):
+    if scope_ids is None:
+        return ()
+    return (expenses_table.c.ScopeID.in_(scope_ids),)
+
+
+def rebuild_monthly_totals(conn, scope_ids=None):
+    """
+    Recompute the rollup from the expenses table.
+
+    Args:
+        conn (Connection): An open connection; the caller commits
+        scope_ids (list, optional): Only rebuild these scopes
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    table = monthly_category_totals_table
+    delete_stmt = table.delete()
+    if scope_ids is not None:
+        delete_stmt = delete_stmt.where(table.c.ScopeID.in_(scope_ids))
+    conn.execute(delete_stmt)
+
+    insert_stmt = table.insert().from_select(
+        [
+            "ScopeID",
+            "Year",
+            "Month",
+            "ExpenseCategory",
+            "IsIncome",
+            "Total",
+            "ExpenseCount",
+            "LastUpdated",
+        ],
+        _expense_totals_query(*_scope_conditions(scope_ids)),
+    )
+    return conn.execute(insert_stmt).rowcount
+
+
+def find_rollup_mismatches(conn, scope_ids=None):
+    """
+    Compare the rollup against totals computed from the expenses table.
+
+    Returns:
+        list: One dict per bucket whose total or count differs, with the
+            expected (from expenses) and actual (from the rollup) values
+    """
+    table = monthly_category_totals_table
+
+    expected = {}
+    for row in conn.execute(_expense_totals_query(*_scope_conditions(scope_ids))):
+        key = _rollup_key(
+            row.ScopeID, row.Year, row.Month, row.ExpenseCategory, row.IsIncome
+        )
+        expected[key] = (row.Total or 0, row.ExpenseCount)
+
+    rollup_query = select(
+        table.c.ScopeID,
+        table.c.Year,
+        table.c.Month,
+        table.c.ExpenseCategory,
+        table.c.IsIncome,
+        table.c.Total,
+        table.c.ExpenseCount,
+    )
+    if scope_ids is not None:
+        rollup_query = rollup_query.where(table.c.ScopeID.in_(scope_ids))
+
+    actual = {}
+    for row in conn.execute(rollup_query):
+        key = _rollup_key(
+            row.ScopeID, row.Year, row.Month, row.ExpenseCategory, row.IsIncome
+        )
+        actual[key] = (row.Total, row.ExpenseCount)
+
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        expected_total, expected_count = expected.get(key, (0, 0))
+        actual_total, actual_count = actual.get(key, (0, 0))
+        if (
+            expected_count != actual_count
+            or abs(expected_total - actual_total) > TOTAL_TOLERANCE
+        ):
+            scope_id, year, month, category, is_income = key
+            mismatches.append({
+                "scope_id": scope_id,
+                "year": year,
+                "month": month,
+                "category": category,
+                "is_income": is_income,
+                "expected_total": expected_total,
+                "actual_total": actual_total,
+                "expected_count": expected_count,
+                "actual_count": actual_count,
+            })
+    return mismatches
+
@@ -1,10 +1,34 @@
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, g
 from flask_login import login_user, current_user
 from sqlalchemy import update, exc
 from datetime import datetime, timezone
 
-from ..database.models import Account
+from ..database.models import db, Account, ScopeAccess
+from .ttl_cache import TTLCache
+
+# Process-wide cache of accessible scope IDs, keyed by AccountID. Disabled
+# until create_app configures a TTL. Entries are dropped explicitly when
+# scope membership changes in this process; the TTL bounds staleness for
+# changes made by other worker processes.
+scope_cache = TTLCache(maxsize=4096, ttl=0)
+
+# Process-wide cache of Account column values used by the Flask-Login user
+# loader, keyed by AccountID. Configured by create_app.
+account_cache = TTLCache(maxsize=1024, ttl=0)
+
+# Account attributes kept in the cache. The password hash is deliberately
+# left out; code that checks passwords loads the account from the database.
+ACCOUNT_SNAPSHOT_FIELDS = (
+    "id",
+    "account_name",
+    "user_email",
+    "display_name",
+    "currency",
+    "create_date",
+    "last_updated",
+    "last_login_date",
+)
 
 
 def login_and_update_last_login(user, engine):
@@ -21,6 +45,9 @@ def login_and_update_last_login(user, engine):
             )
             connection.execute(stmt)
 
+        # The cached snapshot no longer has the current login date
+        invalidate_account_cache(user.id)
+
         return True
     except exc.SQLAlchemyError as e:
         print("Error occurred during login or update:", e)
@@ -36,3 +63,67 @@ def login_required_api(f):
         return f(*args, **kwargs)
 
     return decorated_function
+
+
+def get_accessible_scope_ids():
+    """
+    Return the IDs of the scopes the current user has accepted access to.
+
+    The result is resolved once per request and kept on flask.g. If the
+    scope cache is enabled (SCOPE_CACHE_TTL_SECONDS), it is also cached
+    across requests.
+    """
+    if "accessible_scope_ids" in g:
+        return g.accessible_scope_ids
+
+    account_id = current_user.id
+    scope_ids = scope_cache.get(account_id) if scope_cache.enabled else None
+
+    if scope_ids is None:
+        scope_query = (
+            db.session.query(ScopeAccess.ScopeID)
+            .filter(
+                ScopeAccess.AccountID == account_id,
+                ScopeAccess.InviteStatus == 'accepted'
+            )
+        )
+        scope_ids = [result[0] for result in scope_query.all()]
+        scope_cache.put(account_id, scope_ids)
+
+    g.accessible_scope_ids = scope_ids
+    return scope_ids
+
+
+def invalidate_scope_cache(*account_ids):
+    """
+    Forget cached scope IDs for the given accounts, including the copy
+    already resolved for the current request.
+    """
+    scope_cache.invalidate(*account_ids)
+    g.pop("accessible_scope_ids", None)
+
+
+def load_cached_account(account_id):
+    """
+    Load an Account for Flask-Login, serving it from the account cache
+    when possible.
+
+    Cache hits return a new, session-less Account built from the cached
+    column values, so requests never share a mutable instance.
+    """
+    snapshot = account_cache.get(account_id) if account_cache.enabled else None
+    if snapshot is not None:
+        return Account(**snapshot)
+
+    account = db.session.get(Account, account_id)
+    if account is not None:
+        account_cache.put(
+            account_id,
+            {field: getattr(account, field) for field in ACCOUNT_SNAPSHOT_FIELDS},
+        )
+    return account
+
+
+def invalidate_account_cache(*account_ids):
+    """Drop cached Account snapshots after the accounts change."""
+    account_cache.invalidate(*account_ids)
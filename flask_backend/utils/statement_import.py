@@ -0,0 +1,465 @@
+"""
+Streaming import of bank statements (CSV, OFX and QFX) into the expenses
+table.
+
+Statements are read a line or chunk at a time and written in bounded
+batches, so memory use doesn't grow with the size of the upload. Amounts
+are stored with Plaid's sign convention (money out is positive), which is
+what the rest of the app expects.
+"""
+
+import csv
+import hashlib
+import io
+import re
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import and_, select
+
+from flask_backend.database.tables import expenses_table
+from flask_backend.utils.category_mapping import (
+    DEFAULT_CATEGORY,
+    get_category_for_transaction,
+    is_income_category,
+)
+from flask_backend.utils.expense_fingerprints import count_fingerprints, expense_fingerprint
+from flask_backend.utils.manual_expenses import parse_amount
+from flask_backend.utils.plaid_ingestion import (
+    DEFAULT_INSERT_BATCH_SIZE,
+    MONTH_NAMES,
+    WEEKDAY_NAMES,
+    insert_expenses_in_batches,
+    parse_plaid_date,
+)
+from flask_backend.utils.rollups import apply_rollup_deltas, rollup_deltas_from_records
+
+STATEMENT_FORMATS = ("csv", "ofx", "qfx")
+
+# Header names recognized in CSV statements, compared case-insensitively
+CSV_COLUMN_ALIASES = {
+    "date": ("date", "transaction date", "posted date", "posting date", "trans. date"),
+    "description": ("description", "payee", "merchant", "name", "details", "memo"),
+    "amount": ("amount", "transaction amount"),
+    "debit": ("debit", "withdrawal", "withdrawals", "money out"),
+    "credit": ("credit", "deposit", "deposits", "money in"),
+}
+
+# Invalid rows listed in the response; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+# OFX 1.x is SGML with unclosed leaf tags, OFX 2.x is XML; both tokenize as
+# <TAG>value or </TAG>
+_OFX_TOKEN = re.compile(r"<(/?)([A-Za-z0-9_.]+)>([^<]*)")
+_OFX_READ_SIZE = 64 * 1024
+
+# Aggregates naming the account a statement's transactions belong to (bank
+# and credit card statements); BANKACCTTO inside a transfer is not one
+_OFX_ACCOUNT_TAGS = ("BANKACCTFROM", "CCACCTFROM")
+
+# Bank transaction IDs per lookup query, well under SQL Server's 2,100 parameters
+_IDS_PER_QUERY = 500
+
+
+class StatementFormatError(ValueError):
+    """Raised when an upload can't be read as the given statement format."""
+
+
+class StatementRowError(ValueError):
+    """Raised for a statement row that can't be imported."""
+
+
+def detect_statement_format(filename, requested=None):
+    """Return "csv", "ofx" or "qfx" from an explicit choice or the file name."""
+    statement_format = requested
+    if not statement_format and filename and "." in filename:
+        statement_format = filename.rsplit(".", 1)[-1]
+    statement_format = (statement_format or "").lower()
+    if statement_format not in STATEMENT_FORMATS:
+        raise StatementFormatError(
+            f"Unsupported statement format; expected one of: {', '.join(STATEMENT_FORMATS)}"
+        )
+    return statement_format
+
+
+def _resolve_csv_columns(header, overrides):
+    lookup = {name.strip().lower(): index for index, name in enumerate(header)}
+    columns = {}
+    for field, aliases in CSV_COLUMN_ALIASES.items():
+        override = overrides.get(field)
+        if override:
+            if override.strip().lower() not in lookup:
+                raise StatementFormatError(f"Column '{override}' not found in the CSV header")
+            columns[field] = lookup[override.strip().lower()]
+            continue
+        for alias in aliases:
+            if alias in lookup:
+                columns[field] = lookup[alias]
+                break
+
+    if "date" not in columns or "description" not in columns:
+        raise StatementFormatError("The CSV needs a date and a description column")
+    if "amount" not in columns and not ("debit" in columns or "credit" in columns):
+        raise StatementFormatError("The CSV needs an amount column, or debit/credit columns")
+    return columns
+
+
+def _cell(row, columns, field):
+    index = columns.get(field)
+    if index is None or index >= len(row):
+        return ""
+    return row[index].strip()
+
+
+def _parse_statement_date(value, date_format=None):
+    if date_format:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            return None
+    return parse_plaid_date(value)
+
+
+def iter_csv_statement(stream, columns=None, negative_is_expense=True, date_format=None):
+    """
+    Yield (line_number, transaction or StatementRowError) for a CSV statement.
+
+    Args:
+        stream (file): Binary file object with the upload
+        columns (dict, optional): Header names overriding the detected
+            date, description, amount, debit and credit columns
+        negative_is_expense (bool): Whether money out appears as a negative
+            amount (most banks) rather than a positive one
+        date_format (str, optional): strptime format for the date column,
+            for banks whose dates are ambiguous (e.g. "%d/%m/%Y")
+
+    Yields:
+        tuple: (line_number, {"date", "amount", "name"}) for each row, or
+            (line_number, StatementRowError) for rows that can't be read
+
+    Raises:
+        StatementFormatError: If the header is unusable or the file isn't
+            valid CSV
+    """
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.reader(text_stream)
+    try:
+        yield from _iter_csv_rows(reader, columns, negative_is_expense, date_format)
+    except csv.Error as e:
+        # e.g. a NUL byte or a field over csv.field_size_limit()
+        raise StatementFormatError(f"Couldn't read the CSV at line {reader.line_num}: {e}") from e
+
+
+def _iter_csv_rows(reader, columns, negative_is_expense, date_format):
+    header = next(reader, None)
+    if not header:
+        raise StatementFormatError("The CSV file is empty")
+    resolved = _resolve_csv_columns(header, columns or {})
+
+    for row in reader:
+        line_number = reader.line_num
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            posted = _parse_statement_date(_cell(row, resolved, "date"), date_format)
+            if posted is None:
+                raise StatementRowError(f"Invalid date: {_cell(row, resolved, 'date')!r}")
+
+            amount_text = _cell(row, resolved, "amount")
+            if amount_text:
+                amount = parse_amount(amount_text.replace("$", ""))
+                # Store money out as positive, as Plaid does
+                amount = -amount if negative_is_expense else amount
+            else:
+                debit = _cell(row, resolved, "debit").replace("$", "")
+                credit = _cell(row, resolved, "credit").replace("$", "")
+                if not debit and not credit:
+                    raise StatementRowError("Missing amount")
+                amount = (abs(parse_amount(debit)) if debit else 0.0) - (
+                    abs(parse_amount(credit)) if credit else 0.0
+                )
+        except ValueError as e:
+            yield line_number, StatementRowError(str(e))
+            continue
+
+        yield line_number, {
+            "date": posted,
+            "amount": amount,
+            "name": _cell(row, resolved, "description"),
+        }
+
+
+def _iter_ofx_tokens(text_stream):
+    buffer = ""
+    while True:
+        chunk = text_stream.read(_OFX_READ_SIZE)
+        buffer += chunk
+        # Hold back a possibly incomplete final token until more is read
+        cut = len(buffer) if not chunk else buffer.rfind("<")
+        for match in _OFX_TOKEN.finditer(buffer, 0, max(cut, 0)):
+            yield match.group(1) == "/", match.group(2).upper(), match.group(3).strip()
+        if not chunk:
+            return
+        buffer = buffer[max(cut, 0):]
+
+
+def _ofx_account_key(account):
+    """
+    Return a digest identifying a statement account, or None if the
+    statement didn't name one.
+
+    Only the digest is stored, so expenses never hold account numbers.
+    """
+    if not account.get("ACCTID"):
+        return None
+    identity = f"{account.get('BANKID', '')}|{account['ACCTID']}"
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def iter_ofx_statement(stream):
+    """
+    Yield (transaction_number, transaction or StatementRowError) for an OFX
+    or QFX statement, reading it in fixed-size chunks.
+
+    Args:
+        stream (file): Binary file object with the upload
+
+    Yields:
+        tuple: (n, {"date", "amount", "name", "fitid", "account"}) for each
+            STMTTRN block, or (n, StatementRowError) for blocks that can't be
+            read. "account" is _ofx_account_key of the statement's
+            BANKACCTFROM/CCACCTFROM, the scope within which the FITID is
+            unique
+    """
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8", errors="replace")
+    current = None
+    account_fields = None
+    account = None
+    count = 0
+    seen_ofx = False
+
+    for closing, tag, value in _iter_ofx_tokens(text_stream):
+        seen_ofx = seen_ofx or tag == "OFX"
+        if tag in _OFX_ACCOUNT_TAGS:
+            if not closing:
+                account_fields = {}
+            elif account_fields is not None:
+                account, account_fields = _ofx_account_key(account_fields), None
+            continue
+        if account_fields is not None:
+            if not closing and value:
+                account_fields[tag] = value
+            continue
+        if tag in ("STMTRS", "CCSTMTRS") and not closing:
+            account = None  # A new statement in the same file
+            continue
+        if tag == "STMTTRN":
+            if not closing:
+                current = {}
+                continue
+            if current is None:
+                continue
+            count += 1
+            transaction, current = current, None
+            try:
+                # DTPOSTED is YYYYMMDD, optionally followed by a time and zone
+                posted = datetime.strptime(transaction.get("DTPOSTED", "")[:8], "%Y%m%d").date()
+                # TRNAMT is negative for money out; store it as positive
+                amount = -parse_amount(transaction.get("TRNAMT", ""))
+            except ValueError as e:
+                yield count, StatementRowError(str(e))
+                continue
+            yield count, {
+                "date": posted,
+                "amount": amount,
+                "name": transaction.get("NAME") or transaction.get("PAYEE") or transaction.get("MEMO", ""),
+                "fitid": transaction.get("FITID"),
+                "account": account,
+            }
+        elif current is not None and not closing and value:
+            current[tag] = value
+
+    if not seen_ofx:
+        raise StatementFormatError("The file doesn't look like an OFX/QFX statement")
+
+
+def build_imported_expense_record(transaction, scope_id, currency=None, today=None):
+    """
+    Map a parsed statement transaction to expenses_table column values.
+
+    Categories come from get_category_for_transaction, like Plaid
+    transactions; money in that matches no merchant is filed as income.
+    """
+    category = get_category_for_transaction({"name": transaction["name"]})
+    if transaction["amount"] < 0 and category == DEFAULT_CATEGORY:
+        category = "Income: General"
+    expense_date = transaction["date"]
+    merchant_name = transaction["name"][:255]
+    today = today or datetime.now().date()
+    return {
+        "ScopeID": scope_id,
+        "PersonID": None,
+        "Day": expense_date.day,
+        "Month": MONTH_NAMES[expense_date.month],
+        "Year": expense_date.year,
+        "ExpenseDate": expense_date,
+        "ExpenseDayOfWeek": WEEKDAY_NAMES[expense_date.weekday()],
+        "Amount": transaction["amount"],
+        "AdjustedAmount": transaction["amount"],
+        "ExpenseCategory": category,
+        "MerchantName": merchant_name,
+        "SourceType": "manual",
+        "AdditionalNotes": None,
+        "Currency": currency,
+        "CreateDate": today,
+        "LastUpdated": today,
+        "CategoryConfirmed": False,
+        "IsIncome": is_income_category(category),
+        "Fingerprint": expense_fingerprint(expense_date, transaction["amount"], merchant_name),
+        "BankTransactionID": transaction.get("fitid"),
+        "BankAccountID": transaction.get("account"),
+    }
+
+
+def _bank_key(record):
+    """Return (BankAccountID, BankTransactionID), or None if either is missing."""
+    if record["BankAccountID"] and record["BankTransactionID"]:
+        return record["BankAccountID"], record["BankTransactionID"]
+    return None
+
+
+def _find_stored_bank_keys(conn, scope_id, bank_keys):
+    """Return which (account, bank transaction ID) pairs the scope already holds."""
+    ids_by_account = {}
+    for account_id, bank_id in bank_keys:
+        ids_by_account.setdefault(account_id, []).append(bank_id)
+
+    stored = set()
+    for account_id, bank_ids in ids_by_account.items():
+        for start in range(0, len(bank_ids), _IDS_PER_QUERY):
+            stored.update(
+                (account_id, bank_id)
+                for bank_id in conn.execute(
+                    select(expenses_table.c.BankTransactionID).where(and_(
+                        expenses_table.c.ScopeID == scope_id,
+                        expenses_table.c.BankAccountID == account_id,
+                        expenses_table.c.BankTransactionID.in_(
+                            bank_ids[start:start + _IDS_PER_QUERY]
+                        ),
+                    ))
+                ).scalars()
+            )
+    return stored
+
+
+def import_statement(conn, stream, statement_format, scope_id, currency=None,
+                     csv_columns=None, negative_is_expense=True, date_format=None,
+                     batch_size=DEFAULT_INSERT_BATCH_SIZE):
+    """
+    Stream a statement into a scope's expenses, skipping rows already stored.
+
+    Rows with a bank transaction ID (OFX/QFX FITID) from a statement that
+    names its account are deduplicated on the two together, since banks
+    only keep FITIDs unique per account: a row is skipped if the scope
+    already holds that pair or the file repeats it. Other rows are
+    deduplicated on their fingerprint (date,
+    amount and normalized description), each looked up once with an index
+    probe. A statement can legitimately list the same purchase twice, so
+    the n-th occurrence of a fingerprint in the file is only inserted if the
+    scope holds fewer than n expenses with it. Importing the same file again
+    therefore adds nothing, and an overlapping statement adds only the new
+    rows.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        stream (file): Binary file object with the upload
+        statement_format (str): "csv", "ofx" or "qfx"
+        scope_id (int): The scope to import into
+        currency (str, optional): Currency of the statement
+        csv_columns (dict, optional): CSV header overrides, see
+            iter_csv_statement
+        negative_is_expense (bool): CSV sign convention, see
+            iter_csv_statement
+        date_format (str, optional): CSV date format, see iter_csv_statement
+        batch_size (int): Rows per INSERT and commit
+
+    Returns:
+        dict: imported, duplicates, invalid, errors (the first few invalid
+            rows), seconds and rows_per_second
+
+    Raises:
+        StatementFormatError: If the file can't be read in that format
+    """
+    if statement_format == "csv":
+        rows = iter_csv_statement(stream, csv_columns, negative_is_expense, date_format)
+    else:
+        rows = iter_ofx_statement(stream)
+
+    batch_size = max(1, int(batch_size or DEFAULT_INSERT_BATCH_SIZE))
+    started = time.perf_counter()
+    today = datetime.now().date()
+    occurrences = Counter()
+    # Stored counts per fingerprint, looked up before anything with that
+    # fingerprint is inserted, so they reflect the scope before the import
+    existing = Counter()
+    summary = {"imported": 0, "duplicates": 0, "invalid": 0, "errors": []}
+
+    # (account, bank transaction ID) pairs stored before or during this import
+    seen_bank_keys = set()
+
+    def write(batch):
+        unchecked = {
+            record["Fingerprint"] for record in batch if not _bank_key(record)
+        } - occurrences.keys()
+        if unchecked:
+            existing.update(count_fingerprints(conn, scope_id, unchecked))
+        bank_keys = {_bank_key(record) for record in batch} - seen_bank_keys - {None}
+        if bank_keys:
+            seen_bank_keys.update(_find_stored_bank_keys(conn, scope_id, bank_keys))
+
+        new_records = []
+        for record in batch:
+            bank_key = _bank_key(record)
+            if bank_key:
+                if bank_key in seen_bank_keys:
+                    summary["duplicates"] += 1
+                else:
+                    seen_bank_keys.add(bank_key)
+                    new_records.append(record)
+                continue
+            fingerprint = record["Fingerprint"]
+            occurrences[fingerprint] += 1
+            if occurrences[fingerprint] > existing[fingerprint]:
+                new_records.append(record)
+            else:
+                summary["duplicates"] += 1
+        insert_expenses_in_batches(
+            conn,
+            new_records,
+            batch_size,
+            on_batch=lambda batch_conn, inserted: apply_rollup_deltas(
+                batch_conn, rollup_deltas_from_records(inserted)
+            ),
+        )
+        summary["imported"] += len(new_records)
+
+    batch = []
+    for row_number, transaction in rows:
+        if isinstance(transaction, StatementRowError):
+            summary["invalid"] += 1
+            if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                summary["errors"].append({"row": row_number, "error": str(transaction)})
+            continue
+        batch.append(build_imported_expense_record(transaction, scope_id, currency, today))
+        if len(batch) >= batch_size:
+            write(batch)
+            batch = []
+    if batch:
+        write(batch)
+
+    seconds = time.perf_counter() - started
+    rows_seen = summary["imported"] + summary["duplicates"]
+    summary["seconds"] = round(seconds, 3)
+    summary["rows_per_second"] = round(rows_seen / seconds, 1) if seconds > 0 else None
+    return summary
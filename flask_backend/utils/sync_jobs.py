@@ -0,0 +1,215 @@
+"""
+In-process job queue for running Plaid syncs off the request thread.
+
+Jobs run on a small thread pool inside an app context. Their status is kept
+in memory, so it is only visible to the process that queued the job.
+"""
+
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class KeyClaimedError(RuntimeError):
+    """Raised when work is submitted for a key another job has claimed."""
+
+
+class SyncJob:
+    """State of one queued sync, updated by the worker as it progresses."""
+
+    def __init__(self, key, owner_id, scope_id=None):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.owner_id = owner_id
+        self.scope_id = scope_id
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def update_progress(self, **progress):
+        """Merge counters such as pages or added into the job's progress."""
+        with self._lock:
+            self.progress.update(progress)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            }
+
+
+class SyncJobQueue:
+    """
+    Thread pool plus a bounded registry of jobs.
+
+    Only one job per key (e.g. a Plaid item ID) is active at a time;
+    submitting the same key again returns the job already queued or running,
+    so two workers never advance the same sync cursor concurrently.
+
+    Work that covers several keys, such as a sync of every item or a
+    teardown, claims them with claim(). A claimed key is busy just like an
+    active job's key, and submitting it raises KeyClaimedError until the
+    claim is released.
+    """
+
+    def __init__(self, max_workers=2, max_finished=500, name="plaid-sync"):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()  # job_id -> SyncJob
+        self._active_by_key = {}  # key -> SyncJob
+        self._claims = {}  # key -> holder
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=None, max_finished=None):
+        """Change the pool size; takes effect when the pool is next started."""
+        with self._lock:
+            if max_workers is not None and max_workers != self.max_workers:
+                self.max_workers = max_workers
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+            if max_finished is not None:
+                self.max_finished = max_finished
+
+    def submit(self, app, key, owner_id, func, *args, scope_id=None):
+        """
+        Queue func(job, *args) to run inside an app context.
+
+        Args:
+            app (Flask): Application whose context the job runs in
+            key (hashable): Identifies the work; duplicates are coalesced
+            owner_id (int): Account that queued the job, or None
+            func (callable): Work to run; its return value becomes the result
+            scope_id (int, optional): Scope the work belongs to; anyone with
+                access to it may read the job's status, since a coalesced
+                job may have been queued by someone else
+
+        Returns:
+            SyncJob: The new job, or the active job already queued for key
+
+        Raises:
+            KeyClaimedError: If key is claimed by other work
+        """
+        with self._lock:
+            existing = self._active_by_key.get(key)
+            if existing is not None:
+                return existing
+            if key in self._claims:
+                raise KeyClaimedError(f"{key!r} is in use by another job")
+
+            job = SyncJob(key, owner_id, scope_id)
+            self._jobs[job.job_id] = job
+            self._active_by_key[key] = job
+            self._prune()
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+            self._executor.submit(self._run, app, job, func, args)
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def can_read(self, job, account_id, accessible_scope_ids):
+        """Return True if an account may read a job's status."""
+        return job.owner_id == account_id or (
+            job.scope_id is not None and job.scope_id in accessible_scope_ids
+        )
+
+    def is_active(self, key):
+        """Return True if a job for key is queued or running, or key is claimed."""
+        with self._lock:
+            return key in self._active_by_key or key in self._claims
+
+    def claim(self, keys, holder):
+        """
+        Claim whichever of keys no job is using or has claimed.
+
+        Checking and claiming happen under one lock, so no job for a claimed
+        key can start until release(holder). Claims held by a job of this
+        queue are released when the job finishes.
+
+        Args:
+            keys (iterable): Keys to claim
+            holder (object): Owner of the claims, e.g. the claiming job
+
+        Returns:
+            list: The keys now claimed by holder
+        """
+        with self._lock:
+            claimed = []
+            for key in keys:
+                if self._claims.get(key, holder) is not holder:
+                    continue
+                if self._active_by_key.get(key, holder) is not holder:
+                    continue
+                self._claims[key] = holder
+                claimed.append(key)
+            return claimed
+
+    def release(self, holder):
+        """Release every key claimed by holder."""
+        with self._lock:
+            for key in [key for key, owner in self._claims.items() if owner is holder]:
+                del self._claims[key]
+
+    def _run(self, app, job, func, args):
+        with job._lock:
+            job.status = RUNNING
+            job.started_at = datetime.now()
+        try:
+            with app.app_context():
+                result = func(job, *args)
+            with job._lock:
+                job.result = result
+                job.status = SUCCEEDED
+        except Exception as e:
+            app.logger.error("%s job %s failed:\n%s", self.name, job.job_id, traceback.format_exc())
+            with job._lock:
+                job.error = str(e)
+                job.status = FAILED
+        finally:
+            with job._lock:
+                job.finished_at = datetime.now()
+            with self._lock:
+                if self._active_by_key.get(job.key) is job:
+                    del self._active_by_key[job.key]
+            self.release(job)
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond max_finished."""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+sync_jobs = SyncJobQueue()
@@ -0,0 +1,262 @@
+"""
+Chunked deletion of a Plaid item's or a household scope's data.
+
+Dependent rows are deleted a bounded number at a time, each chunk in its own
+short transaction, so removing a large scope never escalates to a table lock
+on expenses and blocks other users. Progress is reported after every chunk.
+"""
+
+import time
+
+from sqlalchemy import and_, select
+
+from flask_backend.database.tables import (
+    category_targets_table,
+    expenses_table,
+    monthly_category_totals_table,
+    plaid_accounts_table,
+    plaid_items_table,
+    scope_access_table,
+    scopes_table,
+)
+from flask_backend.utils.plaid_accounts import forget_item_accounts, item_account_ids
+from flask_backend.utils.plaid_ingestion import delete_expenses_in_batches
+from flask_backend.utils.sync_jobs import SyncJobQueue, sync_jobs
+
+# Rows per DELETE and commit, well under SQL Server's lock escalation
+# threshold of about 5,000 locks per statement
+DEFAULT_TEARDOWN_BATCH_SIZE = 1000
+
+# Household deletes run here so a large scope doesn't tie up a request
+teardown_jobs = SyncJobQueue(max_workers=1, name="teardown")
+
+# How long a household teardown waits for running Plaid syncs to finish
+SYNC_CLAIM_TIMEOUT_SECONDS = 300
+SYNC_CLAIM_POLL_SECONDS = 1.0
+
+# InviteStatus of a scope's access records while the scope is torn down.
+# Only 'accepted' access counts for reads and writes, so members lose the
+# scope at once, while the owner's row is kept for a retry.
+DELETING = "deleting"
+
+
+def revoke_scope_access(conn, scope_id):
+    """
+    Cut off access to a scope that is about to be torn down.
+
+    Accepted access is marked DELETING and open invites are dropped, so no
+    one can write to the scope (or accept an invite to it) while its data is
+    deleted. Commits.
+
+    Returns:
+        int: Number of access records marked DELETING
+    """
+    access = scope_access_table.c
+    conn.execute(scope_access_table.delete().where(and_(
+        access.ScopeID == scope_id,
+        access.InviteStatus != "accepted",
+        access.InviteStatus != DELETING,
+    )))
+    revoked = conn.execute(
+        scope_access_table.update()
+        .where(and_(access.ScopeID == scope_id, access.InviteStatus == "accepted"))
+        .values(InviteStatus=DELETING)
+    ).rowcount
+    conn.commit()
+    return revoked
+
+
+def restore_scope_access(conn, scope_id):
+    """Give access back after a teardown that failed. Commits."""
+    access = scope_access_table.c
+    conn.execute(
+        scope_access_table.update()
+        .where(and_(access.ScopeID == scope_id, access.InviteStatus == DELETING))
+        .values(InviteStatus="accepted")
+    )
+    conn.commit()
+
+
+def claim_scope_items(conn, scope_id, holder, timeout=SYNC_CLAIM_TIMEOUT_SECONDS, progress=None):
+    """
+    Claim the sync queue keys of a scope's Plaid items, waiting for running
+    syncs to finish.
+
+    Free items are claimed straight away, so no new sync can start on them
+    while the rest are waited for. The caller releases the claims with
+    sync_jobs.release(holder) once the teardown is done.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        scope_id (int): The scope being torn down
+        holder (object): Owner of the claims
+        timeout (float): Seconds to wait for running syncs
+        progress (callable, optional): Called with waiting_for_syncs=<count>
+            while waiting
+
+    Raises:
+        TimeoutError: If some items were still syncing after timeout
+    """
+    pending = set(conn.execute(
+        select(plaid_items_table.c.PlaidItemID).where(plaid_items_table.c.ScopeID == scope_id)
+    ).scalars())
+    deadline = time.monotonic() + timeout
+
+    while True:
+        pending -= set(sync_jobs.claim(pending, holder))
+        if progress is not None:
+            progress(waiting_for_syncs=len(pending))
+        if not pending:
+            return
+        if time.monotonic() >= deadline:
+            raise TimeoutError("Plaid syncs for this household are still running; try again later")
+        time.sleep(SYNC_CLAIM_POLL_SECONDS)
+
+
+def delete_rows_in_batches(conn, table, key_column, condition,
+                           batch_size=DEFAULT_TEARDOWN_BATCH_SIZE, on_batch=None):
+    """
+    Delete the rows of a table matching a condition, batch_size at a time,
+    committing after each chunk.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        table (Table): Table to delete from
+        key_column (Column): The table's primary key column
+        condition (ColumnElement): WHERE clause selecting the rows
+        batch_size (int): Maximum rows per DELETE and commit
+        on_batch (callable): Optional on_batch(deleted_so_far) hook run
+            after each commit
+
+    Returns:
+        int: Number of rows deleted
+    """
+    batch_size = max(1, int(batch_size or DEFAULT_TEARDOWN_BATCH_SIZE))
+    deleted = 0
+
+    while True:
+        keys = conn.execute(
+            select(key_column).where(condition).limit(batch_size)
+        ).scalars().all()
+        if not keys:
+            break
+
+        deleted += conn.execute(table.delete().where(key_column.in_(keys))).rowcount
+        conn.commit()
+
+        if on_batch is not None:
+            on_batch(deleted)
+
+    return deleted
+
+
+def _progress_hook(progress, counts, name, already_deleted=0):
+    if progress is None:
+        return None
+
+    def on_batch(deleted):
+        counts[name] = already_deleted + deleted
+        progress(**counts)
+
+    return on_batch
+
+
+def teardown_plaid_item(conn, item_row_id, scope_id, delete_transactions=False,
+                        batch_size=DEFAULT_TEARDOWN_BATCH_SIZE, progress=None):
+    """
+    Delete a Plaid item, its recorded accounts and, optionally, its expenses.
+
+    Expenses are found through plaid_accounts, so no call to Plaid is needed,
+    and the monthly rollup is kept in step chunk by chunk.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        item_row_id (int): plaid_items.ItemID of the item
+        scope_id (int): The item's scope
+        delete_transactions (bool): Also delete the item's expenses
+        batch_size (int): Maximum rows per DELETE and commit
+        progress (callable, optional): Called with keyword counters after
+            each chunk
+
+    Returns:
+        dict: Rows deleted per table
+    """
+    counts = {"expenses": 0, "plaid_accounts": 0, "plaid_items": 0}
+
+    if delete_transactions:
+        counts["expenses"] = delete_expenses_in_batches(
+            conn,
+            and_(
+                expenses_table.c.ScopeID == scope_id,
+                expenses_table.c.PlaidAccountID.in_(item_account_ids(item_row_id)),
+            ),
+            batch_size,
+            on_batch=_progress_hook(progress, counts, "expenses"),
+        )
+
+    counts["plaid_accounts"] = forget_item_accounts(conn, item_row_id)
+    counts["plaid_items"] = conn.execute(
+        plaid_items_table.delete().where(plaid_items_table.c.ItemID == item_row_id)
+    ).rowcount
+    conn.commit()
+
+    if progress is not None:
+        progress(**counts)
+    return counts
+
+
+def teardown_scope(conn, scope_id, batch_size=DEFAULT_TEARDOWN_BATCH_SIZE, progress=None):
+    """
+    Delete a scope and everything stored under it.
+
+    Expenses go first, in chunks; the scope's rollup rows are then dropped
+    outright rather than adjusted chunk by chunk. Access records and the
+    scope itself go last, so an interrupted teardown leaves the owner able
+    to retry it. Callers revoke access first (revoke_scope_access); anything
+    a request already under way wrote during the teardown is swept up again
+    just before the scope row is deleted.
+
+    Args:
+        conn (Connection): An open SQLAlchemy Core connection
+        scope_id (int): The scope to delete
+        batch_size (int): Maximum rows per DELETE and commit
+        progress (callable, optional): Called with keyword counters after
+            each chunk
+
+    Returns:
+        dict: Rows deleted per table
+    """
+    counts = {
+        "expenses": 0,
+        "monthly_category_totals": 0,
+        "category_targets": 0,
+        "plaid_accounts": 0,
+        "plaid_items": 0,
+        "scope_access": 0,
+        "scopes": 0,
+    }
+
+    dependents = (
+        (expenses_table, expenses_table.c.ExpenseID),
+        (monthly_category_totals_table, monthly_category_totals_table.c.RollupID),
+        (category_targets_table, category_targets_table.c.TargetID),
+        (plaid_accounts_table, plaid_accounts_table.c.PlaidAccountID),
+        (plaid_items_table, plaid_items_table.c.ItemID),
+        (scope_access_table, scope_access_table.c.AccessID),
+    )
+    # The second pass only finds rows written while the first one ran
+    steps = dependents + dependents + ((scopes_table, scopes_table.c.ScopeID),)
+    for table, key_column in steps:
+        already_deleted = counts[table.name]
+        counts[table.name] = already_deleted + delete_rows_in_batches(
+            conn,
+            table,
+            key_column,
+            table.c.ScopeID == scope_id,
+            batch_size,
+            on_batch=_progress_hook(progress, counts, table.name, already_deleted),
+        )
+
+    if progress is not None:
+        progress(**counts)
+    return counts
@@ -0,0 +1,81 @@
+"""
+A small thread-safe, size-bounded cache with per-entry expiry.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after `ttl` seconds.
+
+    A cache with ttl <= 0 or maxsize <= 0 is disabled: get() always misses
+    and put() stores nothing. Hit and miss counters are kept so the cache
+    can be sized from production traffic.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def configure(self, maxsize=None, ttl=None):
+        """Change the size or TTL, dropping any cached entries."""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
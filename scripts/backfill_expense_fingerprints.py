@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Add the Fingerprint, BankTransactionID and BankAccountID columns to
+expenses and fill in fingerprints for existing rows.
+
+Manual and imported expenses written before the column existed have no
+fingerprint, so duplicate checks and statement imports wouldn't see them.
+Rows are updated a batch at a time by ExpenseID, each batch in its own
+transaction. Run scripts/create_expense_indexes.py afterwards to build
+IX_expenses_ScopeID_Fingerprint and
+IX_expenses_ScopeID_BankAccountID_BankTransactionID.
+Safe to re-run.
+
+Usage:
+    python scripts/backfill_expense_fingerprints.py
+    python scripts/backfill_expense_fingerprints.py --batch-size 5000
+"""
+
+import argparse
+
+from sqlalchemy import and_, select, text
+
+from flask_backend.create_app import create_app
+from flask_backend.database.tables import expenses_table, idempotency_keys_table
+from flask_backend.utils.expense_fingerprints import FINGERPRINTED, refresh_expense_fingerprints
+
+# Columns added to expenses for duplicate checks; BankTransactionID holds
+# the FITID of transactions imported from OFX/QFX statements, and
+# BankAccountID a digest of the account it belongs to
+NEW_COLUMNS = (
+    ("Fingerprint", "VARCHAR(64)"),
+    ("BankTransactionID", "NVARCHAR(255)"),
+    ("BankAccountID", "VARCHAR(64)"),
+)
+
+
+def column_exists(connection, column_name):
+    result = connection.execute(
+        text("""
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_NAME = 'expenses'
+            AND COLUMN_NAME = :column_name
+        """),
+        {"column_name": column_name},
+    )
+    return result.scalar() > 0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--batch-size", type=int, default=1000, help="Expenses per UPDATE and commit")
+    args = arg_parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        engine = app.config["ENGINE"]
+        idempotency_keys_table.create(bind=engine, checkfirst=True)
+
+        with engine.connect() as connection:
+            for column_name, column_type in NEW_COLUMNS:
+                if column_exists(connection, column_name):
+                    print(f"Column '{column_name}' already exists.")
+                    continue
+                connection.execute(text(f"ALTER TABLE expenses ADD {column_name} {column_type} NULL"))
+                connection.commit()
+                print(f"Added column '{column_name}'.")
+
+            last_id = 0
+            updated = 0
+            while True:
+                expense_ids = connection.execute(
+                    select(expenses_table.c.ExpenseID)
+                    .where(and_(
+                        expenses_table.c.ExpenseID > last_id,
+                        expenses_table.c.Fingerprint.is_(None),
+                        FINGERPRINTED,
+                    ))
+                    .order_by(expenses_table.c.ExpenseID)
+                    .limit(args.batch_size)
+                ).scalars().all()
+                if not expense_ids:
+                    break
+
+                updated += refresh_expense_fingerprints(
+                    connection,
+                    expenses_table.c.ExpenseID.in_(expense_ids),
+                    args.batch_size,
+                )
+                connection.commit()
+                last_id = expense_ids[-1]
+                print(f"Fingerprinted {updated} expenses (through ExpenseID {last_id}).")
+
+        print(f"Done: {updated} expenses fingerprinted. "
+              f"Now run scripts/create_expense_indexes.py.")
+
+
+if __name__ == "__main__":
+    main()
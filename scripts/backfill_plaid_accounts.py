@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Create the plaid_accounts table and record the accounts of every linked item.
+
+Items linked before plaid_accounts existed have no rows there until their
+next sync. Run this once after deploying so deleting such an item doesn't
+have to ask Plaid for its accounts.
+
+Usage:
+    python scripts/backfill_plaid_accounts.py            # items with no accounts recorded
+    python scripts/backfill_plaid_accounts.py --all      # refresh every item
+"""
+
+import argparse
+
+import plaid
+from plaid.model.accounts_get_request import AccountsGetRequest
+
+from flask_backend.create_app import create_app
+from flask_backend.database.models import PlaidItem
+from flask_backend.database.tables import plaid_accounts_table
+from flask_backend.routes.plaid_routes import client
+from flask_backend.utils.plaid_accounts import count_item_accounts, record_plaid_accounts
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument(
+        "--all", action="store_true",
+        help="Refresh items that already have accounts recorded too",
+    )
+    args = arg_parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        engine = app.config["ENGINE"]
+        plaid_accounts_table.create(bind=engine, checkfirst=True)
+
+        recorded = failed = skipped = 0
+        with engine.connect() as connection:
+            for plaid_item in PlaidItem.query.order_by(PlaidItem.ItemID).all():
+                if not args.all and count_item_accounts(connection, plaid_item.ItemID):
+                    skipped += 1
+                    continue
+                try:
+                    response = client.accounts_get(
+                        AccountsGetRequest(access_token=plaid_item.AccessToken)
+                    )
+                except plaid.ApiException as e:
+                    print(f"Item {plaid_item.PlaidItemID} ({plaid_item.InstitutionName}): {e.reason}")
+                    failed += 1
+                    continue
+                count = record_plaid_accounts(
+                    connection, plaid_item.ItemID, plaid_item.ScopeID,
+                    response.to_dict()["accounts"],
+                )
+                connection.commit()
+                print(f"Item {plaid_item.PlaidItemID} ({plaid_item.InstitutionName}): "
+                      f"{count} accounts recorded.")
+                recorded += 1
+
+        print(f"Done: {recorded} items recorded, {skipped} already recorded, {failed} failed.")
+        if failed:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
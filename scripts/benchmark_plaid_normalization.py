@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Measure how fast Plaid transactions are turned into expense records.
+
+Compares build_plaid_expense_records with the previous per-row builder
+(dateutil parsing and strftime for every transaction) on synthetic ISO-dated
+transactions. Doesn't touch the database or the app config.
+
+Usage:
+    python scripts/benchmark_plaid_normalization.py
+    python scripts/benchmark_plaid_normalization.py --count 500000 --repeat 5
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from dateutil import parser
+
+from flask_backend.utils.category_mapping import categorize_transactions, is_income_category
+from flask_backend.utils.plaid_ingestion import build_plaid_expense_records
+
+
+def synthetic_transactions(count, seed=0):
+    rng = random.Random(seed)
+    start = date(2023, 1, 1)
+    transactions = []
+    for i in range(count):
+        posted = start + timedelta(days=rng.randint(0, 730))
+        transactions.append({
+            "account_id": f"acct-{i % 7}",
+            "transaction_id": f"txn-{i}",
+            "amount": round(rng.uniform(-500, 500), 2),
+            "iso_currency_code": "USD",
+            "date": posted.isoformat(),
+            "authorized_date": (posted - timedelta(days=rng.randint(0, 3))).isoformat()
+            if rng.random() < 0.8 else None,
+            "merchant_name": rng.choice(["Starbucks", "Uber", "Target", None]),
+            "name": "POS PURCHASE",
+            "pending": False,
+            "personal_finance_category": {
+                "primary": "FOOD_AND_DRINK",
+                "detailed": "FOOD_AND_DRINK_COFFEE",
+                "confidence_level": "HIGH",
+            },
+        })
+    return transactions
+
+
+def legacy_build_record(txn, scope_id, category):
+    """The per-row builder as it was before build_plaid_expense_records."""
+    try:
+        authorized_date_str = txn.get("authorized_date")
+        plaid_authorized_date = parser.parse(authorized_date_str).date() if authorized_date_str else None
+    except Exception:
+        plaid_authorized_date = None
+
+    try:
+        date_str = txn.get("date")
+        plaid_date = parser.parse(date_str).date() if date_str else None
+    except Exception:
+        plaid_date = None
+
+    if plaid_date:
+        day, month, year = plaid_date.day, plaid_date.strftime("%B"), plaid_date.year
+        expense_date, expense_day_of_week = plaid_date, plaid_date.strftime("%A")
+    else:
+        today = datetime.now().date()
+        day, month, year = today.day, today.strftime("%B"), today.year
+        expense_date, expense_day_of_week = today, today.strftime("%A")
+
+    return {
+        "ScopeID": scope_id,
+        "PersonID": None,
+        "Day": day,
+        "Month": month,
+        "Year": year,
+        "ExpenseDate": expense_date,
+        "ExpenseDayOfWeek": expense_day_of_week,
+        "Amount": txn.get("amount"),
+        "AdjustedAmount": txn.get("amount"),
+        "ExpenseCategory": category,
+        "AdditionalNotes": None,
+        "CreateDate": datetime.now().date(),
+        "LastUpdated": datetime.now().date(),
+        "Currency": txn.get("iso_currency_code"),
+        "SuggestedCategory": None,
+        "CategoryConfirmed": False,
+        "IsIncome": is_income_category(category),
+        "PlaidAccountID": txn.get("account_id"),
+        "PlaidTransactionID": txn.get("transaction_id"),
+        "PlaidTransactionType": txn.get("transaction_type"),
+        "PlaidCategoryID": txn.get("category_id"),
+        "PlaidAuthorizedDate": plaid_authorized_date,
+        "PlaidDate": plaid_date,
+        "PlaidAmount": txn.get("amount"),
+        "PlaidCurrencyCode": txn.get("iso_currency_code"),
+        "PlaidMerchantLogoURL": txn.get("logo_url"),
+        "PlaidMerchantEntityID": txn.get("merchant_entity_id"),
+        "PlaidMerchantName": txn.get("merchant_name"),
+        "PlaidName": txn.get("name"),
+        "PlaidPending": txn.get("pending"),
+        "PlaidPendingTransactionID": txn.get("pending_transaction_id"),
+        "PlaidPersonalFinanceCategoryConfidence": txn.get("personal_finance_category", {}).get("confidence_level"),
+        "PlaidPersonalFinanceCategoryDetailed": txn.get("personal_finance_category", {}).get("detailed"),
+        "PlaidPersonalFinanceCategoryPrimary": txn.get("personal_finance_category", {}).get("primary"),
+        "PlaidPersonalFinanceCategoryIconURL": txn.get("personal_finance_category_icon_url"),
+    }
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--count", type=int, default=100_000, help="Transactions to normalize")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation; the best is reported")
+    args = arg_parser.parse_args()
+
+    transactions = synthetic_transactions(args.count)
+    # Categorization is timed separately (scripts/benchmark_category_mapping.py)
+    categories = categorize_transactions(transactions)
+
+    legacy_seconds, legacy = best_of(args.repeat, lambda: [
+        legacy_build_record(txn, 1, category) for txn, category in zip(transactions, categories)
+    ])
+    batch_seconds, batch = best_of(
+        args.repeat, lambda: build_plaid_expense_records(transactions, 1, categories)
+    )
+
+    date_columns = ("Day", "Month", "Year", "ExpenseDate", "ExpenseDayOfWeek", "PlaidAuthorizedDate", "PlaidDate")
+    mismatches = sum(
+        1 for old, new in zip(legacy, batch)
+        if any(old[column] != new[column] for column in date_columns)
+    )
+
+    print(f"{args.count} synthetic transactions, best of {args.repeat} runs")
+    print(f"  per-row builder:  {legacy_seconds:.3f}s  ({args.count / legacy_seconds:,.0f} txns/sec)")
+    print(f"  batch builder:    {batch_seconds:.3f}s  ({args.count / batch_seconds:,.0f} txns/sec)")
+    print(f"  speed-up:         {legacy_seconds / batch_seconds:.1f}x")
+    print(f"  records with different date fields: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
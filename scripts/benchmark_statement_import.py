@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Measure how fast bank statements are parsed into expense records.
+
+Generates a synthetic CSV and OFX statement and times the streaming parsers
+plus build_imported_expense_record over them. Doesn't touch the database or
+the app config, so the numbers exclude the INSERTs; those depend on the SQL
+Server instance.
+
+Usage:
+    python scripts/benchmark_statement_import.py
+    python scripts/benchmark_statement_import.py --count 200000 --repeat 5
+"""
+
+import argparse
+import io
+import random
+import time
+from datetime import date, timedelta
+
+from flask_backend.utils.statement_import import (
+    StatementRowError,
+    build_imported_expense_record,
+    iter_csv_statement,
+    iter_ofx_statement,
+)
+
+PAYEES = ["STARBUCKS #123", "UBER TRIP", "TARGET 0042", "ACME PAYROLL", "SHELL OIL 5744", "NETFLIX.COM"]
+
+
+def synthetic_statements(count, seed=0):
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    csv_lines = ["Date,Description,Amount"]
+    ofx_parts = ["OFXHEADER:100\n\n<OFX><BANKTRANLIST>\n"]
+    for i in range(count):
+        posted = start + timedelta(days=rng.randint(0, 365))
+        payee = f"{rng.choice(PAYEES)} {rng.randint(1, 99)}"
+        amount = round(rng.uniform(-300, 300), 2)
+        csv_lines.append(f"{posted.isoformat()},{payee},{amount:.2f}")
+        ofx_parts.append(
+            f"<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>{posted:%Y%m%d}120000\n"
+            f"<TRNAMT>{amount:.2f}\n<FITID>{i}\n<NAME>{payee}\n</STMTTRN>\n"
+        )
+    ofx_parts.append("</BANKTRANLIST></OFX>\n")
+    return "\n".join(csv_lines).encode(), "".join(ofx_parts).encode()
+
+
+def parse_and_build(rows):
+    records = 0
+    for _, transaction in rows:
+        if not isinstance(transaction, StatementRowError):
+            build_imported_expense_record(transaction, scope_id=1)
+            records += 1
+    return records
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--count", type=int, default=50_000, help="Transactions per statement")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Runs per format; the best is reported")
+    args = arg_parser.parse_args()
+
+    csv_bytes, ofx_bytes = synthetic_statements(args.count)
+
+    print(f"{args.count} synthetic transactions per statement, best of {args.repeat} runs")
+    for name, data, parser in (
+        ("CSV", csv_bytes, iter_csv_statement),
+        ("OFX", ofx_bytes, iter_ofx_statement),
+    ):
+        seconds, records = best_of(args.repeat, lambda: parse_and_build(parser(io.BytesIO(data))))
+        print(f"  {name}: {len(data) / 1e6:.1f} MB, {records} records in {seconds:.3f}s "
+              f"({records / seconds:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
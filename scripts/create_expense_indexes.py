@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Migration script to create the indexes declared on expenses_table in an
+existing database.
+
+Indexes are built with ONLINE = ON where the server supports it (Azure SQL,
+Enterprise and Developer editions), so the expenses table stays readable and
+writable while they build. On other editions the script falls back to an
+offline build.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex
+
+from flask_backend.create_app import create_app
+from flask_backend.database.tables import expenses_table
+
+# SQL Server error raised when ONLINE index operations aren't available
+ONLINE_NOT_SUPPORTED_ERROR = "1712"
+
+
+def index_exists(connection, index_name):
+    result = connection.execute(
+        text("""
+            SELECT COUNT(*)
+            FROM sys.indexes
+            WHERE name = :index_name
+            AND object_id = OBJECT_ID('expenses')
+        """),
+        {"index_name": index_name},
+    )
+    return result.scalar() > 0
+
+
+def count_duplicate_plaid_keys(connection):
+    """Count Plaid key pairs that would violate the unique index."""
+    result = connection.execute(text("""
+        SELECT COUNT(*) FROM (
+            SELECT PlaidAccountID, PlaidTransactionID
+            FROM expenses
+            WHERE PlaidAccountID IS NOT NULL
+            AND PlaidTransactionID IS NOT NULL
+            GROUP BY PlaidAccountID, PlaidTransactionID
+            HAVING COUNT(*) > 1
+        ) AS duplicates
+    """))
+    return result.scalar()
+
+
+def create_expense_indexes():
+    """Create any missing expenses indexes"""
+    app = create_app()
+
+    with app.app_context():
+        engine = app.config["ENGINE"]
+
+        for index in sorted(expenses_table.indexes, key=lambda i: i.name):
+            with engine.connect() as connection:
+                if index_exists(connection, index.name):
+                    print(f"Index '{index.name}' already exists, skipping creation.")
+                    continue
+
+                if index.unique and "Plaid" in index.name:
+                    duplicates = count_duplicate_plaid_keys(connection)
+                    if duplicates:
+                        print(
+                            f"Skipping '{index.name}': {duplicates} Plaid transactions "
+                            f"are stored more than once. Remove the duplicates first."
+                        )
+                        continue
+
+                ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+                try:
+                    connection.execute(text(f"{ddl} WITH (ONLINE = ON)"))
+                    connection.commit()
+                    print(f"Created index '{index.name}' online.")
+                except DBAPIError as e:
+                    connection.rollback()
+                    if ONLINE_NOT_SUPPORTED_ERROR not in str(e.orig):
+                        raise
+                    print(f"Online index builds not supported, creating '{index.name}' offline...")
+                    connection.execute(text(ddl))
+                    connection.commit()
+                    print(f"Created index '{index.name}'.")
+
+
+if __name__ == "__main__":
+    create_expense_indexes()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Backfill or verify the monthly_category_totals rollup table.
+
+Usage:
+    python scripts/rebuild_monthly_totals.py            # rebuild every scope
+    python scripts/rebuild_monthly_totals.py --scope 12 # rebuild one scope
+    python scripts/rebuild_monthly_totals.py --check    # report drift only
+"""
+
+import argparse
+
+from flask_backend.create_app import create_app
+from flask_backend.database.tables import monthly_category_totals_table
+from flask_backend.utils.rollups import rebuild_monthly_totals, find_rollup_mismatches
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument(
+        "--scope", type=int, action="append", dest="scope_ids",
+        help="Limit to this ScopeID (may be repeated)",
+    )
+    arg_parser.add_argument(
+        "--check", action="store_true",
+        help="Compare the rollup with the expenses table without changing it",
+    )
+    args = arg_parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        engine = app.config["ENGINE"]
+        monthly_category_totals_table.create(bind=engine, checkfirst=True)
+
+        with engine.connect() as connection:
+            if args.check:
+                mismatches = find_rollup_mismatches(connection, args.scope_ids)
+                for mismatch in mismatches:
+                    print(
+                        f"Scope {mismatch['scope_id']} "
+                        f"{mismatch['year']}-{mismatch['month']:02d} "
+                        f"'{mismatch['category']}' (income: {mismatch['is_income']}): "
+                        f"expected {mismatch['expected_total']:.2f} over "
+                        f"{mismatch['expected_count']} expenses, found "
+                        f"{mismatch['actual_total']:.2f} over {mismatch['actual_count']}"
+                    )
+                if mismatches:
+                    print(f"{len(mismatches)} rollup buckets are out of date. "
+                          f"Run without --check to rebuild them.")
+                    raise SystemExit(1)
+                print("Rollup is consistent with the expenses table.")
+                return
+
+            written = rebuild_monthly_totals(connection, args.scope_ids)
+            connection.commit()
+            print(f"Rebuilt monthly_category_totals: {written} rows written.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Post a canned Plaid webhook body to a locally running app.
+
+Start the app with PLAID_WEBHOOK_VERIFY=false, since these requests aren't
+signed by Plaid.
+
+Usage:
+    python scripts/send_plaid_webhook.py ITEM_ID
+    python scripts/send_plaid_webhook.py ITEM_ID --code DEFAULT_UPDATE
+    python scripts/send_plaid_webhook.py ITEM_ID --url http://localhost:5000/api/plaid/webhook
+"""
+
+import argparse
+import json
+import urllib.request
+
+CANNED_WEBHOOKS = {
+    "SYNC_UPDATES_AVAILABLE": {
+        "webhook_type": "TRANSACTIONS",
+        "webhook_code": "SYNC_UPDATES_AVAILABLE",
+        "initial_update_complete": True,
+        "historical_update_complete": True,
+        "environment": "sandbox",
+    },
+    "DEFAULT_UPDATE": {
+        "webhook_type": "TRANSACTIONS",
+        "webhook_code": "DEFAULT_UPDATE",
+        "new_transactions": 3,
+        "error": None,
+        "environment": "sandbox",
+    },
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("item_id", help="PlaidItemID the webhook is about")
+    arg_parser.add_argument(
+        "--code", choices=sorted(CANNED_WEBHOOKS), default="SYNC_UPDATES_AVAILABLE",
+        help="Webhook code to send",
+    )
+    arg_parser.add_argument(
+        "--url", default="http://localhost:5000/api/plaid/webhook",
+        help="Webhook receiver URL",
+    )
+    args = arg_parser.parse_args()
+
+    body = dict(CANNED_WEBHOOKS[args.code], item_id=args.item_id)
+    webhook_request = urllib.request.Request(
+        args.url,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(webhook_request) as response:
+        print(response.status, response.read().decode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+// vue-frontend/src/utils/syncJobs.js
+
+/**
+ * Queues a transactions sync for a Plaid item and waits for it to finish
+ * @param {string} itemId - Plaid item ID to sync
+ * @param {number} intervalMs - Delay between status checks
+ * @returns {Promise<Object>} The sync result (added, modified, removed, institution_name, ...)
+ */
+export async function syncPlaidItem(itemId, intervalMs = 1000) {
+  const response = await fetch('/api/sync_transactions', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ item_id: itemId }),
+  });
+  if (!response.ok) {
+    throw new Error('Failed to sync transactions');
+  }
+  const data = await response.json();
+  if (!data.success) {
+    throw new Error(data.error || 'Failed to sync transactions');
+  }
+  return waitForSyncJob(data.job_id, intervalMs);
+}
+
+/**
+ * Queues one sync of every Plaid item the user can access and waits for it
+ * @param {number} intervalMs - Delay between status checks
+ * @returns {Promise<Object>} Totals plus per-item counts and timing
+ */
+export async function syncAllPlaidItems(intervalMs = 1000) {
+  const response = await fetch('/api/sync_all_items', { method: 'POST' });
+  if (!response.ok) {
+    throw new Error('Failed to sync transactions');
+  }
+  const data = await response.json();
+  if (!data.success) {
+    throw new Error(data.error || 'Failed to sync transactions');
+  }
+  return waitForSyncJob(data.job_id, intervalMs);
+}
+
+/**
+ * Polls a queued sync job until it succeeds or fails
+ * @param {string} jobId - Job ID returned by /api/sync_transactions
+ * @param {number} intervalMs - Delay between status checks
+ * @returns {Promise<Object>} The job's result
+ */
+export function waitForSyncJob(jobId, intervalMs = 1000) {
+  return waitForJob(`/api/sync_jobs/${jobId}`, 'sync transactions', intervalMs);
+}
+
+/**
+ * Polls a household deletion until it succeeds or fails
+ * @param {string} jobId - Job ID returned by /api/delete_household
+ * @param {Function} onProgress - Optional callback receiving rows deleted so far per table
+ * @param {number} intervalMs - Delay between status checks
+ * @returns {Promise<Object>} Rows deleted per table
+ */
+export function waitForTeardownJob(jobId, onProgress = null, intervalMs = 1000) {
+  return waitForJob(`/api/teardown_jobs/${jobId}`, 'delete household', intervalMs, onProgress);
+}
+
+async function waitForJob(statusUrl, action, intervalMs, onProgress = null) {
+  for (;;) {
+    const response = await fetch(statusUrl);
+    if (!response.ok) {
+      throw new Error(`Failed to check ${action} status`);
+    }
+    const job = await response.json();
+    if (job.status === 'succeeded') {
+      return job.result;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || `Failed to ${action}`);
+    }
+    if (onProgress) {
+      onProgress(job.progress);
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}